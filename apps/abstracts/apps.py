@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class AbstractsConfig(AppConfig):
     name = 'abstracts'
+
+    def ready(self) -> None:  # noqa
+        from abstracts.counters import connect_counters
+        from abstracts.storage import connect_blob_references
+        connect_counters()
+        connect_blob_references()
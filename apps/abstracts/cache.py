@@ -0,0 +1,143 @@
+"""Read-through cache of single model instances."""
+from hashlib import sha1
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import (
+    BaseCache,
+    caches,
+)
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models import (
+    Model,
+    QuerySet,
+)
+
+
+INSTANCE_CACHE_ALIAS = 'instances'
+
+
+def get_instance_cache() -> BaseCache:
+    """Get cache backend for instances."""
+    return caches[INSTANCE_CACHE_ALIAS]
+
+
+def get_cache_timeout(model: Type[Model]) -> Optional[int]:
+    """Get TTL of the model or None if the model is not cached."""
+    cached_models: dict = getattr(settings, "INSTANCE_CACHE_MODELS", {})
+    return cached_models.get(model._meta.label)
+
+
+def _get_version_key(model: Type[Model], pk: Any) -> str:
+    return f"instance-version:{model._meta.label_lower}:{pk}"
+
+
+def _add_instance_version(model: Type[Model], pk: Any) -> str:
+    """Set a new version token of the instance unless another was set."""
+    cache: BaseCache = get_instance_cache()
+    key: str = _get_version_key(model, pk)
+    version: str = uuid4().hex
+    if not cache.add(key, version, timeout=None):
+        version = cache.get(key, version)
+    return version
+
+
+def get_instance_version(model: Type[Model], pk: Any) -> str:
+    """Get current version token of the instance.
+
+    A missing token (expired or evicted) is replaced with a new one, so
+    entries cached under an older token can never be read again.
+    """
+    version: Optional[str] = get_instance_cache().get(
+        _get_version_key(model, pk)
+    )
+    return version or _add_instance_version(model, pk)
+
+
+def invalidate_instances(model: Type[Model], pks: Iterable[Any]) -> None:
+    """Make all cached copies of the instances unreachable."""
+    keys: List[str] = [
+        _get_version_key(model, pk) for pk in pks if pk is not None
+    ]
+    if not keys or get_cache_timeout(model) is None:
+        return
+
+    def drop_versions() -> None:
+        # The next reader sets a new token matching no cached entry
+        get_instance_cache().delete_many(keys)
+
+    drop_versions()
+    # Readers of the old rows could have cached them again before commit
+    transaction.on_commit(drop_versions)
+
+
+def invalidate_instance(model: Type[Model], pk: Any) -> None:
+    """Make all cached copies of the instance unreachable."""
+    invalidate_instances(model, [pk])
+
+
+def get_cached_instance(queryset: QuerySet, pk: Any) -> Model:
+    """Get instance by PK from cache or from the provided queryset.
+
+    Querysets with prefetch_related lookups are not cached because their
+    related rows are invalidated independently. Entries keep the version
+    token they were cached with, so a hit takes one read of the shared
+    cache. Raises DoesNotExist the same way as queryset.get().
+    """
+    model: Type[Model] = queryset.model
+    timeout: Optional[int] = get_cache_timeout(model)
+    if timeout is None or queryset._prefetch_related_lookups:
+        return queryset.get(pk=pk)
+    try:
+        query_hash: str = sha1(str(queryset.query).encode()).hexdigest()
+    except EmptyResultSet:
+        return queryset.get(pk=pk)
+
+    cache: BaseCache = get_instance_cache()
+    version_key: str = _get_version_key(model, pk)
+    key: str = f"instance:{model._meta.label_lower}:{pk}:{query_hash}"
+    cached: Dict[str, Any] = cache.get_many([version_key, key])
+    version: Optional[str] = cached.get(version_key)
+    entry: Optional[Tuple[str, Model]] = cached.get(key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    if version is None:
+        version = _add_instance_version(model, pk)
+    obj: Model = queryset.get(pk=pk)
+    cache.set(key, (version, obj), timeout=timeout)
+    return obj
+
+
+class InstanceCacheQuerySet(QuerySet):
+    """Queryset invalidating cached instances it updates or deletes."""
+
+    def get_cached_pks(self) -> List[Any]:
+        """Get PKs of the rows if instances of the model are cached."""
+        if get_cache_timeout(self.model) is None:
+            return []
+        return list(self.order_by().values_list("pk", flat=True))
+
+    def update(self, **kwargs: Any) -> int:
+        """Update rows and invalidate their cached copies."""
+        pks: List[Any] = self.get_cached_pks()
+        number: int = super().update(**kwargs)
+        invalidate_instances(self.model, pks)
+        return number
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete rows and invalidate their cached copies."""
+        pks: List[Any] = self.get_cached_pks()
+        deleted: Tuple[int, Dict[str, int]] = super().delete()
+        invalidate_instances(self.model, pks)
+        return deleted
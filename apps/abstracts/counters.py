@@ -0,0 +1,481 @@
+"""Denormalized counters of many-to-many relations."""
+import atexit
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import (
+    Lock,
+    Timer,
+    local,
+)
+from time import monotonic
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from django.apps import apps
+from django.conf import settings
+from django.db import (
+    models,
+    transaction,
+)
+from django.db.models import (
+    Count,
+    F,
+    Model,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.base import ModelBase
+from django.db.models.functions import (
+    Coalesce,
+    Greatest,
+)
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+
+from abstracts.workers import get_worker
+
+
+COUNTERS_WORKER_NAME = "counters"
+DEFAULT_HOT_KEY_THRESHOLD = 50
+DEFAULT_BUFFER_FLUSH_INTERVAL = 1.0
+HOT_KEY_WINDOW = 1.0
+HOT_KEYS_MAX_TRACKED = 10000
+
+_deferred: local = local()
+
+
+class CounterField(models.PositiveIntegerField):
+    """Number of objects related through the many-to-many field ``source``.
+
+    The value is kept in step by signals (see connect_counters) and can be
+    rebuilt with the rebuild_counters management command.
+    """
+
+    def __init__(self, source: str, *args: Any, **kwargs: Any) -> None:
+        """Initialize parameters."""
+        self.source: str = source
+        kwargs.setdefault("default", 0)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self) -> Tuple[str, str, list, dict]:  # noqa
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+
+def get_counter_fields() -> List[CounterField]:
+    """Get counter fields of all installed models."""
+    return [
+        field
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, CounterField)
+    ]
+
+
+def _get_m2m_names(counter: CounterField) -> Tuple[Any, str, str]:
+    """Get through model and names of its FKs to the owner and target."""
+    m2m_field: models.ManyToManyField = \
+        counter.model._meta.get_field(counter.source)
+    return (
+        m2m_field.remote_field.through,
+        m2m_field.m2m_field_name(),
+        m2m_field.m2m_reverse_field_name(),
+    )
+
+
+def adjust_counter(
+    model: Type[Model],
+    pks: Iterable[Any],
+    field_name: str,
+    delta: int
+) -> None:
+    """Atomically add delta to the counter of given objects."""
+    pks = [pk for pk in pks if pk is not None]
+    if not delta or not pks:
+        return
+    pending: Optional[DefaultDict] = getattr(_deferred, "pending", None)
+    if pending is not None:
+        pk: Any
+        for pk in pks:
+            pending[(model, field_name, pk)] += delta
+        return
+
+    value: Any = F(field_name) + delta
+    if delta < 0:
+        value = Greatest(value, Value(0))
+    model._default_manager.filter(pk__in=pks).update(**{field_name: value})
+
+
+@contextmanager
+def deferred_counters(coalesce: bool = False) -> Iterator[None]:
+    """Collect counter adjustments and apply them on exit.
+
+    Row-by-row signals inside the block (e.g. queryset.delete() of a
+    through model) end up in one UPDATE per counter value instead of one
+    UPDATE per row. With coalesce the adjustments go through the counter
+    buffer of the process, which batches writes of hot rows.
+    """
+    if getattr(_deferred, "pending", None) is not None:
+        yield
+        return
+
+    _deferred.pending = defaultdict(int)
+    try:
+        yield
+        pending: DefaultDict = _deferred.pending
+    finally:
+        _deferred.pending = None
+
+    key: Tuple[Any, str, Any]
+    delta: int
+    if coalesce:
+        buffer: CounterBuffer = get_counter_buffer()
+        for key, delta in pending.items():
+            buffer.adjust(key[0], key[2], key[1], delta)
+        return
+
+    grouped: DefaultDict[Tuple[Any, str, int], List[Any]] = defaultdict(list)
+    for key, delta in pending.items():
+        grouped[(key[0], key[1], delta)].append(key[2])
+    pks: List[Any]
+    for (model, field_name, delta), pks in grouped.items():
+        adjust_counter(model, pks, field_name, delta)
+
+
+class CounterBuffer:
+    """Write-coalescing buffer of counter adjustments of hot rows.
+
+    A row is hot when its counter is adjusted more than
+    hot_key_threshold times per second. Deltas of hot rows are summed in
+    memory and written by one UPDATE per row every flush_interval
+    seconds, so thousands of likes of one viral news do not queue on its
+    row lock. Other rows are updated right away.
+    """
+
+    def __init__(
+        self,
+        hot_key_threshold: int = DEFAULT_HOT_KEY_THRESHOLD,
+        flush_interval: float = DEFAULT_BUFFER_FLUSH_INTERVAL
+    ) -> None:
+        """Initialize parameters."""
+        self.hot_key_threshold: int = hot_key_threshold
+        self.flush_interval: float = flush_interval
+        self.lock: Lock = Lock()
+        self.timer: Optional[Timer] = None
+        self.pending: DefaultDict[Tuple[Any, str, Any], int] = \
+            defaultdict(int)
+        # key -> (start of the current second, adjustments in it)
+        self.hits: Dict[Tuple[Any, str, Any], Tuple[float, int]] = {}
+
+    def __is_hot(self, key: Tuple[Any, str, Any]) -> bool:
+        now: float = monotonic()
+        if len(self.hits) > HOT_KEYS_MAX_TRACKED:
+            self.hits = {
+                hit_key: hit for hit_key, hit in self.hits.items()
+                if now - hit[0] < HOT_KEY_WINDOW
+            }
+        started: float
+        number: int
+        started, number = self.hits.get(key, (now, 0))
+        if now - started >= HOT_KEY_WINDOW:
+            started, number = now, 0
+        self.hits[key] = (started, number + 1)
+        return number + 1 > self.hot_key_threshold or key in self.pending
+
+    def __schedule_flush(self) -> None:
+        if getattr(settings, "BACKGROUND_WORKERS_SYNC", False):
+            self.flush()
+            return
+        with self.lock:
+            if self.timer:
+                return
+            self.timer = Timer(self.flush_interval, self.__on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def __on_timer(self) -> None:
+        with self.lock:
+            self.timer = None
+        get_worker(COUNTERS_WORKER_NAME).submit(self.flush)
+
+    def adjust(
+        self,
+        model: Type[Model],
+        pk: Any,
+        field_name: str,
+        delta: int
+    ) -> None:
+        """Add delta to the counter now or with the next flush if hot.
+
+        Buffered deltas are taken after the commit of the transaction, so
+        a rolled back change is never flushed.
+        """
+        if not delta:
+            return
+        key: Tuple[Any, str, Any] = (model, field_name, pk)
+        with self.lock:
+            is_hot: bool = self.__is_hot(key)
+        if is_hot:
+            transaction.on_commit(lambda: self.__add_pending(key, delta))
+        else:
+            adjust_counter(model, [pk], field_name, delta)
+
+    def __add_pending(self, key: Tuple[Any, str, Any], delta: int) -> None:
+        with self.lock:
+            self.pending[key] += delta
+        self.__schedule_flush()
+
+    def get_pending(
+        self,
+        model: Type[Model],
+        pk: Any,
+        field_name: str
+    ) -> int:
+        """Get sum of not written deltas of the counter."""
+        with self.lock:
+            return self.pending.get((model, field_name, pk), 0)
+
+    def flush(self) -> int:
+        """Write buffered deltas, get number of updated counters.
+
+        If a write fails, the deltas not written yet are buffered again
+        and the error is raised.
+        """
+        with self.lock:
+            pending: List[Tuple[Tuple[Any, str, Any], int]] = \
+                list(self.pending.items())
+            self.pending = defaultdict(int)
+        written: int = 0
+        key: Tuple[Any, str, Any]
+        delta: int
+        try:
+            for key, delta in pending:
+                adjust_counter(key[0], [key[2]], key[1], delta)
+                written += 1
+        except Exception:
+            with self.lock:
+                for key, delta in pending[written:]:
+                    self.pending[key] += delta
+            raise
+        return written
+
+
+_buffer: Optional[CounterBuffer] = None
+
+
+def get_counter_buffer() -> CounterBuffer:
+    """Get counter buffer of the process configured by settings."""
+    global _buffer
+    if _buffer is None:
+        config: Dict[str, Any] = getattr(settings, "COUNTER_BUFFER", {})
+        _buffer = CounterBuffer(
+            hot_key_threshold=config.get(
+                "HOT_KEY_THRESHOLD", DEFAULT_HOT_KEY_THRESHOLD
+            ),
+            flush_interval=config.get(
+                "FLUSH_INTERVAL", DEFAULT_BUFFER_FLUSH_INTERVAL
+            )
+        )
+        # Deltas waiting for the timer are written when the process stops
+        atexit.register(_buffer.flush)
+    return _buffer
+
+
+def get_counter_field(
+    model: Type[Model],
+    source: str
+) -> Optional[CounterField]:
+    """Get counter field of the model for the m2m field source."""
+    field: Any
+    for field in model._meta.concrete_fields:
+        if isinstance(field, CounterField) and field.source == source:
+            return field
+    return None
+
+
+def rebuild_counter(model: Type[Model], counter: CounterField) -> int:
+    """Recalculate counter values of the model with one UPDATE."""
+    m2m_field: models.ManyToManyField = model._meta.get_field(counter.source)
+    through: ModelBase = m2m_field.remote_field.through
+    owner_name: str = m2m_field.m2m_field_name()
+    related_count: Subquery = Subquery(
+        through._default_manager.filter(**{owner_name: OuterRef("pk")})
+        .order_by()
+        .values(owner_name)
+        .annotate(number=Count("pk"))
+        .values("number")
+    )
+    return model._default_manager.update(
+        **{counter.attname: Coalesce(related_count, 0)}
+    )
+
+
+def rebuild_counters() -> Dict[str, int]:
+    """Recalculate all counters. Returns updated rows per counter."""
+    return {
+        f"{counter.model._meta.label}.{counter.name}": rebuild_counter(
+            counter.model,
+            counter
+        )
+        for counter in get_counter_fields()
+    }
+
+
+class M2MCounterHandler:
+    """m2m_changed receiver of auto-created through tables.
+
+    add() and remove() report rows found before their write, so
+    concurrent calls for the same pair may count one row twice. Hot
+    relations (likes) write the through table directly instead, see
+    news.likes.set_liked.
+    """
+
+    def __init__(self, counter: CounterField) -> None:
+        """Initialize parameters."""
+        self.counter: CounterField = counter
+        self.through, self.owner_name, self.target_name = \
+            _get_m2m_names(counter)
+        self.pending_key: str = f"_counter_pending_{counter.attname}"
+
+    def __get_owner_ids(
+        self,
+        instance: Model,
+        pk_set: Optional[set]
+    ) -> List[Any]:
+        """Get owners whose rows are about to be removed (reverse side)."""
+        filters: Dict[str, Any] = {self.target_name: instance.pk}
+        if pk_set is not None:
+            filters[f"{self.owner_name}__in"] = pk_set
+        return list(
+            self.through._default_manager.filter(**filters)
+            .values_list(self.owner_name, flat=True)
+        )
+
+    def __call__(
+        self,
+        sender: ModelBase,
+        instance: Model,
+        action: str,
+        reverse: bool,
+        model: ModelBase,
+        pk_set: Optional[set],
+        **kwargs: Any
+    ) -> None:
+        """Handle m2m_changed signal."""
+        owner: Type[Model] = self.counter.model
+        name: str = self.counter.attname
+
+        if not reverse:
+            if action == "post_add":
+                adjust_counter(owner, [instance.pk], name, len(pk_set))
+            elif action == "pre_remove":
+                instance.__dict__[self.pending_key] = \
+                    self.through._default_manager.filter(
+                        **{
+                            self.owner_name: instance.pk,
+                            f"{self.target_name}__in": pk_set,
+                        }
+                    ).count()
+            elif action == "post_remove":
+                adjust_counter(
+                    owner,
+                    [instance.pk],
+                    name,
+                    -instance.__dict__.pop(self.pending_key, 0)
+                )
+            elif action == "post_clear":
+                owner._default_manager.filter(pk=instance.pk).update(
+                    **{name: 0}
+                )
+            return
+
+        if action == "post_add":
+            adjust_counter(owner, pk_set, name, 1)
+        elif action in ("pre_remove", "pre_clear"):
+            instance.__dict__[self.pending_key] = self.__get_owner_ids(
+                instance,
+                pk_set if action == "pre_remove" else None
+            )
+        elif action in ("post_remove", "post_clear"):
+            adjust_counter(
+                owner,
+                instance.__dict__.pop(self.pending_key, []),
+                name,
+                -1
+            )
+
+
+class ThroughCounterHandler:
+    """post_save/post_delete receiver of user-defined through models."""
+
+    def __init__(self, counter: CounterField) -> None:
+        """Initialize parameters."""
+        self.counter: CounterField = counter
+        through: ModelBase
+        owner_name: str
+        through, owner_name, _ = _get_m2m_names(counter)
+        self.owner_attname: str = \
+            through._meta.get_field(owner_name).attname
+
+    def __call__(
+        self,
+        sender: ModelBase,
+        instance: Model,
+        **kwargs: Any
+    ) -> None:
+        """Handle post_save and post_delete signals."""
+        delta: int = -1
+        if "created" in kwargs:
+            if not kwargs["created"]:
+                return
+            delta = 1
+        adjust_counter(
+            self.counter.model,
+            [getattr(instance, self.owner_attname)],
+            self.counter.attname,
+            delta
+        )
+
+
+def connect_counters() -> None:
+    """Connect signal receivers of every counter field."""
+    counter: CounterField
+    for counter in get_counter_fields():
+        through: ModelBase = _get_m2m_names(counter)[0]
+        uid: str = f"counter_{counter.model._meta.label_lower}_{counter.name}"
+        if through._meta.auto_created:
+            m2m_changed.connect(
+                M2MCounterHandler(counter),
+                sender=through,
+                weak=False,
+                dispatch_uid=uid
+            )
+        else:
+            handler: ThroughCounterHandler = ThroughCounterHandler(counter)
+            post_save.connect(
+                handler,
+                sender=through,
+                weak=False,
+                dispatch_uid=uid
+            )
+            post_delete.connect(
+                handler,
+                sender=through,
+                weak=False,
+                dispatch_uid=uid
+            )
@@ -33,7 +33,8 @@ class DRFResponseHandler:
         if paginator and many:
             objects: list = paginator.paginate_queryset(
                 queryset=data,
-                request=request
+                request=request,
+                view=self
             )
             serializer: Serializer = serializer_class(
                 objects,
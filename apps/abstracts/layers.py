@@ -0,0 +1,348 @@
+"""Channel layers for all apps."""
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from time import (
+    monotonic,
+    time,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from uuid import uuid4
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+SCHEMA: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS channel_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        prefix TEXT NOT NULL,
+        body TEXT NOT NULL,
+        expires REAL NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS channel_messages_channel
+    ON channel_messages (channel, id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS channel_messages_prefix
+    ON channel_messages (prefix, id)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS channel_groups (
+        group_name TEXT NOT NULL,
+        channel TEXT NOT NULL,
+        prefix TEXT NOT NULL,
+        expires REAL NOT NULL,
+        PRIMARY KEY (group_name, channel)
+    )
+    """,
+)
+CLEANUP_INTERVAL = 1.0
+
+
+def get_channel_prefix(channel: str) -> str:
+    """Get the part of process-specific channel name up to the "!"."""
+    if "!" in channel:
+        return channel[:channel.index("!") + 1]
+    return channel
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    """Channel layer shared by processes through one SQLite file.
+
+    Stand-in for RedisChannelLayer on one box: several ASGI workers
+    started with the same path see each other's groups and messages.
+    Channels made by new_channel() of one process share a prefix, and a
+    single poller per process takes all their messages with one query.
+    Requires SQLite 3.35+ (DELETE ... RETURNING).
+    """
+
+    extensions: List[str] = ["groups", "flush"]
+
+    def __init__(
+        self,
+        path: str = "channels.sqlite3",
+        expiry: int = 60,
+        group_expiry: int = 86400,
+        capacity: int = 100,
+        channel_capacity: Optional[Dict[str, int]] = None,
+        poll_interval: float = 0.005,
+        max_poll_interval: float = 0.1
+    ) -> None:
+        """Initialize parameters."""
+        super().__init__(
+            expiry=expiry,
+            capacity=capacity,
+            channel_capacity=channel_capacity
+        )
+        self.channel_capacity = self.compile_capacities(
+            self.channel_capacity
+        )
+        self.path: str = path
+        self.group_expiry: int = group_expiry
+        self.poll_interval: float = poll_interval
+        self.max_poll_interval: float = max_poll_interval
+        self.client_prefix: str = "specific.%s!" % uuid4().hex
+        self.connections: local = local()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix="sqlite-channel-layer"
+        )
+        self.last_cleanup: float = 0.0
+        self.receive_buffer: Dict[str, asyncio.Queue] = {}
+        self.receive_task: Optional[asyncio.Task] = None
+
+    # Database helpers run in the executor threads
+
+    def __get_connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self.connections, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=10,
+                isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            query: str
+            for query in SCHEMA:
+                connection.execute(query)
+            self.connections.connection = connection
+        return connection
+
+    async def __run(self, func: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            func,
+            *args
+        )
+
+    def __cleanup(self, connection: sqlite3.Connection) -> None:
+        if monotonic() - self.last_cleanup < CLEANUP_INTERVAL:
+            return
+        self.last_cleanup = monotonic()
+        now: float = time()
+        connection.execute(
+            "DELETE FROM channel_messages WHERE expires < ?", (now,)
+        )
+        connection.execute(
+            "DELETE FROM channel_groups WHERE expires < ?", (now,)
+        )
+
+    def __insert(self, channel: str, body: str, capacity: int) -> None:
+        connection: sqlite3.Connection = self.__get_connection()
+        now: float = time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.__cleanup(connection)
+            count: int = connection.execute(
+                """
+                SELECT COUNT(*) FROM channel_messages
+                WHERE channel = ? AND expires >= ?
+                """,
+                (channel, now)
+            ).fetchone()[0]
+            if count >= capacity:
+                raise ChannelFull()
+            connection.execute(
+                """
+                INSERT INTO channel_messages (channel, prefix, body, expires)
+                VALUES (?, ?, ?, ?)
+                """,
+                (channel, get_channel_prefix(channel), body, now + self.expiry)
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def __pop(self, channel: str) -> Optional[str]:
+        row: Optional[Tuple[str]] = self.__get_connection().execute(
+            """
+            DELETE FROM channel_messages WHERE id = (
+                SELECT id FROM channel_messages
+                WHERE channel = ? AND expires >= ?
+                ORDER BY id LIMIT 1
+            )
+            RETURNING body
+            """,
+            (channel, time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def __pop_prefix(self, prefix: str) -> List[Tuple[int, str, str]]:
+        rows: List[Tuple[int, str, str, float]] = self.__get_connection()\
+            .execute(
+                """
+                DELETE FROM channel_messages WHERE prefix = ?
+                RETURNING id, channel, body, expires
+                """,
+                (prefix,)
+            ).fetchall()
+        now: float = time()
+        return sorted(
+            (row[0], row[1], row[2]) for row in rows if row[3] >= now
+        )
+
+    def __group_add(self, group: str, channel: str) -> None:
+        self.__get_connection().execute(
+            """
+            INSERT OR REPLACE INTO channel_groups
+            (group_name, channel, prefix, expires) VALUES (?, ?, ?, ?)
+            """,
+            (
+                group,
+                channel,
+                get_channel_prefix(channel),
+                time() + self.group_expiry
+            )
+        )
+
+    def __group_discard(self, group: str, channel: str) -> None:
+        self.__get_connection().execute(
+            """
+            DELETE FROM channel_groups
+            WHERE group_name = ? AND channel = ?
+            """,
+            (group, channel)
+        )
+
+    def __group_send(self, group: str, body: str) -> None:
+        connection: sqlite3.Connection = self.__get_connection()
+        now: float = time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.__cleanup(connection)
+            # Fan-out to every member of the group with one statement
+            connection.execute(
+                """
+                INSERT INTO channel_messages (channel, prefix, body, expires)
+                SELECT channel, prefix, ?, ? FROM channel_groups
+                WHERE group_name = ? AND expires >= ?
+                """,
+                (body, now + self.expiry, group, now)
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def __flush(self) -> None:
+        connection: sqlite3.Connection = self.__get_connection()
+        connection.execute("DELETE FROM channel_messages")
+        connection.execute("DELETE FROM channel_groups")
+
+    # Channel layer API
+
+    async def send(self, channel: str, message: Dict[str, Any]) -> None:
+        """Send a message onto a channel."""
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        assert "__asgi_channel__" not in message
+
+        await self.__run(
+            self.__insert,
+            channel,
+            json.dumps(message),
+            self.get_capacity(channel)
+        )
+
+    async def receive(self, channel: str) -> Dict[str, Any]:
+        """Receive the first message that arrives on the channel."""
+        assert self.valid_channel_name(channel)
+
+        if channel.startswith(self.client_prefix):
+            return await self.__receive_local(channel)
+
+        delay: float = self.poll_interval
+        while True:
+            body: Optional[str] = await self.__run(self.__pop, channel)
+            if body is not None:
+                return json.loads(body)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    async def __receive_local(self, channel: str) -> Dict[str, Any]:
+        queue: asyncio.Queue = self.receive_buffer.setdefault(
+            channel,
+            asyncio.Queue()
+        )
+        if not self.receive_task or self.receive_task.done() or \
+                self.receive_task.get_loop() is not \
+                asyncio.get_running_loop():
+            self.receive_task = asyncio.ensure_future(self.__poll_local())
+        try:
+            return await queue.get()
+        except asyncio.CancelledError:
+            # Consumer is gone, drop what was buffered for it
+            self.receive_buffer.pop(channel, None)
+            raise
+
+    async def __poll_local(self) -> None:
+        delay: float = self.poll_interval
+        while self.receive_buffer:
+            rows: List[Tuple[int, str, str]] = await self.__run(
+                self.__pop_prefix,
+                self.client_prefix
+            )
+            if not rows:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
+                continue
+
+            delay = self.poll_interval
+            channel: str
+            body: str
+            for _, channel, body in rows:
+                queue: Optional[asyncio.Queue] = self.receive_buffer.get(
+                    channel
+                )
+                if queue is not None:
+                    queue.put_nowait(json.loads(body))
+
+    async def new_channel(self, prefix: str = "specific") -> str:
+        """Get a new channel name local to this process."""
+        channel: str = "%s%s" % (self.client_prefix, uuid4().hex)
+        self.receive_buffer[channel] = asyncio.Queue()
+        return channel
+
+    async def flush(self) -> None:
+        """Delete all messages and groups."""
+        self.receive_buffer = {}
+        await self.__run(self.__flush)
+
+    async def close(self) -> None:
+        """Nothing to close, connections belong to executor threads."""
+
+    async def group_add(self, group: str, channel: str) -> None:
+        """Add the channel to the group."""
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        await self.__run(self.__group_add, group, channel)
+
+    async def group_discard(self, group: str, channel: str) -> None:
+        """Remove the channel from the group."""
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        await self.__run(self.__group_discard, group, channel)
+
+    async def group_send(self, group: str, message: Dict[str, Any]) -> None:
+        """Send the message to all channels of the group."""
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Group name not valid"
+        await self.__run(self.__group_send, group, json.dumps(message))
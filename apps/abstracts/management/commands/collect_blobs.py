@@ -0,0 +1,48 @@
+from datetime import (
+    datetime,
+    timedelta,
+)
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+    Optional,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+from abstracts.storage import collect_blobs
+
+
+class Command(BaseCommand):
+    """Remove stored files which are not referenced anymore."""
+
+    help = 'Remove unreferenced content-addressed files (run periodically).'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            help='Seconds unreferenced files are kept (CONTENT_STORAGE)'
+        )
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle files collection."""
+        start: datetime = datetime.now()
+
+        grace_period: Optional[timedelta] = None
+        if kwargs['grace_period'] is not None:
+            grace_period = timedelta(seconds=kwargs['grace_period'])
+        print(f"Удалено {collect_blobs(grace_period)} файлов")
+
+        print(
+            'Очистка хранилища составила: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import BaseCommand
+
+from abstracts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    """Recalculate all denormalized counters (CounterField)."""
+
+    help = 'Recalculate all denormalized counters.'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle counters rebuilding."""
+        start: datetime = datetime.now()
+
+        counter_name: str
+        rows: int
+        for counter_name, rows in rebuild_counters().items():
+            print(f"{counter_name}: обновлено {rows} записей")
+
+        print(
+            'Пересчет счетчиков составил: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
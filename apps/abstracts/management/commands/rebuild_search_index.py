@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from abstracts.search import (
+    SearchIndex,
+    get_indexes,
+)
+
+
+class Command(BaseCommand):
+    """Index all objects of the search indexes from scratch."""
+
+    help = 'Rebuild full-text search indexes.'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa
+        parser.add_argument(
+            'indexes',
+            nargs='*',
+            help='Names of the indexes, all indexes by default'
+        )
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle indexes rebuilding."""
+        start: datetime = datetime.now()
+
+        indexes: Dict[str, SearchIndex] = get_indexes()
+        names: Tuple[str] = kwargs['indexes'] or tuple(indexes)
+        name: str
+        for name in names:
+            if name not in indexes:
+                raise CommandError(f"Индекс {name} не найден")
+            print(f"{name}: проиндексировано {indexes[name].rebuild()} записей")
+
+        print(
+            'Перестроение индексов составило: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
@@ -0,0 +1,178 @@
+"""Bulk operations with many-to-many memberships."""
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from django.db import (
+    models,
+    transaction,
+)
+from django.db.models import (
+    Model,
+    QuerySet,
+)
+from django.db.models.base import ModelBase
+
+from abstracts.counters import (
+    CounterField,
+    adjust_counter,
+    deferred_counters,
+    get_counter_field,
+)
+
+
+MEMBER_ADDED = "added"
+MEMBER_REMOVED = "removed"
+MEMBER_ALREADY_EXISTS = "already_member"
+MEMBER_NOT_EXISTS = "not_member"
+MEMBER_NOT_FOUND = "not_found"
+MEMBER_INVALID = "invalid"
+
+
+class BulkMembershipService:
+    """Add or remove N users to/from the many-to-many field of instance.
+
+    Every operation runs in one transaction with a constant number of
+    queries whatever the number of users is, keeps the CounterField of
+    the relation in step and returns per-user report {user_id: state}.
+    Invalid ids are reported by their str(), e.g. {"1.5": "invalid"}.
+    """
+
+    def __init__(
+        self,
+        instance: Model,
+        field_name: str,
+        user_queryset: Optional[QuerySet] = None,
+        row_factory: Optional[Callable[[Model], Model]] = None
+    ) -> None:
+        """Initialize parameters.
+
+        user_queryset limits users which may be added (non-deleted users
+        by default), row_factory builds through model row for the user.
+        """
+        self.instance: Model = instance
+        self.field_name: str = field_name
+        m2m_field: models.ManyToManyField = \
+            instance._meta.get_field(field_name)
+        self.through: ModelBase = m2m_field.remote_field.through
+        self.owner_name: str = m2m_field.m2m_field_name()
+        self.target_name: str = m2m_field.m2m_reverse_field_name()
+        self.user_queryset: QuerySet = user_queryset if \
+            user_queryset is not None else \
+            m2m_field.related_model.objects.get_not_deleted()
+        self.row_factory: Callable[[Model], Model] = row_factory or \
+            self.__build_row
+        self.counter: Optional[CounterField] = get_counter_field(
+            model=instance.__class__,
+            source=field_name
+        )
+
+    def __build_row(self, user: Model) -> Model:
+        return self.through(
+            **{
+                f"{self.owner_name}_id": self.instance.pk,
+                f"{self.target_name}_id": user.pk,
+            }
+        )
+
+    def __clean_ids(
+        self,
+        user_ids: Iterable[Any]
+    ) -> Tuple[Set[int], Dict[Any, str]]:
+        ids: Set[int] = set()
+        report: Dict[Any, str] = {}
+        if isinstance(user_ids, (str, int)):
+            user_ids = [user_ids]
+        user_id: Any
+        for user_id in user_ids:
+            # Only ints and strings of ASCII digits are ids, not 1.5 or True
+            if isinstance(user_id, int) and not isinstance(user_id, bool):
+                ids.add(user_id)
+            elif isinstance(user_id, str) and user_id.isascii() and \
+                    user_id.isdigit():
+                ids.add(int(user_id))
+            else:
+                # Lists and objects of the request are not hashable
+                report[str(user_id)] = MEMBER_INVALID
+        return ids, report
+
+    def __get_existing_ids(self, user_ids: Set[int]) -> Set[int]:
+        return set(
+            self.through._default_manager.filter(
+                **{
+                    self.owner_name: self.instance.pk,
+                    f"{self.target_name}__in": user_ids,
+                }
+            ).values_list(self.target_name, flat=True)
+        )
+
+    def add(self, user_ids: Iterable[Any]) -> Dict[Any, str]:
+        """Add users to the relation."""
+        ids: Set[int]
+        report: Dict[Any, str]
+        ids, report = self.__clean_ids(user_ids)
+        if not ids:
+            return report
+
+        with transaction.atomic():
+            existing_ids: Set[int] = self.__get_existing_ids(ids)
+            users: List[Model] = list(
+                self.user_queryset.filter(id__in=ids - existing_ids)
+            )
+            self.through._default_manager.bulk_create(
+                [self.row_factory(user) for user in users]
+            )
+            if self.counter:
+                adjust_counter(
+                    model=self.instance.__class__,
+                    pks=[self.instance.pk],
+                    field_name=self.counter.attname,
+                    delta=len(users)
+                )
+
+        added_ids: Set[int] = {user.pk for user in users}
+        user_id: int
+        for user_id in ids:
+            if user_id in added_ids:
+                report[user_id] = MEMBER_ADDED
+            elif user_id in existing_ids:
+                report[user_id] = MEMBER_ALREADY_EXISTS
+            else:
+                report[user_id] = MEMBER_NOT_FOUND
+        return report
+
+    def remove(self, user_ids: Iterable[Any]) -> Dict[Any, str]:
+        """Remove users from the relation."""
+        ids: Set[int]
+        report: Dict[Any, str]
+        ids, report = self.__clean_ids(user_ids)
+        if not ids:
+            return report
+
+        with transaction.atomic(), deferred_counters():
+            existing_ids: Set[int] = self.__get_existing_ids(ids)
+            if existing_ids:
+                getattr(self.instance, self.field_name).remove(
+                    *existing_ids
+                )
+
+        user_id: int
+        for user_id in ids:
+            report[user_id] = MEMBER_REMOVED if user_id in existing_ids \
+                else MEMBER_NOT_EXISTS
+        return report
+
+    @staticmethod
+    def has_changes(report: Dict[Any, str]) -> bool:
+        """Check if at least one user was added or removed."""
+        return any(
+            state in (MEMBER_ADDED, MEMBER_REMOVED)
+            for state in report.values()
+        )
@@ -0,0 +1,77 @@
+"""Middlewares for all apps."""
+from logging import (
+    getLogger,
+    Logger,
+)
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional,
+)
+
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+)
+
+from abstracts.queries import (
+    QueryBudgetExceeded,
+    QueryCounter,
+    get_query_budget,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+
+def get_endpoint_key(request: HttpRequest) -> Optional[str]:
+    """Get endpoint key in format <app_label>/<url_name>.
+
+    For router ViewSets url_name is <basename>-<action>, so the list of
+    news is keyed as "news/news-list".
+    """
+    resolver_match: Any = getattr(request, "resolver_match", None)
+    if not resolver_match or not resolver_match.url_name:
+        return None
+    view_class: Any = getattr(resolver_match.func, "cls", None)
+    queryset: Any = getattr(view_class, "queryset", None)
+    if queryset is None:
+        return resolver_match.url_name
+    return f"{queryset.model._meta.app_label}/{resolver_match.url_name}"
+
+
+class QueryBudgetMiddleware:
+    """Count SQL queries of every request and check them with the budget.
+
+    Budgets are configured with settings.QUERY_BUDGETS. When
+    settings.QUERY_BUDGET_RAISE is True a violation raises
+    QueryBudgetExceeded (useful in tests), otherwise a warning is logged.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize parameters."""
+        self.get_response: Callable = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Handle request."""
+        counter: QueryCounter = QueryCounter()
+        with counter.capture():
+            response: HttpResponse = self.get_response(request)
+
+        key: Optional[str] = get_endpoint_key(request)
+        if key is None:
+            return response
+
+        violations: List[str] = counter.get_violations(
+            budget=get_query_budget(key)
+        )
+        if settings.DEBUG:
+            response["X-Query-Count"] = str(counter.count)
+        if violations:
+            message: str = f"{key}: " + "; ".join(violations)
+            if getattr(settings, "QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_name', models.CharField(max_length=50, verbose_name='Индекс')),
+                ('term', models.CharField(max_length=64, verbose_name='Термин')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID объекта')),
+                ('group_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID группы объекта')),
+                ('timestamp', models.FloatField(verbose_name='Время создания объекта')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='Частота термина')),
+            ],
+            options={
+                'verbose_name': 'Вхождение термина',
+                'verbose_name_plural': 'Вхождения терминов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['index_name', 'term', 'group_id'], name='posting_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['index_name', 'object_id'], name='posting_object_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.4 on 2026-10-18 21:40
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # Tables of the database caches in settings.CACHES, existing are kept
+    call_command(
+        'createcachetable',
+        database=schema_editor.connection.alias,
+        verbosity=0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('abstracts', '0003_cache_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_cache_tables,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -25,6 +25,7 @@ from rest_framework import status
 
 from abstracts.models import AbstractDateTime
 from abstracts.handlers import DRFResponseHandler
+from abstracts.cache import get_cached_instance
 
 
 class AbstractDateTimeSerializerMixin:
@@ -47,7 +48,11 @@ class AbstractDateTimeSerializerMixin:
 
 
 class ModelInstanceMixin:
-    """Mixin for getting instance that are inherited from Model."""
+    """Mixin for getting instance that are inherited from Model.
+
+    Models listed in settings.INSTANCE_CACHE_MODELS are read through
+    the instance cache (see abstracts.cache).
+    """
 
     def get_instance_by_id(
         self,
@@ -62,7 +67,7 @@ class ModelInstanceMixin:
                 obj = class_name.objects.get_not_deleted()
             else:
                 obj = class_name.objects.get_deleted()
-            return obj.get(pk=pk)
+            return get_cached_instance(queryset=obj, pk=pk)
         except class_name.DoesNotExist:
             return None
 
@@ -75,7 +80,7 @@ class ModelInstanceMixin:
         """Get class instance by PK with provided queryset."""
         obj: Optional[Model] = None
         try:
-            obj = queryset.get(pk=pk)
+            obj = get_cached_instance(queryset=queryset, pk=pk)
             return obj
         except class_name.DoesNotExist:
             return None
@@ -3,7 +3,12 @@ from datetime import datetime
 from django.db import models
 from django.db.models import QuerySet
 
-class AbstractDateTimeQuerySet(QuerySet):  # noqa
+from abstracts.cache import (
+    InstanceCacheQuerySet,
+    invalidate_instance,
+)
+
+class AbstractDateTimeQuerySet(InstanceCacheQuerySet):  # noqa
     def get_deleted(self) -> QuerySet:  # noqa
         return self.filter(
             datetime_deleted__isnull=False
@@ -36,6 +41,7 @@ class AbstractDateTime(models.Model):  # noqa
 
     def save(self, *args: tuple, **kwargs: dict) -> None:  # noqa
         super().save(*args, **kwargs)
+        invalidate_instance(self.__class__, self.pk)
 
     def delete(self, *args: tuple, **kwargs: dict) -> None:  # noqa
         datetime_now: datetime = datetime.now()
@@ -43,3 +49,78 @@ class AbstractDateTime(models.Model):  # noqa
         self.save(
             update_fields=['datetime_deleted']
         )
+
+
+class SearchPosting(models.Model):  # noqa
+    INDEX_NAME_MAX_LEN = 50
+    TERM_MAX_LEN = 64
+
+    index_name = models.CharField(
+        max_length=INDEX_NAME_MAX_LEN,
+        verbose_name="Индекс"
+    )
+    term = models.CharField(
+        max_length=TERM_MAX_LEN,
+        verbose_name="Термин"
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name="ID объекта"
+    )
+    group_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="ID группы объекта"
+    )
+    timestamp = models.FloatField(
+        verbose_name="Время создания объекта"
+    )
+    frequency = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Частота термина"
+    )
+
+    class Meta:  # noqa
+        verbose_name = "Вхождение термина"
+        verbose_name_plural = "Вхождения терминов"
+        indexes = (
+            models.Index(
+                fields=("index_name", "term", "group_id"),
+                name="posting_term_idx"
+            ),
+            models.Index(
+                fields=("index_name", "object_id"),
+                name="posting_object_idx"
+            ),
+        )
+
+    def __str__(self) -> str:  # noqa
+        return f'"{self.term}" в {self.index_name} #{self.object_id}'
+
+
+class StoredBlob(models.Model):  # noqa
+    BLOB_NAME_MAX_LEN = 100
+    name = models.CharField(
+        max_length=BLOB_NAME_MAX_LEN,
+        unique=True,
+        verbose_name="Путь файла"
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name="Размер файла"
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество ссылок"
+    )
+    datetime_released = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="время освобождения"
+    )
+
+    class Meta:  # noqa
+        verbose_name = "Файл хранилища"
+        verbose_name_plural = "Файлы хранилища"
+
+    def __str__(self) -> str:  # noqa
+        return f"Файл {self.name} ({self.references} ссылок)"
@@ -1,10 +1,39 @@
 """Abstract custom paginators."""
+from base64 import (
+    b64decode,
+    b64encode,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib import parse
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import (
+    Field,
+    Model,
+    Q,
+    QuerySet,
+)
+from django.db.models.constants import LOOKUP_SEP
+
 from rest_framework.response import Response as DRF_Response
+from rest_framework.request import Request as DRF_Request
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import (
+    BasePagination,
     PageNumberPagination,
     LimitOffsetPagination,
 )
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import (
+    remove_query_param,
+    replace_query_param,
+)
 
 
 class AbstractPageNumberPaginator(PageNumberPagination):
@@ -52,3 +81,224 @@ class AbstractLimitOffsetPaginator(LimitOffsetPagination):
                 }
             )
         return response
+
+
+class AbstractCursorPaginator(BasePagination):
+    """Keyset (cursor) paginator.
+
+    Rows are ordered by one model field plus the primary key as a
+    tie-breaker and every page is fetched with a ``WHERE (field, pk) >
+    (last_field, last_pk)`` condition instead of ``OFFSET``. No ``COUNT(*)``
+    is executed, so the N-th page costs the same as the first one.
+
+    The ordering field is taken from ``ordering`` (if set), from the
+    view's ``cursor_ordering`` attribute, from an explicit ``order_by`` of
+    the queryset or from the model ``Meta.ordering``. It must be a
+    not nullable field (or annotation) of the model itself: NULL positions
+    and fields of related rows would skip or repeat rows between pages.
+
+    Unlike AbstractPageNumberPaginator the response has no ``count``, so
+    endpoints opt in by passing this paginator explicitly or let clients
+    choose it with get_list_paginator().
+    """
+
+    page_size: int = 5
+    page_size_query_param: str = 'page_size'
+    max_page_size: int = 10
+    cursor_query_param: str = 'cursor'
+    ordering: Optional[str] = None
+    invalid_cursor_message: str = "Неверный курсор"
+
+    def get_page_size(self, request: DRF_Request) -> int:
+        """Get page size from query params bounded by max_page_size."""
+        try:
+            page_size: int = int(
+                request.query_params[self.page_size_query_param]
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(
+        self,
+        queryset: QuerySet,
+        view: Optional[Any] = None
+    ) -> Tuple[str, bool]:
+        """Return ordering field name and whether it is descending."""
+        ordering: Optional[str] = self.ordering or \
+            getattr(view, "cursor_ordering", None)
+        if not ordering:
+            order_by: Tuple[str] = tuple(queryset.query.order_by) or \
+                tuple(queryset.model._meta.ordering)
+            ordering = order_by[0] if order_by else "-pk"
+
+        is_descending: bool = ordering.startswith("-")
+        field_name: str = ordering.lstrip("-")
+        if field_name == "pk":
+            field_name = queryset.model._meta.pk.attname
+        self.check_ordering_field(queryset, field_name)
+        return field_name, is_descending
+
+    def check_ordering_field(
+        self,
+        queryset: QuerySet,
+        field_name: str
+    ) -> None:
+        """Check that the rows have one comparable position by the field."""
+        if LOOKUP_SEP in field_name:
+            raise ImproperlyConfigured(
+                f"Cursor ordering '{field_name}' must be a field of "
+                f"{queryset.model.__name__}, not of a related model"
+            )
+        field: Field
+        if field_name in queryset.query.annotations:
+            field = queryset.query.annotations[field_name].output_field
+        else:
+            field = queryset.model._meta.get_field(field_name)
+        if field.null:
+            raise ImproperlyConfigured(
+                f"Cursor ordering '{field_name}' of "
+                f"{queryset.model.__name__} must not be nullable"
+            )
+
+    def decode_cursor(
+        self,
+        request: DRF_Request
+    ) -> Optional[Dict[str, Any]]:
+        """Decode opaque cursor from query params."""
+        encoded: Optional[str] = request.query_params.get(
+            self.cursor_query_param
+        )
+        if not encoded:
+            return None
+        try:
+            querystring: str = b64decode(encoded.encode("ascii")).decode(
+                "ascii"
+            )
+            tokens: Dict[str, List[str]] = parse.parse_qs(
+                querystring,
+                keep_blank_values=True
+            )
+            return {
+                "position": tokens["p"][0],
+                "pk": tokens["i"][0],
+                "reverse": bool(int(tokens.get("r", ["0"])[0])),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj: Model, reverse: bool) -> str:
+        """Encode object position into opaque cursor url."""
+        position: Any = getattr(obj, self.field_name)
+        if hasattr(position, "isoformat"):
+            position = position.isoformat()
+        querystring: str = parse.urlencode(
+            {
+                "p": str(position),
+                "i": str(obj.pk),
+                "r": "1" if reverse else "0",
+            }
+        )
+        encoded: str = b64encode(querystring.encode("ascii")).decode(
+            "ascii"
+        )
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded
+        )
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: DRF_Request,
+        view: Optional[Any] = None
+    ) -> List[Model]:
+        """Get one page of objects after the cursor position."""
+        self.base_url: str = request.build_absolute_uri()
+        self.field_name: str
+        is_descending: bool
+        self.field_name, is_descending = self.get_ordering(queryset, view)
+        page_size: int = self.get_page_size(request)
+        cursor: Optional[Dict[str, Any]] = self.decode_cursor(request)
+        is_reverse: bool = bool(cursor and cursor["reverse"])
+
+        # Walking backwards is the same walk with inverted ordering.
+        descending: bool = is_descending != is_reverse
+        pk_name: str = queryset.model._meta.pk.attname
+        prefix: str = "-" if descending else ""
+        queryset = queryset.order_by(
+            f"{prefix}{self.field_name}",
+            f"{prefix}{pk_name}"
+        )
+        if cursor:
+            lookup: str = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field_name}__{lookup}": cursor["position"]}) |
+                Q(
+                    **{
+                        self.field_name: cursor["position"],
+                        f"{pk_name}__{lookup}": cursor["pk"],
+                    }
+                )
+            )
+
+        results: List[Model] = list(queryset[:page_size + 1])
+        has_more: bool = len(results) > page_size
+        results = results[:page_size]
+        if is_reverse:
+            results.reverse()
+
+        self.next_url: Optional[str] = None
+        self.previous_url: Optional[str] = None
+        if results:
+            if has_more or is_reverse:
+                self.next_url = self.encode_cursor(results[-1], reverse=False)
+            if (cursor and not is_reverse) or (is_reverse and has_more):
+                self.previous_url = self.encode_cursor(
+                    results[0],
+                    reverse=True
+                )
+        elif cursor and not is_reverse:
+            self.previous_url = remove_query_param(
+                self.base_url,
+                self.cursor_query_param
+            )
+        return results
+
+    def get_next_link(self) -> Optional[str]:
+        """Get link to the next page."""
+        return self.next_url
+
+    def get_previous_link(self) -> Optional[str]:
+        """Get link to the previous page."""
+        return self.previous_url
+
+    def get_paginated_response(self, data: ReturnList) -> DRF_Response:
+        """Overriden method."""
+        response: DRF_Response = DRF_Response(
+            {
+                'pagination': {
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link(),
+                },
+                'data': data
+            }
+        )
+        return response
+
+
+def get_list_paginator(
+    request: DRF_Request,
+    paginator_class: Any = AbstractPageNumberPaginator
+) -> BasePagination:
+    """Get paginator of a list chosen by the request.
+
+    Requests with the cursor query param (empty for the first page) are
+    paged by AbstractCursorPaginator, others keep page numbers and count.
+    """
+    if AbstractCursorPaginator.cursor_query_param in request.query_params:
+        return AbstractCursorPaginator()
+    return paginator_class()
@@ -0,0 +1,197 @@
+"""SQL query counting, N+1 detection and query budgets."""
+import re
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connections,
+)
+
+
+DEFAULT_BUDGET_KEY = 'default'
+DEFAULT_DUPLICATE_THRESHOLD = 5
+
+_IN_LIST_PATTERN = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_SPACES_PATTERN = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more queries than it is allowed to."""
+
+    pass
+
+
+def normalize_sql(sql: str) -> str:
+    """Get the shape of the query: SQL without literal values."""
+    shape: str = _STRING_PATTERN.sub("%s", sql)
+    shape = _NUMBER_PATTERN.sub("%s", shape)
+    shape = _IN_LIST_PATTERN.sub("(...)", shape)
+    return _SPACES_PATTERN.sub(" ", shape).strip()
+
+
+def get_query_budget(key: str) -> Optional[int]:
+    """Get configured budget for endpoint key (e.g. news/news-list)."""
+    budgets: Dict[str, int] = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(key, budgets.get(DEFAULT_BUDGET_KEY))
+
+
+def get_duplicate_threshold() -> int:
+    """Get number of repeated query shapes treated as N+1."""
+    return getattr(
+        settings,
+        "QUERY_BUDGET_DUPLICATE_THRESHOLD",
+        DEFAULT_DUPLICATE_THRESHOLD
+    )
+
+
+class QueryCounter:
+    """Collect every SQL query executed on the connection."""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        """Initialize parameters."""
+        self.using: str = using
+        self.queries: List[Tuple[str, float]] = []
+
+    def __call__(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any]
+    ) -> Any:
+        """Execute wrapper that records the query and its duration."""
+        start: float = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, perf_counter() - start))
+
+    @contextmanager
+    def capture(self) -> Iterator['QueryCounter']:
+        """Count queries executed inside the block."""
+        with connections[self.using].execute_wrapper(self):
+            yield self
+
+    @property
+    def count(self) -> int:
+        """Get number of executed queries."""
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        """Get total time spent in the database (seconds)."""
+        return sum(duration for _, duration in self.queries)
+
+    def get_duplicates(
+        self,
+        threshold: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """Get query shapes repeated at least threshold times."""
+        if threshold is None:
+            threshold = get_duplicate_threshold()
+        shapes: Counter = Counter(
+            normalize_sql(sql) for sql, _ in self.queries
+        )
+        return [
+            (shape, number)
+            for shape, number in shapes.most_common()
+            if number >= threshold
+        ]
+
+    def get_violations(
+        self,
+        budget: Optional[int],
+        threshold: Optional[int] = None
+    ) -> List[str]:
+        """Get human readable list of budget and N+1 violations."""
+        violations: List[str] = []
+        if budget is not None and self.count > budget:
+            violations.append(
+                f"{self.count} queries executed, budget is {budget}"
+            )
+        shape: str
+        number: int
+        for shape, number in self.get_duplicates(threshold):
+            violations.append(
+                f"possible N+1: query repeated {number} times: {shape}"
+            )
+        return violations
+
+
+@contextmanager
+def assert_query_budget(
+    budget: Union[int, str],
+    threshold: Optional[int] = None,
+    using: str = DEFAULT_DB_ALIAS
+) -> Iterator[QueryCounter]:
+    """Fail if the block exceeds the budget or repeats a query shape.
+
+    budget is either a number of queries or an endpoint key from
+    settings.QUERY_BUDGETS, e.g. "news/news-list".
+    """
+    if isinstance(budget, str):
+        budget = get_query_budget(budget)
+    counter: QueryCounter = QueryCounter(using=using)
+    with counter.capture():
+        yield counter
+    violations: List[str] = counter.get_violations(budget, threshold)
+    if violations:
+        raise QueryBudgetExceeded("; ".join(violations))
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin with query budget assertions."""
+
+    def assertQueryBudget(
+        self,
+        budget: Union[int, str],
+        threshold: Optional[int] = None,
+        using: str = DEFAULT_DB_ALIAS
+    ) -> Any:
+        """Use as context manager around client requests."""
+        return assert_query_budget(
+            budget=budget,
+            threshold=threshold,
+            using=using
+        )
+
+    def assertConstantQueries(
+        self,
+        add: Callable[[], Any],
+        request: Callable[[], Any],
+        budget: Union[int, str] = DEFAULT_BUDGET_KEY
+    ) -> None:
+        """Check that rows added by add() do not add queries to request().
+
+        request() must succeed with 200. Every count is taken after a
+        request filling the caches the new rows invalidated.
+        """
+        def get_queries() -> int:
+            with self.assertQueryBudget(budget) as counter:
+                response: Any = request()
+            self.assertEqual(response.status_code, 200)
+            return counter.count
+
+        add()
+        get_queries()
+        queries: int = get_queries()
+        add()
+        add()
+        get_queries()
+        self.assertEqual(get_queries(), queries)
@@ -0,0 +1,452 @@
+"""Full-text search indexes for all apps.
+
+An index keeps one text per object plus an optional group id (e.g. the
+chat of a message) used to limit results. SQLite FTS5 is used where it
+is available, otherwise terms are kept in the SearchPosting table.
+"""
+import re
+from collections import Counter
+from math import log1p
+from time import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from django.conf import settings
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import (
+    Case,
+    IntegerField,
+    Max,
+    Model,
+    Q,
+    QuerySet,
+    Sum,
+    When,
+)
+from django.db.models.expressions import RawSQL
+
+from abstracts.models import SearchPosting
+from abstracts.workers import get_worker
+
+
+TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
+SEARCH_WORKER_NAME = "search"
+CANDIDATES_FACTOR = 5
+DELETE_CHUNK_SIZE = 500
+
+# (object_id, text, group_id, timestamp)
+IndexRow = Tuple[int, str, Optional[int], float]
+# (object_id, relevance, timestamp)
+Candidate = Tuple[int, float, float]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase terms."""
+    return [
+        token[:SearchPosting.TERM_MAX_LEN]
+        for token in TOKEN_REGEX.findall((text or "").lower())
+    ]
+
+
+def is_fts5_available(using: Optional[BaseDatabaseWrapper] = None) -> bool:
+    """Check if the database supports SQLite FTS5."""
+    using = using or connection
+    if using.vendor != "sqlite":
+        return False
+    with using.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+class SearchResult(NamedTuple):
+    """Found object id with its score."""
+
+    object_id: int
+    score: float
+
+
+class FTS5SearchBackend:
+    """Index kept in a SQLite FTS5 virtual table, rowid is object id.
+
+    The table search_<index name> is created by a migration of the app
+    registering the index if FTS5 is available at migration time.
+    """
+
+    def __init__(self, index_name: str) -> None:
+        """Initialize parameters."""
+        self.table: str = f"search_{index_name}"
+
+    def exists(self) -> bool:
+        """Check if the table of the index was created."""
+        return self.table in connection.introspection.table_names()
+
+    def add(self, rows: List[IndexRow]) -> None:
+        """Index rows."""
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {self.table} (rowid, content, group_id, timestamp)
+                VALUES (%s, %s, %s, %s)
+                """,
+                rows
+            )
+
+    def remove(self, object_ids: List[int]) -> None:
+        """Remove objects from the index."""
+        with connection.cursor() as cursor:
+            i: int
+            for i in range(0, len(object_ids), DELETE_CHUNK_SIZE):
+                chunk: List[int] = object_ids[i:i + DELETE_CHUNK_SIZE]
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN (%s)" %
+                    ", ".join(["%s"] * len(chunk)),
+                    chunk
+                )
+
+    def clear(self) -> None:
+        """Remove all objects from the index."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def get_match(self, terms: List[str], prefix: bool) -> str:
+        """Get MATCH expression requiring all terms."""
+        match: str = " ".join(
+            '"%s"' % term.replace('"', '""') for term in terms
+        )
+        if prefix:
+            match += "*"
+        return match
+
+    def get_match_ids(self, terms: List[str], prefix: bool) -> RawSQL:
+        """Get subquery of ids of all objects containing the terms."""
+        return RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+            [self.get_match(terms, prefix)]
+        )
+
+    def search(
+        self,
+        terms: List[str],
+        prefix: bool,
+        group_ids: Optional[List[int]],
+        limit: int,
+        object_ids: Optional[QuerySet] = None
+    ) -> List[Candidate]:
+        """Get best matches by BM25, all terms must be found."""
+        params: List[Any] = [self.get_match(terms, prefix)]
+        conditions: str = ""
+        if group_ids is not None:
+            if not group_ids:
+                return []
+            conditions += "AND group_id IN (%s)" % ", ".join(
+                ["%s"] * len(group_ids)
+            )
+            params.extend(group_ids)
+        if object_ids is not None:
+            sql: str
+            object_params: Tuple[Any, ...]
+            sql, object_params = object_ids.query.sql_with_params()
+            conditions += f" AND rowid IN ({sql})"
+            params.extend(object_params)
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT rowid, -bm25({self.table}), timestamp
+                FROM {self.table}
+                WHERE {self.table} MATCH %s {conditions}
+                ORDER BY bm25({self.table})
+                LIMIT %s
+                """,
+                params
+            )
+            return [
+                (row[0], row[1], row[2]) for row in cursor.fetchall()
+            ]
+
+
+class PostingsSearchBackend:
+    """Index kept in the SearchPosting table, one row per object term."""
+
+    def __init__(self, index_name: str) -> None:
+        """Initialize parameters."""
+        self.index_name: str = index_name
+
+    def get_queryset(self) -> QuerySet:
+        """Get postings of the index."""
+        return SearchPosting.objects.filter(index_name=self.index_name)
+
+    def add(self, rows: List[IndexRow]) -> None:
+        """Index rows."""
+        postings: List[SearchPosting] = []
+        object_id: int
+        text: str
+        group_id: Optional[int]
+        timestamp: float
+        for object_id, text, group_id, timestamp in rows:
+            term: str
+            frequency: int
+            for term, frequency in Counter(tokenize(text)).items():
+                postings.append(
+                    SearchPosting(
+                        index_name=self.index_name,
+                        term=term,
+                        object_id=object_id,
+                        group_id=group_id,
+                        timestamp=timestamp,
+                        frequency=frequency
+                    )
+                )
+        SearchPosting.objects.bulk_create(postings, batch_size=1000)
+
+    def remove(self, object_ids: List[int]) -> None:
+        """Remove objects from the index."""
+        i: int
+        for i in range(0, len(object_ids), DELETE_CHUNK_SIZE):
+            self.get_queryset().filter(
+                object_id__in=object_ids[i:i + DELETE_CHUNK_SIZE]
+            ).delete()
+
+    def clear(self) -> None:
+        """Remove all objects from the index."""
+        self.get_queryset().delete()
+
+    def get_matches(
+        self,
+        postings: QuerySet,
+        terms: List[str],
+        prefix: bool
+    ) -> QuerySet:
+        """Get ids of objects having all terms with their relevance."""
+        conditions: List[Q] = [Q(term=term) for term in terms]
+        if prefix:
+            conditions[-1] = Q(term__startswith=terms[-1])
+        term_filter: Q = Q()
+        condition: Q
+        for condition in conditions:
+            term_filter |= condition
+
+        annotations: Dict[str, Max] = {
+            f"has_term_{i}": Max(
+                Case(
+                    When(condition, then=1),
+                    default=0,
+                    output_field=IntegerField()
+                )
+            )
+            for i, condition in enumerate(conditions)
+        }
+        return postings.filter(term_filter)\
+            .values("object_id")\
+            .annotate(
+                relevance=Sum("frequency"),
+                last_timestamp=Max("timestamp"),
+                **annotations
+            )\
+            .filter(**{name: 1 for name in annotations})
+
+    def get_match_ids(self, terms: List[str], prefix: bool) -> QuerySet:
+        """Get subquery of ids of all objects containing the terms."""
+        return self.get_matches(self.get_queryset(), terms, prefix)\
+            .values("object_id")
+
+    def search(
+        self,
+        terms: List[str],
+        prefix: bool,
+        group_ids: Optional[List[int]],
+        limit: int,
+        object_ids: Optional[QuerySet] = None
+    ) -> List[Candidate]:
+        """Get best matches by term frequency, all terms must be found."""
+        postings: QuerySet = self.get_queryset()
+        if group_ids is not None:
+            postings = postings.filter(group_id__in=group_ids)
+        if object_ids is not None:
+            postings = postings.filter(object_id__in=object_ids)
+        rows: QuerySet = self.get_matches(postings, terms, prefix)\
+            .order_by("-relevance", "-object_id")[:limit]
+        return [
+            (row["object_id"], log1p(row["relevance"]), row["last_timestamp"])
+            for row in rows
+        ]
+
+
+class SearchIndex:
+    """Inverted index of model objects.
+
+    Results are ranked by relevance mixed with recency: the weight of
+    relevance is 1 - recency_weight and recency halves every
+    recency_half_life seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        get_queryset: Callable[[], QuerySet],
+        get_text: Callable[[Model], str],
+        group_field: Optional[str] = None,
+        date_field: str = "datetime_created",
+        recency_weight: float = 0.3,
+        recency_half_life: float = 7 * 24 * 60 * 60
+    ) -> None:
+        """Initialize parameters.
+
+        get_queryset returns objects which may be found (e.g. not
+        deleted), get_text returns indexed text of the object.
+        """
+        self.name: str = name
+        self.get_queryset: Callable[[], QuerySet] = get_queryset
+        self.get_text: Callable[[Model], str] = get_text
+        self.group_field: Optional[str] = group_field
+        self.date_field: str = date_field
+        self.recency_weight: float = recency_weight
+        self.recency_half_life: float = recency_half_life
+        self.__backends: Dict[str, Any] = {}
+
+    @property
+    def backend(self) -> Any:
+        """Get backend chosen by settings.SEARCH_BACKEND.
+
+        Auto chooses FTS5 only if its table was created by the migration.
+        """
+        name: str = getattr(settings, "SEARCH_BACKEND", "auto")
+        if name not in self.__backends:
+            fts5_backend: FTS5SearchBackend = FTS5SearchBackend(self.name)
+            use_fts5: bool = name == "fts5" or name == "auto" and \
+                is_fts5_available() and fts5_backend.exists()
+            self.__backends[name] = fts5_backend if use_fts5 \
+                else PostingsSearchBackend(self.name)
+        return self.__backends[name]
+
+    def get_row(self, obj: Model) -> IndexRow:
+        """Get index row of the object."""
+        return (
+            obj.pk,
+            self.get_text(obj) or "",
+            getattr(obj, self.group_field) if self.group_field else None,
+            getattr(obj, self.date_field).timestamp(),
+        )
+
+    def update(self, object_ids: Iterable[int]) -> None:
+        """Reindex objects, the ones out of get_queryset are removed."""
+        object_ids = list(set(object_ids))
+        if not object_ids:
+            return
+        objects: QuerySet = self.get_queryset().filter(pk__in=object_ids)
+        with transaction.atomic():
+            self.backend.remove(object_ids)
+            self.backend.add([self.get_row(obj) for obj in objects])
+
+    def update_on_commit(self, object_ids: Iterable[int]) -> None:
+        """Reindex objects by the search worker after the commit."""
+        get_worker(SEARCH_WORKER_NAME).submit_on_commit(
+            self.update,
+            list(object_ids)
+        )
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Index all objects from scratch."""
+        number: int = 0
+        with transaction.atomic():
+            self.backend.clear()
+            rows: List[IndexRow] = []
+            obj: Model
+            for obj in self.get_queryset().order_by("pk").iterator(
+                chunk_size=batch_size
+            ):
+                rows.append(self.get_row(obj))
+                if len(rows) >= batch_size:
+                    self.backend.add(rows)
+                    number += len(rows)
+                    rows = []
+            self.backend.add(rows)
+            number += len(rows)
+        return number
+
+    def get_match_ids(self, query: str, prefix: bool = False) -> Any:
+        """Get subquery of ids of all objects containing the query.
+
+        Use it in pk__in lookups to count or filter every match in SQL.
+        """
+        terms: List[str] = tokenize(query)
+        if not terms:
+            return []
+        return self.backend.get_match_ids(terms, prefix)
+
+    def search(
+        self,
+        query: str,
+        group_ids: Optional[Iterable[int]] = None,
+        limit: int = 20,
+        prefix: bool = False,
+        object_ids: Optional[QuerySet] = None
+    ) -> List[SearchResult]:
+        """Find objects containing all terms of the query.
+
+        With prefix the last term matches as a prefix (search as you
+        type), group_ids limits results to the groups and object_ids (a
+        subquery of ids) to the objects.
+        """
+        terms: List[str] = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+        candidates: List[Candidate] = self.backend.search(
+            terms,
+            prefix,
+            list(group_ids) if group_ids is not None else None,
+            limit * CANDIDATES_FACTOR,
+            object_ids
+        )
+        if not candidates:
+            return []
+
+        max_relevance: float = max(
+            candidate[1] for candidate in candidates
+        ) or 1.0
+        now: float = time()
+        results: List[SearchResult] = []
+        object_id: int
+        relevance: float
+        timestamp: float
+        for object_id, relevance, timestamp in candidates:
+            recency: float = 0.5 ** (
+                max(now - timestamp, 0) / self.recency_half_life
+            )
+            results.append(
+                SearchResult(
+                    object_id=object_id,
+                    score=(1 - self.recency_weight) *
+                    relevance / max_relevance +
+                    self.recency_weight * recency
+                )
+            )
+        results.sort(key=lambda result: (-result.score, -result.object_id))
+        return results[:limit]
+
+
+_indexes: Dict[str, SearchIndex] = {}
+
+
+def register_index(index: SearchIndex) -> SearchIndex:
+    """Register index for rebuild_search_index command."""
+    _indexes[index.name] = index
+    return index
+
+
+def get_indexes() -> Dict[str, SearchIndex]:
+    """Get registered indexes by name."""
+    return dict(_indexes)
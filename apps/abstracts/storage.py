@@ -0,0 +1,303 @@
+"""Content-addressed storage of uploaded files.
+
+Uploads are hashed while they are written to a temporary file and kept
+once under blobs/<aa>/<bb>/<sha256><ext>, so identical uploads share one
+file. StoredBlob counts rows referencing the blob while they are not
+soft deleted; blobs without references are removed by collect_blobs
+after settings.CONTENT_STORAGE['GRACE_PERIOD'] seconds, so restored rows
+and uploads of the same content in the meantime keep their files.
+"""
+import os
+from datetime import (
+    datetime,
+    timedelta,
+)
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import (
+    Case,
+    F,
+    FileField,
+    Model,
+    Value,
+    When,
+)
+from django.db.models.base import ModelBase
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+)
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from abstracts.models import StoredBlob
+
+
+BLOBS_DIRECTORY = "blobs"
+DEFAULT_GRACE_PERIOD = 7 * 24 * 60 * 60
+
+# Reference of the row which fields are deferred
+UNKNOWN_REFERENCE = object()
+
+
+def is_blob_name(name: str) -> bool:
+    """Check that the file is stored by its content."""
+    return name.startswith(f"{BLOBS_DIRECTORY}/")
+
+
+def get_grace_period() -> timedelta:
+    """Get time unreferenced blobs are kept."""
+    config: Dict[str, Any] = getattr(settings, "CONTENT_STORAGE", {})
+    return timedelta(
+        seconds=config.get("GRACE_PERIOD", DEFAULT_GRACE_PERIOD)
+    )
+
+
+def touch_blob(name: str, size: int) -> None:
+    """Create the blob row or postpone collection of the unused blob."""
+    if not StoredBlob.objects.filter(name=name, references=0)\
+            .update(datetime_released=timezone.now()):
+        StoredBlob.objects.get_or_create(
+            name=name,
+            defaults={"size": size, "datetime_released": timezone.now()}
+        )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping one file per content.
+
+    upload_to of the fields is ignored: the name of the saved file is
+    the digest of its content with the original extension.
+    """
+
+    def get_available_name(
+        self,
+        name: str,
+        max_length: Optional[int] = None
+    ) -> str:
+        """Get name of the upload, the real name is chosen by content."""
+        return name
+
+    def get_temp_directory(self) -> str:
+        """Get directory of files being uploaded next to the blobs."""
+        directory: str = self.path(f"{BLOBS_DIRECTORY}/tmp")
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def get_hashed_name(self, hexdigest: str, name: str) -> str:
+        """Get name of the blob of the content with the SHA-256."""
+        return "{}/{}/{}/{}{}".format(
+            BLOBS_DIRECTORY,
+            hexdigest[:2],
+            hexdigest[2:4],
+            hexdigest,
+            os.path.splitext(name)[1].lower()
+        )
+
+    def save_hashed(
+        self,
+        path: str,
+        hexdigest: str,
+        size: int,
+        name: str
+    ) -> str:
+        """Move local file with known SHA-256 into the storage.
+
+        The file must be in get_temp_directory(), so it is renamed and
+        never copied. Get name of the blob.
+        """
+        blob_name: str = self.get_hashed_name(hexdigest, name)
+        # Touched blob is not collected while the upload is being saved
+        touch_blob(blob_name, size)
+
+        blob_path: str = self.path(blob_name)
+        if os.path.exists(blob_path):
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(path, blob_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(blob_path, self.file_permissions_mode)
+        return blob_name
+
+    def _save(self, name: str, content: File) -> str:
+        digest = sha256()
+        size: int = 0
+        with NamedTemporaryFile(
+            dir=self.get_temp_directory(),
+            delete=False
+        ) as temp:
+            chunk: bytes
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        return self.save_hashed(temp.name, digest.hexdigest(), size, name)
+
+    def delete(self, name: str) -> None:
+        """Keep shared blobs, they are removed by collect_blobs only."""
+        if not is_blob_name(name):
+            super().delete(name)
+
+    def purge(self, name: str) -> None:
+        """Remove the blob file."""
+        super().delete(name)
+
+
+content_storage: ContentAddressedStorage = ContentAddressedStorage()
+
+
+def adjust_blob_references(deltas: Dict[str, int]) -> None:
+    """Add deltas to reference counts of the blobs."""
+    now: datetime = timezone.now()
+    name: str
+    delta: int
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        StoredBlob.objects.filter(name=name).update(
+            references=Greatest(F("references") + delta, 0),
+            datetime_released=Value(None) if delta > 0 else Case(
+                When(references__lte=-delta, then=Value(now)),
+                default=F("datetime_released")
+            )
+        )
+
+
+def collect_blobs(grace_period: Optional[timedelta] = None) -> int:
+    """Remove blobs unreferenced longer than the grace period."""
+    released_before: datetime = timezone.now() - \
+        (grace_period if grace_period is not None else get_grace_period())
+    names: List[str] = list(
+        StoredBlob.objects.filter(
+            references=0,
+            datetime_released__lt=released_before
+        ).values_list("name", flat=True)
+    )
+    number: int = 0
+    name: str
+    for name in names:
+        # The file is removed before the deleted row is committed: touch_blob
+        # of a concurrent upload waits for the row and then finds no file,
+        # so save_hashed moves the upload in place. Blob touched by a new
+        # upload meanwhile is kept.
+        with transaction.atomic():
+            deleted: int = StoredBlob.objects.filter(
+                name=name,
+                references=0,
+                datetime_released__lt=released_before
+            ).delete()[0]
+            if deleted:
+                content_storage.purge(name)
+                number += 1
+    return number
+
+
+def get_blob_fields() -> List[FileField]:
+    """Get file fields of all models stored by content."""
+    return [
+        field
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and
+        isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+class BlobReferenceHandler:
+    """post_init/post_save/post_delete receiver of a blob file field.
+
+    The blob referenced by a row when it is loaded is kept in the row,
+    saves and deletes adjust counts of the old and the new blob.
+    Queryset update() and delete() are not tracked.
+    """
+
+    def __init__(self, field: FileField) -> None:
+        """Initialize parameters."""
+        self.field: FileField = field
+        self.state_key: str = f"_blob_{field.attname}"
+        self.is_soft_deleted: bool = any(
+            model_field.name == "datetime_deleted"
+            for model_field in field.model._meta.concrete_fields
+        )
+
+    def get_reference(self, instance: Model) -> Any:
+        """Get blob name referenced by the row, None if no blob."""
+        values: Dict[str, Any] = instance.__dict__
+        if self.field.attname not in values or (
+            self.is_soft_deleted and "datetime_deleted" not in values
+        ):
+            return UNKNOWN_REFERENCE
+        name: Optional[str] = getattr(
+            values[self.field.attname],
+            "name",
+            values[self.field.attname]
+        )
+        if not name or not is_blob_name(name) or \
+                values.get("datetime_deleted"):
+            return None
+        return name
+
+    def adjust(self, old: Any, new: Any) -> None:
+        """Move the reference of the row from old to new blob."""
+        if old is UNKNOWN_REFERENCE or new is UNKNOWN_REFERENCE or \
+                old == new:
+            return
+        deltas: Dict[str, int] = {}
+        if old:
+            deltas[old] = -1
+        if new:
+            deltas[new] = 1
+        adjust_blob_references(deltas)
+
+    def __call__(
+        self,
+        sender: ModelBase,
+        instance: Model,
+        signal: Any,
+        **kwargs: Any
+    ) -> None:
+        """Handle post_init, post_save and post_delete signals."""
+        if signal is post_init:
+            instance.__dict__[self.state_key] = self.get_reference(instance)
+            return
+        old: Any = None if kwargs.get("created") else \
+            instance.__dict__.get(self.state_key, UNKNOWN_REFERENCE)
+        new: Any = None if signal is post_delete else \
+            self.get_reference(instance)
+        self.adjust(old, new)
+        if new is not UNKNOWN_REFERENCE:
+            instance.__dict__[self.state_key] = new
+
+
+def connect_blob_references(
+    fields: Optional[Iterable[FileField]] = None
+) -> None:
+    """Connect signal receivers of every blob file field."""
+    field: FileField
+    for field in fields if fields is not None else get_blob_fields():
+        handler: BlobReferenceHandler = BlobReferenceHandler(field)
+        uid: str = f"blob_{field.model._meta.label_lower}_{field.name}"
+        for signal in (post_init, post_save, post_delete):
+            signal.connect(
+                handler,
+                sender=field.model,
+                weak=False,
+                dispatch_uid=uid
+            )
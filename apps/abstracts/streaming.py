@@ -0,0 +1,200 @@
+"""Delivery of stored files with byte ranges and validators.
+
+Files are sent by the WSGI server: FileResponse hands the opened file to
+wsgi.file_wrapper, which uses sendfile() from the current offset for
+Content-Length bytes. With settings.FILE_STREAMING['X_ACCEL_REDIRECT_PREFIX']
+only the checks are made here and nginx sends the file from an internal
+location.
+"""
+import mimetypes
+import os
+import re
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Optional,
+    Tuple,
+)
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+)
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    http_date,
+    quote_etag,
+)
+
+
+STREAM_BLOCK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """File object limited to length bytes from its current position."""
+
+    def __init__(self, file: IO, length: int) -> None:
+        """Initialize parameters."""
+        self.file: IO = file
+        self.remaining: int = length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most size bytes of the range."""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data: bytes = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        """Get descriptor of the file for sendfile()."""
+        return self.file.fileno()
+
+    def close(self) -> None:
+        """Close the file."""
+        self.file.close()
+
+
+def get_streaming_config() -> Dict[str, Any]:
+    """Get streaming configuration from settings.FILE_STREAMING."""
+    config: Dict[str, Any] = getattr(settings, "FILE_STREAMING", {})
+    return {
+        "X_ACCEL_REDIRECT_PREFIX": config.get("X_ACCEL_REDIRECT_PREFIX", ""),
+    }
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Get inclusive (first, last) byte of the range of the file.
+
+    None means the whole file: the header is missing, malformed or has
+    several ranges (the server may ignore it then). ValueError is raised
+    when the range is beyond the file.
+    """
+    match: Optional[re.Match] = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first: str
+    last: str
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        if not int(last) or not size:
+            raise ValueError("Range is not satisfiable")
+        return max(size - int(last), 0), size - 1
+    if int(first) >= size:
+        raise ValueError("Range is not satisfiable")
+    if last == "" or int(last) >= size:
+        return int(first), size - 1
+    if int(last) < int(first):
+        return None
+    return int(first), int(last)
+
+
+def get_file_stat(field_file: FieldFile) -> Tuple[Optional[str], int, int]:
+    """Get (local path, size, modification timestamp) of the stored file."""
+    try:
+        path: Optional[str] = field_file.storage.path(field_file.name)
+    except NotImplementedError:
+        path = None
+    try:
+        if path:
+            stat: os.stat_result = os.stat(path)
+            return path, stat.st_size, int(stat.st_mtime)
+        return (
+            None,
+            field_file.storage.size(field_file.name),
+            int(
+                field_file.storage.get_modified_time(field_file.name)
+                .timestamp()
+            )
+        )
+    except OSError:
+        raise Http404("Файл не найден")
+
+
+def set_validators(
+    response: HttpResponseBase,
+    etag: str,
+    last_modified: int
+) -> HttpResponseBase:
+    """Set caching and range headers of the streamed file."""
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def stream_file(
+    request: HttpRequest,
+    field_file: FieldFile
+) -> HttpResponseBase:
+    """Get response with the file or the requested byte range of it.
+
+    Conditional requests are answered with 304/412 without opening the
+    file, If-Range with an outdated validator gets the whole file.
+    """
+    path: Optional[str]
+    size: int
+    last_modified: int
+    path, size, last_modified = get_file_stat(field_file)
+    etag: str = quote_etag(f"{size:x}-{last_modified:x}")
+
+    response: Optional[HttpResponseBase] = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is not None:
+        return set_validators(response, etag, last_modified)
+
+    prefix: str = get_streaming_config()["X_ACCEL_REDIRECT_PREFIX"]
+    if prefix:
+        response = HttpResponse(
+            content_type=mimetypes.guess_type(field_file.name)[0] or
+            "application/octet-stream"
+        )
+        # nginx serves ranges of the internal location by itself
+        response["X-Accel-Redirect"] = \
+            f"{prefix.rstrip('/')}/{quote(field_file.name)}"
+        return set_validators(response, etag, last_modified)
+
+    header: str = request.META.get("HTTP_RANGE", "")
+    if_range: str = request.META.get("HTTP_IF_RANGE", "")
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        header = ""
+    byte_range: Optional[Tuple[int, int]]
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return set_validators(response, etag, last_modified)
+
+    file: IO = open(path, "rb") if path else \
+        field_file.storage.open(field_file.name, "rb")
+    length: int = size
+    status: int = 200
+    if byte_range:
+        file.seek(byte_range[0])
+        length = byte_range[1] - byte_range[0] + 1
+        status = 206
+
+    response = FileResponse(
+        RangeFile(file, length),
+        status=status,
+        filename=os.path.basename(field_file.name)
+    )
+    response.block_size = STREAM_BLOCK_SIZE
+    response["Content-Length"] = length
+    if byte_range:
+        response["Content-Range"] = \
+            f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,16 @@
+"""Helpers of the test suites of the apps."""
+from datetime import date
+
+from auths.models import CustomUser
+
+
+def create_user(name: str, **fields: object) -> CustomUser:
+    """Create user with required fields made of the name."""
+    return CustomUser.objects.create(
+        email=f"{name}@mail.kz",
+        username=name,
+        first_name=name,
+        last_name=name,
+        birthday=date(1990, 1, 1),
+        **fields
+    )
@@ -1,3 +1,493 @@
-from django.test import TestCase
+import asyncio
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from unittest import mock
+from urllib.parse import (
+    parse_qs,
+    urlparse,
+)
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.db import (
+    models,
+    transaction,
+)
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from rest_framework.request import Request as DRF_Request
+from rest_framework.test import APIRequestFactory
+
+from abstracts import counters
+from abstracts.cache import get_cached_instance
+from abstracts.layers import SQLiteChannelLayer
+from abstracts.membership import (
+    BulkMembershipService,
+    MEMBER_ADDED,
+    MEMBER_INVALID,
+)
+from abstracts.models import StoredBlob
+from abstracts.paginators import AbstractCursorPaginator
+from abstracts.queries import (
+    QueryBudgetExceeded,
+    QueryBudgetTestMixin,
+    assert_query_budget,
+)
+from abstracts.storage import collect_blobs
+from abstracts.search import (
+    PostingsSearchBackend,
+    SearchIndex,
+)
+from abstracts.testing import create_user
+from auths.models import CustomUser
+from groups.models import Group
+from music.models import (
+    Music,
+    Playlist,
+)
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """Query budget assertions."""
+
+    def test_budget_exceeded(self) -> None:
+        """More queries than the budget fail the block."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_query_budget(1):
+                CustomUser.objects.count()
+                CustomUser.objects.count()
+
+    def test_repeated_query_shape(self) -> None:
+        """Queries repeated in a loop are reported as N+1."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with self.assertQueryBudget(100, threshold=3):
+                for user_id in range(5):
+                    CustomUser.objects.filter(id=user_id).exists()
+
+    def test_within_budget(self) -> None:
+        """Counted queries are available to the test."""
+        with self.assertQueryBudget(2) as counter:
+            CustomUser.objects.count()
+        self.assertEqual(counter.count, 1)
+
+    def test_constant_queries(self) -> None:
+        """Queries growing with the rows are caught."""
+        users: List[CustomUser] = []
+
+        class Response:
+            status_code: int = 200
+
+        def request() -> Response:
+            for user in CustomUser.objects.all():
+                CustomUser.objects.filter(id=user.id).exists()
+            return Response()
+
+        with self.assertRaises(AssertionError):
+            self.assertConstantQueries(
+                lambda: users.append(create_user(f"user_{len(users)}")),
+                request,
+                budget=100
+            )
+
+
+class AbstractCursorPaginatorTest(TestCase):
+    """Keyset paging of AbstractCursorPaginator."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa
+        cls.users: List[CustomUser] = [
+            create_user(f"cursor_{i}") for i in range(5)
+        ]
+
+    def get_page(
+        self,
+        params: Dict[str, Any],
+        ordering: str = "id"
+    ) -> AbstractCursorPaginator:
+        """Paginate users by the query params."""
+        paginator: AbstractCursorPaginator = AbstractCursorPaginator()
+        paginator.ordering = ordering
+        request: DRF_Request = DRF_Request(
+            APIRequestFactory().get("/users", params)
+        )
+        paginator.page = paginator.paginate_queryset(
+            CustomUser.objects.all(),
+            request
+        )
+        return paginator
+
+    def get_params(self, link: str) -> Dict[str, str]:
+        """Get query params of the link."""
+        return {
+            key: values[0]
+            for key, values in parse_qs(urlparse(link).query).items()
+        }
+
+    def test_walks_pages_forwards_and_backwards(self) -> None:
+        """Every row is seen once in both directions."""
+        ids: List[int] = [user.id for user in self.users]
+        first: AbstractCursorPaginator = self.get_page({"page_size": 2})
+        second: AbstractCursorPaginator = self.get_page(
+            self.get_params(first.get_next_link())
+        )
+        third: AbstractCursorPaginator = self.get_page(
+            self.get_params(second.get_next_link())
+        )
+        self.assertEqual(
+            [user.id for user in first.page + second.page + third.page],
+            ids
+        )
+        self.assertIsNone(third.get_next_link())
+
+        back: AbstractCursorPaginator = self.get_page(
+            self.get_params(third.get_previous_link())
+        )
+        self.assertEqual([user.id for user in back.page], ids[2:4])
+
+    def test_rejects_related_ordering(self) -> None:
+        """Fields of related models are not cursor positions."""
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_page({}, ordering="friendss__username")
+
+    def test_rejects_nullable_ordering(self) -> None:
+        """NULL positions can not be compared."""
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_page({}, ordering="-datetime_deleted")
+
+
+class BulkMembershipServiceTest(TestCase):
+    """Reports of BulkMembershipService."""
+
+    def test_invalid_ids_are_reported(self) -> None:
+        """Anything but ints and digit strings is reported by its str."""
+        user: CustomUser = create_user("member")
+        other: CustomUser = create_user("other")
+        group: Group = Group.objects.create(name="group", slug="group")
+        report: Dict[Any, str] = BulkMembershipService(
+            instance=group,
+            field_name="followers"
+        ).add(
+            user_ids=[
+                [1],
+                {"id": 1},
+                True,
+                "x",
+                float(user.id),
+                None,
+                "-1",
+                "²",
+                user.id,
+                str(other.id),
+            ]
+        )
+        self.assertEqual(
+            report,
+            {
+                "[1]": MEMBER_INVALID,
+                "{'id': 1}": MEMBER_INVALID,
+                "True": MEMBER_INVALID,
+                "x": MEMBER_INVALID,
+                f"{user.id}.0": MEMBER_INVALID,
+                "None": MEMBER_INVALID,
+                "-1": MEMBER_INVALID,
+                "²": MEMBER_INVALID,
+                user.id: MEMBER_ADDED,
+                other.id: MEMBER_ADDED,
+            }
+        )
+        group.refresh_from_db()
+        self.assertEqual(group.followers_count, 2)
+
+
+class SQLiteChannelLayerTest(TestCase):
+    """Channel layer shared by processes through one SQLite file."""
+
+    def setUp(self) -> None:  # noqa
+        self.directory: str = tempfile.mkdtemp()
+        path: str = os.path.join(self.directory, "channels.sqlite3")
+        # Two layers on one file stand for two processes
+        self.first: SQLiteChannelLayer = SQLiteChannelLayer(path=path)
+        self.second: SQLiteChannelLayer = SQLiteChannelLayer(path=path)
+
+    def tearDown(self) -> None:  # noqa
+        async_to_sync(self.first.close)()
+        async_to_sync(self.second.close)()
+        shutil.rmtree(self.directory)
+
+    def test_group_send_reaches_other_process(self) -> None:
+        """Group members of one layer get messages sent by another."""
+        async def exchange() -> Dict[str, Any]:
+            channel: str = await self.first.new_channel()
+            await self.first.group_add("chat_1", channel)
+            await self.second.group_send(
+                "chat_1",
+                {"type": "chat.message", "text": "hello"}
+            )
+            return await self.first.receive(channel)
+
+        self.assertEqual(
+            async_to_sync(exchange)(),
+            {"type": "chat.message", "text": "hello"}
+        )
+
+    def test_discarded_channel_gets_nothing(self) -> None:
+        """Channels removed from the group are not sent to."""
+        async def exchange() -> Tuple[Dict[str, Any], bool]:
+            channel: str = await self.first.new_channel()
+            other: str = await self.first.new_channel()
+            await self.first.group_add("chat_1", channel)
+            await self.first.group_add("chat_1", other)
+            await self.first.group_discard("chat_1", channel)
+            await self.second.group_send("chat_1", {"type": "ping"})
+            message: Dict[str, Any] = await self.first.receive(other)
+            try:
+                await asyncio.wait_for(self.first.receive(channel), 0.3)
+            except asyncio.TimeoutError:
+                return message, False
+            return message, True
+
+        self.assertEqual(
+            async_to_sync(exchange)(),
+            ({"type": "ping"}, False)
+        )
+
+
+class CounterBufferTest(TestCase):
+    """Write coalescing of CounterBuffer."""
+
+    def setUp(self) -> None:  # noqa
+        self.playlist: Playlist = Playlist.objects.create(name="hot")
+        self.other: Playlist = Playlist.objects.create(name="other")
+        self.buffer: counters.CounterBuffer = counters.CounterBuffer(
+            hot_key_threshold=1,
+            flush_interval=60
+        )
+
+    def adjust(self, delta: int) -> None:
+        """Adjust listeners_count of the hot playlist."""
+        self.buffer.adjust(
+            Playlist,
+            self.playlist.id,
+            "listeners_count",
+            delta
+        )
+
+    def get_count(self, playlist: Playlist) -> int:
+        """Get stored listeners_count."""
+        return Playlist.objects.get(id=playlist.id).listeners_count
+
+    @override_settings(BACKGROUND_WORKERS_SYNC=False)
+    def test_hot_counter_is_buffered(self) -> None:
+        """Deltas above the threshold wait for the flush."""
+        with mock.patch.object(
+            counters.CounterBuffer,
+            "_CounterBuffer__schedule_flush"
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    self.adjust(1)
+        self.assertEqual(self.get_count(self.playlist), 1)
+        self.assertEqual(
+            self.buffer.get_pending(
+                Playlist,
+                self.playlist.id,
+                "listeners_count"
+            ),
+            2
+        )
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.get_count(self.playlist), 3)
+
+    def test_rolled_back_delta_is_dropped(self) -> None:
+        """Deltas of a rolled back transaction are not buffered."""
+        self.adjust(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.adjust(1)
+                    raise RuntimeError("like is rolled back")
+        self.assertEqual(
+            self.buffer.get_pending(
+                Playlist,
+                self.playlist.id,
+                "listeners_count"
+            ),
+            0
+        )
+        self.assertEqual(self.get_count(self.playlist), 1)
+
+    def test_failed_flush_keeps_deltas(self) -> None:
+        """Deltas not written by a failed flush are flushed later."""
+        playlist_key: Any = (Playlist, "listeners_count", self.playlist.id)
+        self.buffer.pending[playlist_key] = 2
+        self.buffer.pending[(Playlist, "listeners_count", self.other.id)] = 3
+        adjust_counter: Any = counters.adjust_counter
+        calls: List[Any] = []
+
+        def failing_adjust_counter(*args: Any) -> None:
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("database is gone")
+            adjust_counter(*args)
+
+        with mock.patch.object(
+            counters,
+            "adjust_counter",
+            failing_adjust_counter
+        ):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+        self.assertEqual(self.get_count(self.playlist), 2)
+        self.assertEqual(
+            self.buffer.get_pending(
+                Playlist,
+                self.other.id,
+                "listeners_count"
+            ),
+            3
+        )
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.get_count(self.other), 3)
+
+
+class StoredBlobTest(TestCase):
+    """Reference counts of content-addressed blobs."""
+
+    def setUp(self) -> None:  # noqa
+        self.directory: str = tempfile.mkdtemp()
+        self.media: Any = override_settings(MEDIA_ROOT=self.directory)
+        self.media.enable()
+        self.playlist: Playlist = Playlist.objects.create(name="blobs")
+
+    def tearDown(self) -> None:  # noqa
+        self.media.disable()
+        shutil.rmtree(self.directory)
+
+    def create_music(self, content: bytes) -> Music:
+        """Create song with the file content."""
+        music: Music = Music(playlist=self.playlist)
+        music.music.save("song.mp3", ContentFile(content), save=True)
+        return music
+
+    def get_blob(self, music: Music) -> StoredBlob:
+        """Get blob row of the song file."""
+        return StoredBlob.objects.get(name=music.music.name)
+
+    def test_identical_uploads_share_blob(self) -> None:
+        """Same content is stored once and referenced twice."""
+        first: Music = self.create_music(b"same song")
+        second: Music = self.create_music(b"same song")
+        self.assertEqual(first.music.name, second.music.name)
+        self.assertEqual(self.get_blob(first).references, 2)
+        self.assertTrue(os.path.exists(first.music.path))
+
+    def test_references_follow_soft_delete_restore_and_delete(self) -> None:
+        """Blob is collected only when no row references it."""
+        first: Music = self.create_music(b"counted song")
+        second: Music = self.create_music(b"counted song")
+        path: str = first.music.path
+
+        first.delete()
+        self.assertEqual(self.get_blob(first).references, 1)
+        first.datetime_deleted = None
+        first.save()
+        self.assertEqual(self.get_blob(first).references, 2)
+
+        models.Model.delete(first)
+        second.delete()
+        blob: StoredBlob = self.get_blob(second)
+        self.assertEqual(blob.references, 0)
+        self.assertIsNotNone(blob.datetime_released)
+
+        self.assertEqual(collect_blobs(timedelta(days=1)), 0)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(collect_blobs(timedelta(seconds=-1)), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(
+            StoredBlob.objects.filter(name=second.music.name).exists()
+        )
+
+    def test_upload_after_release_keeps_blob(self) -> None:
+        """Blob touched by a new upload is not collected."""
+        first: Music = self.create_music(b"reused song")
+        first.delete()
+        second: Music = self.create_music(b"reused song")
+        self.assertEqual(collect_blobs(timedelta(seconds=-1)), 0)
+        self.assertTrue(os.path.exists(second.music.path))
+        self.assertEqual(self.get_blob(second).references, 1)
+
+
+class SearchBackendTest(TestCase):
+    """Choice of the search backend."""
+
+    def test_auto_without_table(self) -> None:
+        """Index without the FTS5 table is kept in postings."""
+        index: SearchIndex = SearchIndex(
+            name="missing",
+            get_queryset=lambda: CustomUser.objects.all(),
+            get_text=lambda user: user.username
+        )
+        with override_settings(SEARCH_BACKEND="auto"):
+            self.assertIsInstance(index.backend, PostingsSearchBackend)
+
+
+class InstanceCacheTest(TestCase):
+    """Shared cache of model instances."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.user: CustomUser = create_user("cached")
+
+    def get_user(self, queryset: Optional[Any] = None) -> CustomUser:
+        """Get the user through the cache."""
+        return get_cached_instance(
+            CustomUser.objects.all() if queryset is None else queryset,
+            self.user.id
+        )
+
+    def test_cache_hit(self) -> None:
+        """Cached user is read by one query of the cache table."""
+        self.get_user()
+        with self.assertNumQueries(1):
+            user: CustomUser = self.get_user()
+        self.assertEqual(user.username, "cached")
+
+    def test_save_and_update_invalidate(self) -> None:
+        """Saved and updated rows are read again."""
+        self.get_user()
+        self.user.first_name = "saved"
+        self.user.save()
+        self.assertEqual(self.get_user().first_name, "saved")
+
+        CustomUser.objects.filter(id=self.user.id).update(
+            first_name="updated"
+        )
+        self.assertEqual(self.get_user().first_name, "updated")
+
+    def test_soft_and_hard_delete(self) -> None:
+        """Deleted rows are not served from the cache."""
+        not_deleted: Any = CustomUser.objects.get_not_deleted()
+        self.get_user(not_deleted)
+        self.user.delete()
+        with self.assertRaises(CustomUser.DoesNotExist):
+            self.get_user(not_deleted)
+
+        self.get_user()
+        CustomUser.objects.filter(id=self.user.id).delete()
+        with self.assertRaises(CustomUser.DoesNotExist):
+            self.get_user()
@@ -0,0 +1,114 @@
+"""Background workers running tasks off the request path."""
+from logging import (
+    getLogger,
+    Logger,
+)
+from queue import Queue
+from threading import (
+    Lock,
+    Thread,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+from django.conf import settings
+from django.db import (
+    close_old_connections,
+    transaction,
+)
+
+
+logger: Logger = getLogger(__name__)
+
+Task = Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class BackgroundWorker:
+    """Daemon thread executing submitted tasks one by one in order.
+
+    With settings.BACKGROUND_WORKERS_SYNC tasks are executed right away
+    in the caller thread (tests, management commands).
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize parameters."""
+        self.name: str = name
+        self.queue: "Queue[Task]" = Queue()
+        self.thread: Optional[Thread] = None
+        self.lock: Lock = Lock()
+
+    def __start(self) -> None:
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = Thread(
+                target=self.__run,
+                name=f"worker-{self.name}",
+                daemon=True
+            )
+            self.thread.start()
+
+    def __run(self) -> None:
+        while True:
+            func: Callable[..., Any]
+            args: Tuple[Any, ...]
+            kwargs: Dict[str, Any]
+            func, args, kwargs = self.queue.get()
+            try:
+                close_old_connections()
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception(
+                    "Task %s of worker %s failed", func, self.name
+                )
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> None:
+        """Queue the task."""
+        if getattr(settings, "BACKGROUND_WORKERS_SYNC", False):
+            func(*args, **kwargs)
+            return
+        self.queue.put((func, args, kwargs))
+        self.__start()
+
+    def submit_on_commit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> None:
+        """Queue the task when the current transaction is committed."""
+        transaction.on_commit(lambda: self.submit(func, *args, **kwargs))
+
+    def join(self) -> None:
+        """Wait until all queued tasks are done."""
+        self.queue.join()
+
+    @property
+    def queue_depth(self) -> int:
+        """Get number of the tasks waiting in the queue."""
+        return self.queue.qsize()
+
+
+_workers: Dict[str, BackgroundWorker] = {}
+_workers_lock: Lock = Lock()
+
+
+def get_worker(name: str = "default") -> BackgroundWorker:
+    """Get worker of the process by name."""
+    with _workers_lock:
+        if name not in _workers:
+            _workers[name] = BackgroundWorker(name=name)
+        return _workers[name]
@@ -0,0 +1,255 @@
+"""Friends graph and friend-of-friend suggestions."""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nsmallest
+from typing import (
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.cache import (
+    BaseCache,
+    caches,
+)
+from django.db import transaction
+from django.db.models import (
+    Q,
+    QuerySet,
+)
+
+from auths.models import (
+    Friends,
+    FriendSuggestion,
+)
+from abstracts.workers import get_worker
+
+
+SUGGESTIONS_WORKER_NAME = "suggestions"
+FRIENDS_CACHE_ALIAS = "friends"
+
+
+def get_suggestions_limit() -> int:
+    """Get number of suggestions kept per user."""
+    return getattr(settings, "FRIEND_SUGGESTIONS_LIMIT", 20)
+
+
+def get_friends_cache() -> BaseCache:
+    """Get cache backend for friend ids."""
+    return caches[FRIENDS_CACHE_ALIAS]
+
+
+def _get_friend_ids_key(user_id: int) -> str:
+    return f"friend-ids:{user_id}"
+
+
+def get_friend_ids(user_id: int) -> List[int]:
+    """Get sorted ids of accepted friends of the user (read-through)."""
+    cache: BaseCache = get_friends_cache()
+    key: str = _get_friend_ids_key(user_id)
+    friend_ids: Optional[List[int]] = cache.get(key)
+    if friend_ids is None:
+        friend_ids = list(FriendsGraph.load([user_id]).friends.get(user_id))
+        cache.set(key, friend_ids)
+    return friend_ids
+
+
+def invalidate_friend_ids(user_ids: Iterable[int]) -> None:
+    """Drop cached friend ids of the users now and after the commit."""
+    keys: List[str] = [_get_friend_ids_key(user_id) for user_id in user_ids]
+    get_friends_cache().delete_many(keys)
+    # Readers inside the transaction could cache not committed state
+    transaction.on_commit(lambda: get_friends_cache().delete_many(keys))
+
+
+def intersect_sorted(first: List[int], second: List[int]) -> List[int]:
+    """Get common items of two sorted lists in one pass."""
+    result: List[int] = []
+    i: int = 0
+    j: int = 0
+    while i < len(first) and j < len(second):
+        if first[i] == second[j]:
+            result.append(first[i])
+            i += 1
+            j += 1
+        elif first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class AdjacencyArrays:
+    """Compressed sparse rows of user ids.
+
+    Neighbours of user_ids[i] are neighbours[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[int, int]]) -> None:
+        """Build arrays from directed (user_id, neighbour_id) pairs."""
+        sorted_pairs: List[Tuple[int, int]] = sorted(set(pairs))
+        self.user_ids: array = array("q")
+        self.offsets: array = array("q")
+        self.neighbours: array = array("q")
+
+        user_id: int
+        neighbour_id: int
+        for user_id, neighbour_id in sorted_pairs:
+            if not self.user_ids or self.user_ids[-1] != user_id:
+                self.user_ids.append(user_id)
+                self.offsets.append(len(self.neighbours))
+            self.neighbours.append(neighbour_id)
+        self.offsets.append(len(self.neighbours))
+
+    def get(self, user_id: int) -> array:
+        """Get neighbours of the user."""
+        i: int = bisect_left(self.user_ids, user_id)
+        if i == len(self.user_ids) or self.user_ids[i] != user_id:
+            return array("q")
+        return self.neighbours[self.offsets[i]:self.offsets[i + 1]]
+
+
+class FriendsGraph:
+    """Accepted friendships plus all relations of users.
+
+    Friendship is accepted when both directed Friends rows exist and
+    neither is blocked. Any Friends row in either direction (request,
+    friendship, block) is a relation: related users are never suggested.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, int, bool]]) -> None:
+        """Build graph from (from_user_id, to_user_id, is_blocked) rows."""
+        open_pairs: Set[Tuple[int, int]] = set()
+        relation_pairs: List[Tuple[int, int]] = []
+        from_user_id: int
+        to_user_id: int
+        is_blocked: bool
+        for from_user_id, to_user_id, is_blocked in rows:
+            relation_pairs.append((from_user_id, to_user_id))
+            relation_pairs.append((to_user_id, from_user_id))
+            if not is_blocked:
+                open_pairs.add((from_user_id, to_user_id))
+
+        self.friends: AdjacencyArrays = AdjacencyArrays(
+            pair for pair in open_pairs if (pair[1], pair[0]) in open_pairs
+        )
+        self.relations: AdjacencyArrays = AdjacencyArrays(relation_pairs)
+
+    @classmethod
+    def load(cls, user_ids: Optional[Iterable[int]] = None) -> "FriendsGraph":
+        """Load graph of all users or edges of the given users only."""
+        rows: QuerySet = Friends.objects.all()
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            rows = rows.filter(
+                Q(from_user_id__in=user_ids) | Q(to_user_id__in=user_ids)
+            )
+        return cls(
+            rows.values_list("from_user_id", "to_user_id", "is_blocked")
+            .iterator(chunk_size=10000)
+        )
+
+    @property
+    def user_ids(self) -> array:
+        """Get ids of users having at least one friend."""
+        return self.friends.user_ids
+
+    def suggest(self, user_id: int, limit: int) -> List[Tuple[int, int]]:
+        """Get top (user_id, mutual friends) of friends of friends."""
+        friend_ids: array = self.friends.get(user_id)
+        if not friend_ids:
+            return []
+        excluded_ids: Set[int] = set(self.relations.get(user_id))
+        excluded_ids.add(user_id)
+
+        mutual_friends: Counter = Counter()
+        friend_id: int
+        for friend_id in friend_ids:
+            candidate_id: int
+            for candidate_id in self.friends.get(friend_id):
+                if candidate_id not in excluded_ids:
+                    mutual_friends[candidate_id] += 1
+        return nsmallest(
+            limit,
+            mutual_friends.items(),
+            key=lambda item: (-item[1], item[0])
+        )
+
+
+def save_suggestions(
+    graph: FriendsGraph,
+    user_ids: Iterable[int],
+    limit: int
+) -> int:
+    """Replace suggestions of the users with ones computed by graph."""
+    user_ids = list(user_ids)
+    suggestions: List[FriendSuggestion] = []
+    user_id: int
+    for user_id in user_ids:
+        suggested_user_id: int
+        mutual_friends: int
+        for suggested_user_id, mutual_friends in graph.suggest(
+            user_id,
+            limit
+        ):
+            suggestions.append(
+                FriendSuggestion(
+                    user_id=user_id,
+                    suggested_user_id=suggested_user_id,
+                    mutual_friends=mutual_friends
+                )
+            )
+    with transaction.atomic():
+        FriendSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FriendSuggestion.objects.bulk_create(suggestions, batch_size=1000)
+    return len(suggestions)
+
+
+def build_suggestions() -> int:
+    """Compute suggestions of all users from the whole graph."""
+    graph: FriendsGraph = FriendsGraph.load()
+    with transaction.atomic():
+        FriendSuggestion.objects.all().delete()
+        return save_suggestions(
+            graph=graph,
+            user_ids=graph.user_ids,
+            limit=get_suggestions_limit()
+        )
+
+
+def update_suggestions(user_ids: Iterable[int]) -> int:
+    """Recompute suggestions affected by relation changes of users.
+
+    New or broken friendship of A and B changes suggestions of A, B and
+    of their friends, so only the neighbourhood of those is loaded.
+    """
+    changed_ids: Set[int] = set(user_ids)
+    affected_ids: Set[int] = set(changed_ids)
+    graph: FriendsGraph = FriendsGraph.load(changed_ids)
+    user_id: int
+    for user_id in changed_ids:
+        affected_ids.update(graph.friends.get(user_id))
+
+    # Friends of friends are needed to count mutual friends
+    loaded_ids: Set[int] = set(affected_ids)
+    graph = FriendsGraph.load(affected_ids)
+    for user_id in affected_ids:
+        loaded_ids.update(graph.friends.get(user_id))
+
+    return save_suggestions(
+        graph=FriendsGraph.load(loaded_ids),
+        user_ids=affected_ids,
+        limit=get_suggestions_limit()
+    )
+
+
+def update_suggestions_on_commit(user_ids: Iterable[int]) -> None:
+    """Recompute suggestions by the background worker after the commit."""
+    get_worker(SUGGESTIONS_WORKER_NAME).submit_on_commit(
+        update_suggestions,
+        list(user_ids)
+    )
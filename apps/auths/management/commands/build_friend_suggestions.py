@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import BaseCommand
+
+from auths.graph import build_suggestions
+
+
+class Command(BaseCommand):
+    """Precompute friend-of-friend suggestions of all users."""
+
+    help = 'Build friend suggestions from the whole friends graph.'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle suggestions building."""
+        start: datetime = datetime.now()
+
+        print(f"Создано {build_suggestions()} предложений дружбы")
+
+        print(
+            'Построение предложений составило: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
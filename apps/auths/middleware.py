@@ -0,0 +1,32 @@
+"""Middlewares of auths app."""
+from typing import (
+    Any,
+    Callable,
+)
+
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+)
+
+from auths.presence import get_presence
+
+
+class PresenceMiddleware:
+    """Register every authenticated request as activity of the user.
+
+    DRF authenticates inside the view and sets the user back to the
+    request, so the user is taken after the response is made.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize parameters."""
+        self.get_response: Callable = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Handle request."""
+        response: HttpResponse = self.get_response(request)
+        user: Any = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            get_presence().touch(user.id)
+        return response
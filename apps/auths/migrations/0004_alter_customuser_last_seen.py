@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auths', '0003_search_users'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний вход'),
+        ),
+    ]
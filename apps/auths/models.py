@@ -1,6 +1,8 @@
 from datetime import date
 from typing import (
     Any,
+    Dict,
+    Iterable,
     Optional,
 )
 
@@ -18,6 +20,7 @@ from django.core.validators import (
     RegexValidator,
 )
 
+from abstracts.cache import InstanceCacheQuerySet
 from abstracts.models import (
     AbstractDateTime,
     AbstractDateTimeQuerySet,
@@ -40,7 +43,9 @@ def validate_slug_field(slug: str):
         )
 
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(
+    BaseUserManager.from_queryset(InstanceCacheQuerySet)
+):
     """CustmoUserManager."""
 
     def create_user(
@@ -162,8 +167,10 @@ class CustomUser(
         verbose_name="Друзья",
         related_name="following"
     )
+    # Written by auths.presence only, other saves keep it
     last_seen = models.DateTimeField(
-        auto_now=True,
+        null=True,
+        blank=True,
         verbose_name="Последний вход"
     )
     is_online = models.BooleanField(
@@ -231,19 +238,24 @@ class FriendsQuerySet(QuerySet):
         except Exception:
             return None
 
-    def __handle_friends_state(
+    def __resolve_friends_state(
         self,
-        from_user: CustomUser,
-        pair: 'Friends'
+        own_is_blocked: Optional[bool],
+        their_is_blocked: Optional[bool]
     ) -> Optional[int]:
-        """Get state of the friends."""
-        if pair.is_blocked:
-            if pair.from_user == from_user:
-                return YOU_BLOCKED_STATE
+        """Get state of the friends by is_blocked of both directions.
+
+        None of the direction means there is no such row. Blocking wins
+        over everything else and own block wins over the other's one.
+        """
+        if own_is_blocked:
+            return YOU_BLOCKED_STATE
+        if their_is_blocked:
             return YOU_ARE_BLOCKED_STATE
-        else:
-            if pair.from_user == from_user:
-                return ALREADY_REQUEST_SENT_STATE
+        if own_is_blocked is not None and their_is_blocked is not None:
+            return ALREADY_FRIENDS_STATE
+        if own_is_blocked is not None:
+            return ALREADY_REQUEST_SENT_STATE
         return None
 
     def get_friends_state(
@@ -251,42 +263,41 @@ class FriendsQuerySet(QuerySet):
         from_user: CustomUser,
         to_user: CustomUser
     ) -> Optional[int]:
-        """Handle friends state."""
-        friends_pair: QuerySet = self.filter(
-            Q(from_user=from_user, to_user=to_user) |
-            Q(from_user=to_user, to_user=from_user)
-        )
-        friends_number: int = friends_pair.count()
-        if friends_number == 0:
-            return None
-        elif friends_number == 1:
-            pair_first: 'Friends' = friends_pair.first()
-            return self.__handle_friends_state(
-                from_user=from_user,
-                pair=pair_first
-            )
-        else:
-            pair_first: 'Friends' = friends_pair.first()
-            pair_last: 'Friends' = friends_pair.last()
-            first_pair_state: Optional[int] = self.__handle_friends_state(
-                from_user=from_user,
-                pair=pair_first
-            )
-            last_pair_state: Optional[int] = self.__handle_friends_state(
-                from_user=from_user,
-                pair=pair_last
-            )
+        """Handle friends state with one query for both directions."""
+        return self.get_friends_states(
+            from_user=from_user,
+            to_user_ids=[to_user.pk]
+        )[to_user.pk]
 
-            if (first_pair_state == ALREADY_REQUEST_SENT_STATE and
-                not last_pair_state) or \
-                    (not first_pair_state and
-                        last_pair_state == ALREADY_REQUEST_SENT_STATE):
-                return ALREADY_FRIENDS_STATE
-            if first_pair_state:
-                return first_pair_state
-            if last_pair_state:
-                return last_pair_state
-        return ALREADY_FRIENDS_STATE
+    def get_friends_states(
+        self,
+        from_user: CustomUser,
+        to_user_ids: Iterable[int]
+    ) -> Dict[int, Optional[int]]:
+        """Handle friends states between the user and others in one query."""
+        to_user_ids = set(to_user_ids)
+        own_is_blocked: Dict[int, bool] = {}
+        their_is_blocked: Dict[int, bool] = {}
+        if to_user_ids:
+            pair_from_user_id: int
+            pair_to_user_id: int
+            is_blocked: bool
+            for pair_from_user_id, pair_to_user_id, is_blocked in self.filter(
+                Q(from_user_id=from_user.pk, to_user_id__in=to_user_ids) |
+                Q(from_user_id__in=to_user_ids, to_user_id=from_user.pk)
+            ).values_list("from_user_id", "to_user_id", "is_blocked"):
+                if pair_from_user_id == from_user.pk:
+                    own_is_blocked[pair_to_user_id] = is_blocked
+                else:
+                    their_is_blocked[pair_from_user_id] = is_blocked
+
+        return {
+            user_id: self.__resolve_friends_state(
+                own_is_blocked=own_is_blocked.get(user_id, None),
+                their_is_blocked=their_is_blocked.get(user_id, None)
+            )
+            for user_id in to_user_ids
+        }
 
 
 class Friends(models.Model):
@@ -338,6 +349,53 @@ class Friends(models.Model):
         super().save(*args, **kwargs)
 
 
+class FriendSuggestion(models.Model):
+    """Precomputed friend suggestion (see auths.graph)."""
+
+    user = models.ForeignKey(
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name="friend_suggestions",
+        verbose_name="Пользователь"
+    )
+    suggested_user = models.ForeignKey(
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Предлагаемый пользователь"
+    )
+    mutual_friends = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество общих друзей"
+    )
+
+    class Meta:
+        """Customization of the Model."""
+
+        verbose_name_plural = "Предложения дружбы"
+        verbose_name = "Предложение дружбы"
+        ordering = (
+            "-mutual_friends",
+            "suggested_user_id",
+        )
+        constraints = [
+            models.UniqueConstraint(
+                name="%(app_label)s_%(class)s_unique_suggestion",
+                fields=["user", "suggested_user"]
+            ),
+        ]
+        indexes = (
+            models.Index(
+                fields=("user", "-mutual_friends"),
+                name="friend_suggestion_user_idx"
+            ),
+        )
+
+    def __str__(self) -> str:  # noqa
+        return f'Пользователю {self.user_id} предложен \
+{self.suggested_user_id} ({self.mutual_friends} общих друзей)'
+
+
 class PhoneQuerySet(AbstractDateTimeQuerySet):
     """PhoneQuerySet."""
 
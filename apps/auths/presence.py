@@ -0,0 +1,199 @@
+"""Online presence of users with coalesced last_seen writes."""
+from collections import OrderedDict
+from datetime import (
+    datetime,
+    timedelta,
+)
+from threading import (
+    Lock,
+    Timer,
+)
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
+
+from django.conf import settings
+from django.db.models import (
+    Q,
+    QuerySet,
+)
+from django.utils import timezone
+
+from auths.models import CustomUser
+from abstracts.workers import get_worker
+
+
+PRESENCE_WORKER_NAME = "presence"
+DEFAULT_ONLINE_TIMEOUT = 300
+DEFAULT_FLUSH_INTERVAL = 30.0
+FLUSH_BATCH_SIZE = 200
+
+
+class PresenceTracker:
+    """Online state of users kept in the is_online and last_seen columns.
+
+    A user is online while one of their websockets is connected or for
+    online_timeout seconds after their last authenticated request, the
+    last closed websocket makes the user offline at once.
+    The columns are the only state read, so every process sees the same
+    users online. Opening and closing websockets is written at once.
+    Requests write only when the stored last_seen is flush_interval
+    old, the process remembers its own writes to skip even that check.
+    Users connected to the process are written every flush_interval.
+    Only opening and closing websockets drops cached copies of users.
+    """
+
+    def __init__(
+        self,
+        online_timeout: int = DEFAULT_ONLINE_TIMEOUT,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ) -> None:
+        """Initialize parameters."""
+        self.online_timeout: timedelta = timedelta(seconds=online_timeout)
+        self.flush_interval: float = flush_interval
+        self.lock: Lock = Lock()
+        self.timer: Optional[Timer] = None
+        self.connections: Dict[int, int] = {}
+        # Users by the time of their last write by this process, oldest first
+        self.written_at: OrderedDict = OrderedDict()
+
+    def __get_stale_users(self, now: datetime) -> QuerySet:
+        # Plain queryset keeps cached users: only their last_seen lags,
+        # online state is read by get_online_ids
+        return QuerySet(model=CustomUser).filter(
+            Q(is_online=False) |
+            Q(last_seen__isnull=True) |
+            Q(last_seen__lt=now - timedelta(seconds=self.flush_interval))
+        )
+
+    def __is_written(self, user_id: int, now: datetime) -> bool:
+        limit: datetime = now - timedelta(seconds=self.flush_interval)
+        with self.lock:
+            while self.written_at and \
+                    next(iter(self.written_at.values())) < limit:
+                self.written_at.popitem(last=False)
+            if user_id in self.written_at:
+                return True
+            self.written_at[user_id] = now
+        return False
+
+    def __schedule_flush(self) -> None:
+        if getattr(settings, "BACKGROUND_WORKERS_SYNC", False):
+            return
+        with self.lock:
+            if self.timer or not self.connections:
+                return
+            self.timer = Timer(self.flush_interval, self.__on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def __on_timer(self) -> None:
+        with self.lock:
+            self.timer = None
+        get_worker(PRESENCE_WORKER_NAME).submit(self.flush_and_schedule)
+
+    def touch(self, user_id: int) -> None:
+        """Register activity of the user."""
+        now: datetime = timezone.now()
+        if self.__is_written(user_id, now):
+            return
+        self.__get_stale_users(now).filter(id=user_id).update(
+            last_seen=now,
+            is_online=True
+        )
+
+    def connect(self, user_id: int) -> None:
+        """Register opened websocket of the user."""
+        with self.lock:
+            self.connections[user_id] = self.connections.get(user_id, 0) + 1
+        now: datetime = timezone.now()
+        CustomUser.objects.filter(id=user_id).update(
+            last_seen=now,
+            is_online=True
+        )
+        with self.lock:
+            self.written_at.pop(user_id, None)
+            self.written_at[user_id] = now
+        self.__schedule_flush()
+
+    def disconnect(self, user_id: int) -> None:
+        """Register closed websocket of the user.
+
+        Sockets of the user in other processes bring them online again
+        with the next flush of those processes.
+        """
+        with self.lock:
+            number: int = self.connections.get(user_id, 0) - 1
+            if number > 0:
+                self.connections[user_id] = number
+                return
+            self.connections.pop(user_id, None)
+            self.written_at.pop(user_id, None)
+        # Closed app goes offline at once, not after online_timeout
+        CustomUser.objects.filter(id=user_id).update(
+            last_seen=timezone.now(),
+            is_online=False
+        )
+
+    def get_online_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        """Get which of the users are online with one query."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        return set(
+            CustomUser.objects.filter(
+                id__in=user_ids,
+                is_online=True,
+                last_seen__gte=timezone.now() - self.online_timeout
+            ).values_list("id", flat=True)
+        )
+
+    def flush(self) -> int:
+        """Write connected users as seen now, get number of users."""
+        now: datetime = timezone.now()
+        with self.lock:
+            user_ids: List[int] = list(self.connections)
+            user_id: int
+            for user_id in user_ids:
+                self.written_at.pop(user_id, None)
+                self.written_at[user_id] = now
+        i: int
+        for i in range(0, len(user_ids), FLUSH_BATCH_SIZE):
+            self.__get_stale_users(now).filter(
+                id__in=user_ids[i:i + FLUSH_BATCH_SIZE]
+            ).update(
+                last_seen=now,
+                is_online=True
+            )
+        return len(user_ids)
+
+    def flush_and_schedule(self) -> None:
+        """Flush and plan the next flush while users are connected."""
+        try:
+            self.flush()
+        finally:
+            self.__schedule_flush()
+
+
+_tracker: Optional[PresenceTracker] = None
+
+
+def get_presence() -> PresenceTracker:
+    """Get presence tracker of the process configured by settings."""
+    global _tracker
+    if _tracker is None:
+        config: Dict[str, Any] = getattr(settings, "PRESENCE", {})
+        _tracker = PresenceTracker(
+            online_timeout=config.get(
+                "ONLINE_TIMEOUT", DEFAULT_ONLINE_TIMEOUT
+            ),
+            flush_interval=config.get(
+                "FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL
+            )
+        )
+    return _tracker
@@ -0,0 +1,25 @@
+from abstracts.search import (
+    SearchIndex,
+    register_index,
+)
+from auths.models import CustomUser
+
+
+USERS_INDEX_FIELDS = (
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+)
+
+# Its FTS5 table indexes prefixes of 2 and 3 letters for user lookups
+USERS_INDEX: SearchIndex = register_index(
+    SearchIndex(
+        name="users",
+        get_queryset=lambda: CustomUser.objects.get_active_users(),
+        get_text=lambda user: " ".join(
+            getattr(user, field) or "" for field in USERS_INDEX_FIELDS
+        ),
+        recency_weight=0.0
+    )
+)
@@ -19,6 +19,7 @@ from rest_framework.serializers import (
 from auths.models import (
     CustomUser,
     Friends,
+    FriendSuggestion,
     Phone,
 )
 from abstracts.mixins import AbstractDateTimeSerializerMixin
@@ -212,6 +213,21 @@ class CustomUserShortSerializer(ModelSerializer):
         )
 
 
+class FriendSuggestionSerializer(ModelSerializer):
+    """FriendSuggestionSerializer."""
+
+    suggested_user: CustomUserShortSerializer = CustomUserShortSerializer()
+
+    class Meta:
+        """Customizing own serializer."""
+
+        model: FriendSuggestion = FriendSuggestion
+        fields: Tuple[str] = (
+            "suggested_user",
+            "mutual_friends",
+        )
+
+
 # Phone Serializer that is related to the CustomUser
 class PhoneDetailSerializer(PhoneBaseSerializer):
     """PhoneDetailSerializer."""
@@ -3,6 +3,10 @@ from logging import (
     getLogger,
     Logger,
 )
+from typing import (
+    FrozenSet,
+    Optional,
+)
 
 from django.dispatch import receiver
 from django.db.models.signals import (
@@ -18,9 +22,74 @@ from django.conf import settings
 
 from auths.models import (
     CustomUser,
+    Friends,
+)
+from auths.graph import (
+    invalidate_friend_ids,
+    update_suggestions_on_commit,
+)
+from auths.search import (
+    USERS_INDEX,
+    USERS_INDEX_FIELDS,
+)
+
+
+# Fields which change the text of the user or whether one may be found
+USERS_INDEX_UPDATE_FIELDS = frozenset(
+    USERS_INDEX_FIELDS + ("is_active", "datetime_deleted")
+)
+
+
+@receiver(
+    signal=post_save,
+    sender=CustomUser
 )
+def post_save_custom_user(
+    sender: ModelBase,
+    instance: CustomUser,
+    created: bool,
+    update_fields: Optional[FrozenSet[str]] = None,
+    **kwargs: dict
+) -> None:
+    """Signal post-save CustomUser."""
+    # Saves of e.g. last_login only do not touch the search index
+    if update_fields and not USERS_INDEX_UPDATE_FIELDS & update_fields:
+        return
+    USERS_INDEX.update_on_commit([instance.id])
 
 
+@receiver(
+    signal=post_save,
+    sender=Friends
+)
+def post_save_friends(
+    sender: ModelBase,
+    instance: Friends,
+    created: bool,
+    **kwargs: dict
+) -> None:
+    """Signal post-save Friends."""
+    invalidate_friend_ids([instance.from_user_id, instance.to_user_id])
+    update_suggestions_on_commit(
+        [instance.from_user_id, instance.to_user_id]
+    )
+
+
+@receiver(
+    signal=post_delete,
+    sender=Friends
+)
+def post_delete_friends(
+    sender: ModelBase,
+    instance: Friends,
+    **kwargs: dict
+) -> None:
+    """Signal post-delete Friends."""
+    invalidate_friend_ids([instance.from_user_id, instance.to_user_id])
+    update_suggestions_on_commit(
+        [instance.from_user_id, instance.to_user_id]
+    )
+
 
 # @receiver(
 #     signal=post_save,
@@ -1,3 +1,390 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from rest_framework.response import Response as DRF_Response
+from rest_framework.test import APIClient
+
+from abstracts.cache import get_cached_instance
+from abstracts.queries import QueryBudgetTestMixin
+from abstracts.testing import create_user
+from auths.graph import (
+    get_friend_ids,
+    get_friends_cache,
+)
+from auths.models import (
+    CustomUser,
+    Friends,
+    FriendSuggestion,
+)
+from auths.presence import PresenceTracker
+from auths.search import USERS_INDEX
+
+
+class UsersTestCase(QueryBudgetTestMixin, TestCase):
+    """Requests of the user."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.user: CustomUser = create_user("user")
+        self.others: List[CustomUser] = []
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_other(self) -> CustomUser:
+        """Create one more user."""
+        self.others.append(create_user(f"other_{len(self.others)}"))
+        return self.others[-1]
+
+    def make_friends(self, other: CustomUser) -> None:
+        """Make the user and the other friends."""
+        Friends.objects.create(from_user=self.user, to_user=other)
+        Friends.objects.create(from_user=other, to_user=self.user)
+
+
+class FriendsStatesTest(UsersTestCase):
+    """Friendship badges of many users."""
+
+    def get_states(self) -> DRF_Response:
+        """Get friendship states of all other users."""
+        return self.client.get(
+            "/api/v1/auths/users/friends_states",
+            {"ids": ",".join(str(other.id) for other in self.others)}
+        )
+
+    def test_states(self) -> None:
+        """Both directions of every pair are resolved."""
+        friend: CustomUser = self.add_other()
+        self.make_friends(friend)
+        requested: CustomUser = self.add_other()
+        Friends.objects.create(from_user=self.user, to_user=requested)
+        blocked: CustomUser = self.add_other()
+        Friends.objects.create(
+            from_user=self.user,
+            to_user=blocked,
+            is_blocked=True
+        )
+        blocker: CustomUser = self.add_other()
+        Friends.objects.create(
+            from_user=blocker,
+            to_user=self.user,
+            is_blocked=True
+        )
+        stranger: CustomUser = self.add_other()
+
+        self.assertEqual(
+            self.get_states().data["data"],
+            {
+                friend.id: "friends",
+                requested.id: "request_sent",
+                blocked.id: "you_blocked",
+                blocker.id: "you_are_blocked",
+                stranger.id: "none",
+            }
+        )
+
+    def test_constant_queries(self) -> None:
+        """More users do not add queries."""
+        def add() -> None:
+            self.make_friends(self.add_other())
+            self.add_other()
+
+        self.assertConstantQueries(add, self.get_states)
+
+    def test_invalid_ids(self) -> None:
+        """Ids must be numbers."""
+        response: DRF_Response = self.client.get(
+            "/api/v1/auths/users/friends_states",
+            {"ids": "1,x"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class FriendsListTest(UsersTestCase):
+    """Friends of the user."""
+
+    def test_constant_queries(self) -> None:
+        """More friends do not add queries."""
+        self.assertConstantQueries(
+            lambda: self.make_friends(self.add_other()),
+            lambda: self.client.get(
+                f"/api/v1/auths/users/{self.user.id}/friends"
+            )
+        )
+
+    def test_friends_permission(self) -> None:
+        """Friends are seen only by the user and their friends."""
+        friend: CustomUser = self.add_other()
+        self.make_friends(friend)
+        stranger: CustomUser = self.add_other()
+        url: str = f"/api/v1/auths/users/{friend.id}/friends"
+
+        response: DRF_Response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user["id"] for user in response.data["data"]],
+            [self.user.id]
+        )
+        self.client.force_authenticate(friend)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_mutual_permission(self) -> None:
+        """Mutual friends need access to friends of both users."""
+        friend: CustomUser = self.add_other()
+        other_friend: CustomUser = self.add_other()
+        common: CustomUser = self.add_other()
+        self.make_friends(friend)
+        self.make_friends(common)
+        Friends.objects.create(from_user=friend, to_user=common)
+        Friends.objects.create(from_user=common, to_user=friend)
+        self.make_friends(other_friend)
+
+        response: DRF_Response = self.client.get(
+            f"/api/v1/auths/users/{self.user.id}/mutual/{friend.id}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user["id"] for user in response.data["data"]],
+            [common.id]
+        )
+        self.client.force_authenticate(other_friend)
+        response = self.client.get(
+            f"/api/v1/auths/users/{self.user.id}/mutual/{friend.id}"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class SuggestionsTest(UsersTestCase):
+    """Friend-of-friend suggestions kept up to date by the signals."""
+
+    def setUp(self) -> None:  # noqa
+        super().setUp()
+        self.friend: CustomUser = self.add_other()
+        self.stranger: CustomUser = self.add_other()
+        self.befriend(self.user, self.friend)
+        self.befriend(self.friend, self.stranger)
+
+    def befriend(self, first: CustomUser, second: CustomUser) -> None:
+        """Make both users friends and run the suggestions update."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Friends.objects.create(from_user=first, to_user=second)
+            Friends.objects.create(from_user=second, to_user=first)
+
+    def get_suggestions(self, user: CustomUser) -> Dict[int, int]:
+        """Get mutual friends by suggested user ids."""
+        return dict(
+            FriendSuggestion.objects.filter(user=user).values_list(
+                "suggested_user_id",
+                "mutual_friends"
+            )
+        )
+
+    def test_befriend(self) -> None:
+        """Friends of a new friend are suggested to both sides."""
+        self.assertEqual(
+            self.get_suggestions(self.user),
+            {self.stranger.id: 1}
+        )
+        self.assertEqual(
+            self.get_suggestions(self.stranger),
+            {self.user.id: 1}
+        )
+        self.assertEqual(self.get_suggestions(self.friend), {})
+
+        other: CustomUser = self.add_other()
+        self.befriend(other, self.friend)
+        self.befriend(other, self.stranger)
+        self.assertEqual(
+            self.get_suggestions(self.user),
+            {self.stranger.id: 1, other.id: 1}
+        )
+        self.assertEqual(self.get_suggestions(other), {self.user.id: 1})
+
+    def test_unfriend(self) -> None:
+        """Broken friendship drops the suggestions it made."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Friends.objects.filter(
+                from_user=self.friend,
+                to_user=self.stranger
+            ).delete()
+        self.assertEqual(self.get_suggestions(self.user), {})
+        self.assertEqual(self.get_suggestions(self.stranger), {})
+        self.assertEqual(get_friend_ids(self.friend.id), [self.user.id])
+
+    def test_block(self) -> None:
+        """Blocked users are never suggested to each other."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Friends.objects.create(
+                from_user=self.stranger,
+                to_user=self.user,
+                is_blocked=True
+            )
+        self.assertEqual(self.get_suggestions(self.user), {})
+        self.assertEqual(self.get_suggestions(self.stranger), {})
+
+    def test_friend_ids_are_shared(self) -> None:
+        """Friend ids are read from the shared cache after the first time."""
+        self.assertEqual(get_friend_ids(self.user.id), [self.friend.id])
+        with self.assertNumQueries(1):
+            friend_ids: List[int] = get_friend_ids(self.user.id)
+        self.assertEqual(friend_ids, [self.friend.id])
+        self.assertEqual(
+            get_friends_cache().get(f"friend-ids:{self.user.id}"),
+            [self.friend.id]
+        )
+
+    def test_build_command(self) -> None:
+        """Command rebuilds suggestions of the whole graph."""
+        FriendSuggestion.objects.all().delete()
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            call_command("build_friend_suggestions")
+        self.assertIn("Создано 2 предложений дружбы", stdout.getvalue())
+        self.assertEqual(
+            self.get_suggestions(self.user),
+            {self.stranger.id: 1}
+        )
+        self.assertEqual(
+            self.get_suggestions(self.stranger),
+            {self.user.id: 1}
+        )
+
+
+class UserSearchTest(UsersTestCase):
+    """Lookup of active users as the name is typed."""
+
+    def search(self, query: str) -> List[int]:
+        """Get ids of users found by the query."""
+        response: DRF_Response = self.client.get(
+            "/api/v1/auths/users/search",
+            {"q": query}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [user["id"] for user in response.data["data"]]
+
+    def create_indexed_user(self, name: str) -> CustomUser:
+        """Create user and index them."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_user(name)
+
+    def test_prefix(self) -> None:
+        """Users are found by the beginning of the name."""
+        alexander: CustomUser = self.create_indexed_user("alexander")
+        alexey: CustomUser = self.create_indexed_user("alexey")
+        self.create_indexed_user("boris")
+
+        self.assertEqual(sorted(self.search("al")), [alexander.id, alexey.id])
+        self.assertEqual(self.search("alexa"), [alexander.id])
+        self.assertEqual(self.search("xander"), [])
+
+    def test_username_change(self) -> None:
+        """Index follows the new username only."""
+        user: CustomUser = self.create_indexed_user("alexander")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.username = "sasha"
+            user.save(update_fields=["username"])
+        self.assertEqual(self.search("sasha"), [user.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = user.last_name = "Sasha"
+            user.email = "sasha@mail.kz"
+            user.save()
+        self.assertEqual(self.search("alexander"), [])
+
+    def test_deleted_users(self) -> None:
+        """Soft-deleted users are not found."""
+        user: CustomUser = self.create_indexed_user("alexander")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.datetime_deleted = timezone.now()
+            user.save(update_fields=["datetime_deleted"])
+        self.assertEqual(self.search("alex"), [])
+        self.assertEqual(USERS_INDEX.search("alex", prefix=True), [])
+
+
+@override_settings(SEARCH_BACKEND="postings")
+class PostingsUserSearchTest(UserSearchTest):
+    """Lookup of users kept in the postings table."""
+
+
+class PresenceTrackerTest(TestCase):
+    """Write-coalesced online state."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.user: CustomUser = create_user("user")
+        self.tracker: PresenceTracker = PresenceTracker(online_timeout=60)
+
+    def get_cached_user(self) -> CustomUser:
+        """Get user through the instance cache."""
+        return get_cached_instance(CustomUser.objects.all(), self.user.id)
+
+    def test_flush_invalidates_cached_user(self) -> None:
+        """Cached copies show the flushed state."""
+        self.assertFalse(self.get_cached_user().is_online)
+        self.tracker.connect(self.user.id)
+        self.assertTrue(self.get_cached_user().is_online)
+
+        self.tracker.disconnect(self.user.id)
+        user: CustomUser = self.get_cached_user()
+        self.assertFalse(user.is_online)
+        self.assertIsNotNone(user.last_seen)
+
+    def test_online_ids(self) -> None:
+        """Online state is read from the columns shared by processes."""
+        other: CustomUser = create_user("other")
+        self.tracker.touch(self.user.id)
+        # Another process sees the user online
+        tracker: PresenceTracker = PresenceTracker(online_timeout=60)
+        with self.assertNumQueries(1):
+            online_ids: Any = tracker.get_online_ids([self.user.id])
+        self.assertEqual(online_ids, {self.user.id})
+        self.assertEqual(
+            tracker.get_online_ids([self.user.id, other.id]),
+            {self.user.id}
+        )
+
+    def test_touch_is_coalesced(self) -> None:
+        """Only the first touch of the interval is written."""
+        self.tracker.touch(self.user.id)
+        with self.assertNumQueries(0):
+            self.tracker.touch(self.user.id)
+        # Fresh last_seen written by another process is not written again
+        tracker: PresenceTracker = PresenceTracker(online_timeout=60)
+        with self.assertNumQueries(1):
+            tracker.touch(self.user.id)
+
+    def test_flush_keeps_connected_online(self) -> None:
+        """Connected users are written as seen, others are not."""
+        other: CustomUser = create_user("other")
+        self.tracker.connect(self.user.id)
+        self.tracker.touch(other.id)
+        CustomUser.objects.update(last_seen=timezone.now() - timedelta(1))
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(
+            self.tracker.get_online_ids([self.user.id, other.id]),
+            {self.user.id}
+        )
+
+    def test_last_seen_is_kept_by_saves(self) -> None:
+        """Saves of the user do not move last_seen."""
+        self.assertIsNone(self.user.last_seen)
+        self.user.first_name = "Name"
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_seen)
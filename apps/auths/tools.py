@@ -12,6 +12,15 @@ from auths.models import (
 )
 
 
+FRIENDS_STATE_NAMES = {
+    None: "none",
+    YOU_BLOCKED_STATE: "you_blocked",
+    YOU_ARE_BLOCKED_STATE: "you_are_blocked",
+    ALREADY_FRIENDS_STATE: "friends",
+    ALREADY_REQUEST_SENT_STATE: "request_sent",
+}
+
+
 def is_superuser_authenticated(user: CustomUser) -> bool:
     """Handle if superuser is authenticated or not."""
     if user.is_authenticated:
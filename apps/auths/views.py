@@ -3,6 +3,7 @@ from typing import (
     Any,
     Tuple,
     Dict,
+    List,
 )
 from datetime import datetime
 
@@ -22,10 +23,17 @@ from auths.permissions import (
 from auths.models import (
     CustomUser,
     Friends,
+    FriendSuggestion,
     Phone,
     CustomUserManager,
 )
+from auths.graph import (
+    get_friend_ids,
+    intersect_sorted,
+)
+from auths.search import USERS_INDEX
 from auths.tools import (
+    FRIENDS_STATE_NAMES,
     is_superuser_authenticated,
     get_friends_drf_response,
 )
@@ -33,16 +41,24 @@ from auths.serializers import (
     PhoneBaseSerializer,
     CustomUserBaseSerializer,
     CustomUserDetailSerializer,
+    CustomUserShortSerializer,
+    FriendSuggestionSerializer,
     PhoneDetailSerializer,
 )
 from abstracts.paginators import (
     AbstractPageNumberPaginator,
+    AbstractCursorPaginator,
 )
 from abstracts.mixins import (
     ModelInstanceMixin,
     DeletedRequestMixin,
 )
 from abstracts.handlers import NoneDataHandler
+from abstracts.search import SearchResult
+
+
+FRIENDS_STATES_MAX_IDS = 100
+USERS_SEARCH_LIMIT = 20
 
 
 class CustomUserViewSet(
@@ -404,6 +420,248 @@ class CustomUserViewSet(
 
         return response
 
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path="friends"
+    )
+    def get_friends(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to list accepted friends of the user."""
+        custom_user: Optional[CustomUser] = self.get_queryset_instance_by_id(
+            class_name=CustomUser,
+            queryset=self.get_queryset(),
+            pk=pk
+        )
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=custom_user,
+            message=f"Пользователь с PK {pk} не найден или был удален",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+        friend_ids: List[int] = get_friend_ids(custom_user.id)
+        response = self.get_friends_forbidden_response(
+            request=request,
+            friend_ids_of_users={custom_user.id: friend_ids}
+        )
+        if response:
+            return response
+        return self.get_friends_response(
+            request=request,
+            friend_ids=friend_ids
+        )
+
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path=r"mutual/(?P<other_pk>\d+)"
+    )
+    def get_mutual_friends(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        other_pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to list mutual friends of two users."""
+        users: Dict[int, CustomUser] = self.get_queryset().in_bulk(
+            [int(pk), int(other_pk)]
+        )
+        user_id: int
+        for user_id in (int(pk), int(other_pk)):
+            if user_id not in users:
+                return DRF_Response(
+                    data={
+                        "response": f"Пользователь с PK {user_id} не найден \
+или был удален"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        friend_ids_of_users: Dict[int, List[int]] = {
+            user_id: get_friend_ids(user_id) for user_id in users
+        }
+        response: Optional[DRF_Response] = \
+            self.get_friends_forbidden_response(
+                request=request,
+                friend_ids_of_users=friend_ids_of_users
+            )
+        if response:
+            return response
+        return self.get_friends_response(
+            request=request,
+            friend_ids=intersect_sorted(
+                friend_ids_of_users[int(pk)],
+                friend_ids_of_users[int(other_pk)]
+            )
+        )
+
+    def get_friends_forbidden_response(
+        self,
+        request: DRF_Request,
+        friend_ids_of_users: Dict[int, List[int]]
+    ) -> Optional[DRF_Response]:
+        """Get 403 unless the requester is each user or their friend."""
+        user_id: int
+        friend_ids: List[int]
+        for user_id, friend_ids in friend_ids_of_users.items():
+            if request.user.id != user_id and \
+                    request.user.id not in friend_ids:
+                return DRF_Response(
+                    data={
+                        "response": "Друзей пользователя видят только он \
+и его друзья"
+                    },
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        return None
+
+    def get_friends_response(
+        self,
+        request: DRF_Request,
+        friend_ids: List[int]
+    ) -> DRF_Response:
+        """Get page of users by ids found in memory."""
+        return self.get_drf_response(
+            request=request,
+            data=self.get_queryset().filter(id__in=friend_ids).order_by("id"),
+            serializer_class=CustomUserShortSerializer,
+            many=True,
+            paginator=AbstractCursorPaginator()
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="suggestions"
+    )
+    def get_friend_suggestions(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to get precomputed friend suggestions."""
+        suggestions: QuerySet[FriendSuggestion] = \
+            FriendSuggestion.objects.filter(
+                user_id=request.user.id,
+                suggested_user__datetime_deleted__isnull=True,
+                suggested_user__is_active=True
+            ).select_related("suggested_user")
+        return DRF_Response(
+            data={
+                "data": FriendSuggestionSerializer(
+                    suggestions,
+                    many=True
+                ).data
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="search"
+    )
+    def search_users(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to find active users as q is typed."""
+        query: str = request.query_params.get("q", "").strip()
+        if not query:
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить 'q'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit: int = min(
+                int(request.query_params.get("limit", USERS_SEARCH_LIMIT)),
+                USERS_SEARCH_LIMIT
+            )
+        except ValueError:
+            limit = USERS_SEARCH_LIMIT
+
+        results: List[SearchResult] = USERS_INDEX.search(
+            query=query,
+            limit=limit,
+            prefix=True
+        )
+        users: Dict[int, CustomUser] = CustomUser.objects.get_active_users()\
+            .in_bulk([result.object_id for result in results])
+        found_users: List[CustomUser] = [
+            users[result.object_id] for result in results
+            if result.object_id in users
+        ]
+        return DRF_Response(
+            data={
+                "data": CustomUserShortSerializer(
+                    found_users,
+                    many=True
+                ).data
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="friends_states"
+    )
+    def get_friends_states(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request with ids=1,2,3 to get friends badges."""
+        try:
+            user_ids: List[int] = [
+                int(user_id)
+                for user_id in request.query_params.get("ids", "").split(",")
+                if user_id.strip()
+            ]
+        except ValueError:
+            return DRF_Response(
+                data={
+                    "response": "Поле 'ids' должно содержать числа"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not user_ids or len(user_ids) > FRIENDS_STATES_MAX_IDS:
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить от 1 до "
+                    f"{FRIENDS_STATES_MAX_IDS} ID в 'ids'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        friends_states: Dict[int, Optional[int]] = \
+            Friends.objects.get_friends_states(
+                from_user=request.user,
+                to_user_ids=user_ids
+            )
+        return DRF_Response(
+            data={
+                "data": {
+                    user_id: FRIENDS_STATE_NAMES[friends_state]
+                    for user_id, friends_state in friends_states.items()
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+
     @action(
         methods=["post"],
         detail=True,
@@ -1,60 +1,137 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from typing import (
     Optional,
     Dict,
     Any,
+    Set,
 )
 
-from chats.models import Message
+from auths.models import CustomUser
+from auths.presence import get_presence
+from chats.models import (
+    ChatMember,
+    Message,
+)
+from chats.tools import get_chat_group_name
+from chats.writer import get_message_writer
+
+
+UNAUTHORIZED_CLOSE_CODE = 4401
+FORBIDDEN_CLOSE_CODE = 4403
+GONE_CLOSE_CODE = 4410
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
-    """ChatConsumer."""
+    """ChatConsumer.
+
+    Members of the chat are loaded once on connect and kept up to date by
+    chat_membership events, so received messages need no DB round trip
+    before they are written. Sockets of a deleted chat are closed by the
+    chat_deleted event.
+    """
 
     async def connect(self) -> None:
         """Get in touch with chat."""
-        self.chat_id = self.scope['url_route']['kwargs']['chat_id']
-        self.chat_group_name = 'chat_%s' % self.chat_id
+        self.chat_id: int = self.scope['url_route']['kwargs']['chat_id']
+        self.chat_group_name: str = get_chat_group_name(self.chat_id)
+        self.user: Optional[CustomUser] = self.scope.get('user', None)
+        self.member_ids: Set[int] = set()
+        self.is_joined: bool = False
+
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=UNAUTHORIZED_CLOSE_CODE)
+            return
+
+        self.member_ids = await self.get_member_ids()
+        if not self.is_member():
+            await self.close(code=FORBIDDEN_CLOSE_CODE)
+            return
 
         await self.channel_layer.group_add(
             self.chat_group_name,
             self.channel_name
         )
+        self.is_joined = True
 
         await self.accept()
+        await database_sync_to_async(get_presence().connect)(self.user.id)
 
     async def disconnect(self, code: int) -> None:
         """Disconnect."""
+        if not self.is_joined:
+            return
+        self.is_joined = False
         await self.channel_layer.group_discard(
             self.chat_group_name,
             self.channel_name
         )
+        await database_sync_to_async(get_presence().disconnect)(self.user.id)
+
+    def is_member(self) -> bool:
+        """Check if the user of the socket may write to the chat."""
+        return self.user.id in self.member_ids or self.user.is_staff
 
     async def receive(self, text_data=None, bytes_data=None) -> None:
         """receive."""
         data: Dict[str, Any] = json.loads(text_data)
         message: Optional[str] = data.get('message', None)
-        username: Optional[str] = data.get('username', None)
-        chat_id: Optional[int] = data.get('chat_id', None)
-        user_id: Optional[int] = data.get('user_id', None)
-
-        if message and user_id and chat_id:
-            await self.save_message(
-                chat_id=chat_id,
-                user_id=user_id,
-                message=message
+        client_id: Optional[Any] = data.get('client_id', None)
+
+        if not self.is_member():
+            await self.send(text_data=json.dumps(
+                {
+                    'type': 'error',
+                    'client_id': client_id,
+                    'response': 'Вы не являетесь членом чата'
+                }
+            ))
+            await self.close(code=FORBIDDEN_CLOSE_CODE)
+            return
+        if not message or not isinstance(message, str):
+            await self.send(text_data=json.dumps(
+                {
+                    'type': 'error',
+                    'client_id': client_id,
+                    'response': "Необходимо предоставить 'message'"
+                }
+            ))
+            return
+
+        try:
+            saved_message: Message = await get_message_writer().write(
+                chat_id=self.chat_id,
+                owner_id=self.user.id,
+                content=message
             )
+        except Exception:
+            await self.send(text_data=json.dumps(
+                {
+                    'type': 'error',
+                    'client_id': client_id,
+                    'response': 'Сообщение не сохранено'
+                }
+            ))
+            return
 
+        # Acknowledge only saved messages
+        await self.send(text_data=json.dumps(
+            {
+                'type': 'ack',
+                'client_id': client_id,
+                'message_id': saved_message.id
+            }
+        ))
         await self.channel_layer.group_send(
             self.chat_group_name,
             {
                 'type': 'chat_message',
                 'message': message,
-                'username': username,
-                'chat_id': chat_id,
-                'user_id': user_id
+                'username': self.user.username,
+                'chat_id': self.chat_id,
+                'user_id': self.user.id,
+                'message_id': saved_message.id
             }
         )
 
@@ -64,26 +141,36 @@ class ChatConsumer(AsyncWebsocketConsumer):
         username: str = event['username']
         chat_id: int = event['chat_id']
         user_id: int = event['user_id']
+        message_id: Optional[int] = event.get('message_id', None)
 
         await self.send(text_data=json.dumps(
             {
                 'message': message,
                 'username': username,
                 'chat': chat_id,
-                'user_id': user_id
+                'user_id': user_id,
+                'message_id': message_id
             }
         ))
 
-    @sync_to_async
-    def save_message(
-        self,
-        chat_id: int,
-        user_id: int,
-        message: str
-    ) -> None:
-        """Save message in db."""
-        Message.objects.create(
-            content=message,
-            chat_id=chat_id,
-            owner_id=user_id
+    async def chat_membership(self, event) -> None:
+        """Update cached members of the chat."""
+        self.member_ids.update(event.get('added', ()))
+        self.member_ids.difference_update(event.get('removed', ()))
+        if not self.is_member():
+            await self.close(code=FORBIDDEN_CLOSE_CODE)
+
+    async def chat_deleted(self, event) -> None:
+        """Close the socket of the deleted chat."""
+        await self.close(code=GONE_CLOSE_CODE)
+
+    @database_sync_to_async
+    def get_member_ids(self) -> Set[int]:
+        """Get ids of the members of not-deleted chat."""
+        return set(
+            ChatMember.objects.filter(
+                chat_id=self.chat_id,
+                chat__datetime_deleted__isnull=True,
+                user__datetime_deleted__isnull=True
+            ).values_list("user_id", flat=True)
         )
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:34
+
+import abstracts.counters
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_members_count(apps, schema_editor):
+    chat_model = apps.get_model('chats', 'Chat')
+    through_model = apps.get_model('chats', 'ChatMember')
+    chat_model.objects.update(
+        members_count=Coalesce(
+            Subquery(
+                through_model.objects.filter(
+                    chat_id=OuterRef('pk')
+                ).order_by().values('chat_id').annotate(
+                    number=Count('pk')
+                ).values('number')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='members_count',
+            field=abstracts.counters.CounterField(default=0, editable=False, source='members', verbose_name='Количество членов чата'),
+        ),
+        migrations.RunPython(
+            fill_members_count,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:42
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_inbox(apps, schema_editor):
+    chat_model = apps.get_model('chats', 'Chat')
+    message_model = apps.get_model('chats', 'Message')
+    last_messages = message_model.objects.filter(
+        chat_id=OuterRef('chat_id'),
+        datetime_deleted__isnull=True
+    ).order_by('-id')
+    apps.get_model('chats', 'ChatMember').objects.update(
+        last_message_id=Subquery(last_messages.values('id')[:1]),
+        last_read_message_id=Subquery(last_messages.values('id')[:1]),
+        last_message_preview=Coalesce(
+            Substr(Subquery(last_messages.values('content')[:1]), 1, 100),
+            Value('')
+        ),
+        last_activity=Coalesce(
+            Subquery(last_messages.values('datetime_created')[:1]),
+            Subquery(
+                chat_model.objects.filter(
+                    id=OuterRef('chat_id')
+                ).values('datetime_created')[:1]
+            )
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_message_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmember',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время последней активности'),
+        ),
+        migrations.AddField(
+            model_name='chatmember',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chats.message', verbose_name='Последнее сообщение'),
+        ),
+        migrations.AddField(
+            model_name='chatmember',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Начало последнего сообщения'),
+        ),
+        migrations.AddField(
+            model_name='chatmember',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chats.message', verbose_name='Последнее прочитанное сообщение'),
+        ),
+        migrations.AddField(
+            model_name='chatmember',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество непрочитанных сообщений'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmember',
+            index=models.Index(fields=['user', 'last_activity'], name='chatmember_inbox_idx'),
+        ),
+        migrations.RunPython(
+            fill_inbox,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:03
+
+import abstracts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_chatmember_inbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chat',
+            name='photo',
+            field=models.ImageField(blank=True, storage=abstracts.storage.ContentAddressedStorage(), upload_to='photos/chats/%Y/%m/%d/', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -1,9 +1,31 @@
+from typing import (
+    Dict,
+    List,
+)
+
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import (
+    Case,
+    F,
+    Func,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import (
+    Coalesce,
+    Greatest,
+    Substr,
+)
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 
 from abstracts.models import AbstractDateTime
+from abstracts.counters import CounterField
+from abstracts.storage import content_storage
 from auths.models import CustomUser
 
 
@@ -27,6 +49,7 @@ class Chat(AbstractDateTime):  # noqa
     )
     photo = models.ImageField(
         upload_to='photos/chats/%Y/%m/%d/',
+        storage=content_storage,
         blank=True,
         verbose_name='Миниатюра'
     )
@@ -44,6 +67,10 @@ class Chat(AbstractDateTime):  # noqa
         blank=True,
         verbose_name="Члены чата"
     )
+    members_count = CounterField(
+        source="members",
+        verbose_name="Количество членов чата"
+    )
 
     class Meta:  # noqa
         verbose_name = "Чат"
@@ -67,9 +94,140 @@ class ChatMemberQuerySet(QuerySet):  # noqa
             chat_id=chat_id
         ).count()
 
+    def add_messages(
+        self,
+        chat_id: int,
+        messages: List["Message"]
+    ) -> int:
+        """Move inbox of the chat members past the new messages.
+
+        Messages must belong to the chat and be ordered by id. Everyone
+        gets the messages as unread except their own: sending a message
+        marks everything before it as read. One UPDATE for all members.
+        Batches committed out of order never move the preview or the read
+        marks back.
+        """
+        if not messages:
+            return 0
+        last_message: Message = messages[-1]
+
+        last_own: Dict[int, int] = {}
+        i: int
+        message: Message
+        for i, message in enumerate(messages):
+            last_own[message.owner_id] = i
+        unread_whens: List[When] = []
+        read_whens: List[When] = []
+        owner_id: int
+        for owner_id, i in last_own.items():
+            is_read_before: Q = Q(user_id=owner_id) & (
+                Q(last_read_message_id__isnull=True) |
+                Q(last_read_message_id__lt=messages[i].id)
+            )
+            # Newer batches may be counted already, so count the rest
+            unread_whens.append(
+                When(
+                    is_read_before,
+                    then=Coalesce(
+                        Subquery(
+                            Message.objects.get_not_deleted()
+                            .filter(chat_id=chat_id, id__gt=messages[i].id)
+                            .exclude(owner_id=owner_id)
+                            .order_by()
+                            .annotate(
+                                number=Func(F("id"), function="COUNT")
+                            )
+                            .values("number")
+                        ),
+                        0
+                    )
+                )
+            )
+            unread_whens.append(
+                When(user_id=owner_id, then=F("unread_count"))
+            )
+            read_whens.append(
+                When(is_read_before, then=Value(messages[i].id))
+            )
+        unread_whens.append(
+            When(
+                last_read_message_id__gte=last_message.id,
+                then=F("unread_count")
+            )
+        )
+
+        is_newer: Q = Q(last_message_id__isnull=True) | \
+            Q(last_message_id__lt=last_message.id)
+        return self.filter(chat_id=chat_id).update(
+            last_message_id=Case(
+                When(is_newer, then=Value(last_message.id)),
+                default=F("last_message_id"),
+                output_field=models.IntegerField()
+            ),
+            last_message_preview=Case(
+                When(
+                    is_newer,
+                    then=Value(
+                        last_message.content[:ChatMember.PREVIEW_MAX_LEN]
+                    )
+                ),
+                default=F("last_message_preview"),
+                output_field=models.CharField()
+            ),
+            last_activity=Greatest(
+                F("last_activity"),
+                Value(last_message.datetime_created)
+            ),
+            unread_count=Case(
+                *unread_whens,
+                default=F("unread_count") + len(messages),
+                output_field=models.PositiveIntegerField()
+            ),
+            last_read_message_id=Case(
+                *read_whens,
+                default=F("last_read_message_id"),
+                output_field=models.IntegerField()
+            )
+        )
+
+    def remove_message(self, message: "Message") -> int:
+        """Take the soft deleted message out of the inbox of the members.
+
+        The message is no longer unread, and the preview of the members
+        showing it moves to the previous not deleted message.
+        """
+        self.filter(
+            Q(last_read_message_id__isnull=True) |
+            Q(last_read_message_id__lt=message.id),
+            chat_id=message.chat_id,
+            unread_count__gt=0
+        ).exclude(
+            user_id=message.owner_id
+        ).update(
+            unread_count=F("unread_count") - 1
+        )
+        previous_messages: QuerySet = Message.objects.get_not_deleted()\
+            .filter(chat_id=message.chat_id, id__lt=message.id)\
+            .order_by("-id")
+        return self.filter(
+            chat_id=message.chat_id,
+            last_message_id=message.id
+        ).update(
+            last_message_id=Subquery(previous_messages.values("id")[:1]),
+            last_message_preview=Coalesce(
+                Substr(
+                    Subquery(previous_messages.values("content")[:1]),
+                    1,
+                    ChatMember.PREVIEW_MAX_LEN
+                ),
+                Value("")
+            )
+        )
+
 
 class ChatMember(models.Model):  # noqa
     CHAT_USER_NAME_MAX_LEN = 150
+    PREVIEW_MAX_LEN = 100
     chat = models.ForeignKey(
         to=Chat,
         on_delete=models.CASCADE,
@@ -87,6 +245,36 @@ class ChatMember(models.Model):  # noqa
         blank=True,
         verbose_name="Никнейм в чате"
     )
+    last_message = models.ForeignKey(
+        to="Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Последнее сообщение"
+    )
+    last_message_preview = models.CharField(
+        max_length=PREVIEW_MAX_LEN,
+        default="",
+        blank=True,
+        verbose_name="Начало последнего сообщения"
+    )
+    last_activity = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Время последней активности"
+    )
+    last_read_message = models.ForeignKey(
+        to="Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Последнее прочитанное сообщение"
+    )
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество непрочитанных сообщений"
+    )
     objects = ChatMemberQuerySet.as_manager()
 
     class Meta:  # noqa
@@ -101,11 +289,18 @@ class ChatMember(models.Model):  # noqa
                 name="unique_chat_user"
             ),
         ]
+        indexes = (
+            models.Index(
+                fields=("user", "last_activity"),
+                name="chatmember_inbox_idx"
+            ),
+        )
 
     def __get_number_of_members(self) -> int:
-        return ChatMember.objects.filter(
-            chat_id=self.chat_id
-        ).count()
+        # Loaded chat may be older than the counter updated in the database
+        return Chat.objects.filter(id=self.chat_id)\
+            .values_list("members_count", flat=True)\
+            .first() or 0
 
     def is_amount_members_sufficient(self) -> None:  # noqa
         TWO_MEMBERS = 2
@@ -158,6 +353,20 @@ class Message(AbstractDateTime):  # noqa
         ordering = (
             "datetime_created",
         )
+        indexes = (
+            models.Index(
+                fields=("chat", "datetime_created"),
+                name="message_chat_created_idx"
+            ),
+            models.Index(
+                fields=("chat", "datetime_updated"),
+                name="message_chat_updated_idx"
+            ),
+            models.Index(
+                fields=("chat", "datetime_deleted"),
+                name="message_chat_deleted_idx"
+            ),
+        )
 
     def __str__(self) -> str:  # noqa
         return f'Сообщение создал пользователь {self.owner} в чате {self.chat}'
@@ -0,0 +1,15 @@
+from abstracts.search import (
+    SearchIndex,
+    register_index,
+)
+from chats.models import Message
+
+
+MESSAGES_INDEX: SearchIndex = register_index(
+    SearchIndex(
+        name="chat_messages",
+        get_queryset=lambda: Message.objects.get_not_deleted(),
+        get_text=lambda message: message.content,
+        group_field="chat_id"
+    )
+)
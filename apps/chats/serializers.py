@@ -1,4 +1,8 @@
 from typing import (
+    Any,
+    Dict,
+    List,
+    Set,
     Tuple,
     Optional,
 )
@@ -13,13 +17,17 @@ from rest_framework.serializers import (
     DateTimeField,
     CharField,
     BooleanField,
+    ImageField,
     SerializerMethodField,
     HiddenField,
     CurrentUserDefault,
+    ListSerializer,
 )
+from django.db.models import Manager
 from traitlets import default
 
 from auths.models import CustomUser
+from auths.presence import get_presence
 from auths.serializers import CustomUserShortSerializer
 from chats.models import (
     Chat,
@@ -30,9 +38,25 @@ from abstracts.mixins import AbstractDateTimeSerializerMixin
 
 
 # ChatMemberListSerializers
+class ChatMembersPresenceListSerializer(ListSerializer):
+    """Members list resolving online state of all members at once."""
+
+    def to_representation(self, data: Any) -> List[Dict[str, Any]]:
+        """Look up online members before the members are serialized."""
+        members: List[ChatMember] = list(
+            data.all() if isinstance(data, Manager) else data
+        )
+        self.online_ids: Set[int] = get_presence().get_online_ids(
+            member.user_id for member in members
+        )
+        return super().to_representation(members)
+
+
 class ChatMembersListSerailizer(ModelSerializer):
     """Serializer class between Chat and its members."""
 
+    is_online: SerializerMethodField = SerializerMethodField()
+
     class Meta:
         """Class for serializer structure."""
 
@@ -40,7 +64,19 @@ class ChatMembersListSerailizer(ModelSerializer):
         fields: Tuple[str] = (
             "user",
             "chat_name",
+            "is_online",
         )
+        list_serializer_class: ListSerializer = \
+            ChatMembersPresenceListSerializer
+
+    def get_is_online(self, obj: ChatMember) -> bool:
+        """Get online state of the member."""
+        online_ids: Optional[Set[int]] = getattr(
+            self.parent, "online_ids", None
+        )
+        if online_ids is None:
+            online_ids = get_presence().get_online_ids([obj.user_id])
+        return obj.user_id in online_ids
 
 
 class ChatMemberBaseModelSerializer(ModelSerializer):
@@ -53,6 +89,40 @@ class ChatMemberBaseModelSerializer(ModelSerializer):
         fields: str = "__all__"
 
 
+class ChatInboxSerializer(ModelSerializer):
+    """Inbox entry: chat of the user with its last message."""
+
+    name: CharField = CharField(
+        source="chat.name",
+        read_only=True
+    )
+    is_group: BooleanField = BooleanField(
+        source="chat.is_group",
+        read_only=True
+    )
+    photo: ImageField = ImageField(
+        source="chat.photo",
+        read_only=True
+    )
+
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: ChatMember = ChatMember
+        fields: Tuple[str] = (
+            "chat",
+            "name",
+            "is_group",
+            "photo",
+            "chat_name",
+            "last_message",
+            "last_message_preview",
+            "last_activity",
+            "last_read_message",
+            "unread_count",
+        )
+
+
 # Message Serializers
 class MessageBaseModelSerializer(
     AbstractDateTimeSerializerMixin,
@@ -88,6 +158,22 @@ class MessageListSerializer(MessageBaseModelSerializer):
     owner: CustomUserShortSerializer = CustomUserShortSerializer()
 
 
+class MessageSyncSerializer(ModelSerializer):
+    """Compact message for delta-sync of the chat history."""
+
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: Message = Message
+        fields: Tuple[str] = (
+            "id",
+            "content",
+            "owner",
+            "datetime_created",
+            "datetime_updated",
+        )
+
+
 # Chat serializers
 class ChatBaseModelSerializer(
     AbstractDateTimeSerializerMixin,
@@ -135,6 +221,7 @@ class ChatListSerializer(ChatBaseModelSerializer):
             "owner",
             "is_deleted",
             "datetime_created",
+            "members_count",
         )
 
 
@@ -162,6 +249,7 @@ class ChatDetailSerializer(ChatListSerializer):
             "owner",
             "is_deleted",
             "datetime_created",
+            "members_count",
             "members",
         )
 
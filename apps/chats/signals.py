@@ -1,3 +1,9 @@
+from itertools import groupby
+from typing import (
+    Any,
+    List,
+)
+
 from django.db.models.signals import (
     post_save,
 )
@@ -7,7 +13,10 @@ from django.db.models.base import ModelBase
 from chats.models import (
     Chat,
     ChatMember,
+    Message,
 )
+from chats.search import MESSAGES_INDEX
+from chats.writer import messages_flushed
 
 
 @receiver(signal=post_save, sender=Chat)
@@ -25,3 +34,45 @@ def post_save_chat(
         user_id=instance.owner.id,
         chat_name=instance.owner.slug
     )
+
+
+@receiver(signal=post_save, sender=Message)
+def post_save_message(
+    sender: ModelBase,
+    instance: Message,
+    created: bool,
+    **kwargs
+) -> None:
+    """Signal for post save message."""
+    # Keep inbox of the chat members in step with the new message
+    if created:
+        ChatMember.objects.add_messages(
+            chat_id=instance.chat_id,
+            messages=[instance]
+        )
+    elif instance.datetime_deleted and \
+            "datetime_deleted" in (kwargs.get("update_fields") or ()):
+        ChatMember.objects.remove_message(instance)
+    # Edits and soft deletes are reindexed too
+    MESSAGES_INDEX.update_on_commit([instance.id])
+
+
+@receiver(signal=messages_flushed, sender=Message)
+def messages_flushed_inbox(
+    sender: ModelBase,
+    messages: List[Message],
+    **kwargs: Any
+) -> None:
+    """Signal for messages saved by the websocket writer."""
+    chat_id: int
+    for chat_id, chat_messages in groupby(
+        sorted(messages, key=lambda message: (message.chat_id, message.id)),
+        key=lambda message: message.chat_id
+    ):
+        ChatMember.objects.add_messages(
+            chat_id=chat_id,
+            messages=list(chat_messages)
+        )
+    MESSAGES_INDEX.update_on_commit(
+        [message.id for message in messages]
+    )
@@ -1,3 +1,572 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import (
+    datetime,
+    timedelta,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from rest_framework.response import Response as DRF_Response
+from rest_framework.test import APIClient
+
+from abstracts.models import SearchPosting
+from abstracts.queries import QueryBudgetTestMixin
+from abstracts.testing import create_user
+from auths.models import CustomUser
+from chats.models import (
+    Chat,
+    ChatMember,
+    Message,
+)
+from chats.consumers import (
+    FORBIDDEN_CLOSE_CODE,
+    GONE_CLOSE_CODE,
+    UNAUTHORIZED_CLOSE_CODE,
+)
+from chats.writer import MessageWriter
+from settings.routing import websocket_urlpatterns
+
+
+class ChatTestCase(QueryBudgetTestMixin, TestCase):
+    """Group chat of the owner and the member."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.owner: CustomUser = create_user("owner")
+        self.member: CustomUser = create_user("member")
+        self.chat: Chat = self.create_chat("chat")
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def create_chat(self, slug: str) -> Chat:
+        """Create group chat of the owner with the member."""
+        chat: Chat = Chat.objects.create(
+            name=slug,
+            slug=slug,
+            owner=self.owner,
+            is_group=True
+        )
+        ChatMember.objects.create(chat=chat, user=self.member)
+        return chat
+
+    def create_messages(
+        self,
+        number: int,
+        owner: Optional[CustomUser] = None,
+        chat: Optional[Chat] = None
+    ) -> List[Message]:
+        """Create messages one by one as the views do."""
+        return [
+            Message.objects.create(
+                chat=chat or self.chat,
+                owner=owner or self.owner,
+                content=f"message {i}"
+            )
+            for i in range(number)
+        ]
+
+    def get_member(self) -> ChatMember:
+        """Get chat state of the member."""
+        return ChatMember.objects.get(chat=self.chat, user=self.member)
+
+
+class ChatMessagesTest(ChatTestCase):
+    """Lists of chat messages."""
+
+    def add_writer(self) -> None:
+        """Add member writing two messages."""
+        user: CustomUser = create_user(
+            f"writer_{ChatMember.objects.count()}"
+        )
+        ChatMember.objects.create(chat=self.chat, user=user)
+        self.create_messages(2, owner=user)
+
+    def test_chat_messages_queries(self) -> None:
+        """Messages with their owners take the same queries for any size."""
+        self.assertConstantQueries(
+            self.add_writer,
+            lambda: self.client.get(
+                f"/api/v1/chats/chats/{self.chat.id}/messages"
+            )
+        )
+
+    def test_messages_queries(self) -> None:
+        """Messages of the chat parameter take the same queries."""
+        self.assertConstantQueries(
+            self.add_writer,
+            lambda: self.client.generic(
+                "GET",
+                "/api/v1/chats/messages",
+                json.dumps({"chat": self.chat.id}),
+                content_type="application/json"
+            ),
+            budget="chats/message-list"
+        )
+
+    def test_cursor_pages(self) -> None:
+        """Cursor mode pages messages in the list order without count."""
+        messages: List[Message] = self.create_messages(3)
+        response: DRF_Response = self.client.get(
+            f"/api/v1/chats/chats/{self.chat.id}/messages",
+            {"cursor": "", "page_size": 2}
+        )
+        self.assertNotIn("count", response.data["pagination"])
+        self.assertEqual(
+            [message["id"] for message in response.data["data"]],
+            [messages[0].id, messages[1].id]
+        )
+        response = self.client.get(response.data["pagination"]["next"])
+        self.assertEqual(
+            [message["id"] for message in response.data["data"]],
+            [messages[2].id]
+        )
+        self.assertIsNone(response.data["pagination"]["next"])
+
+    def test_cursor_queries(self) -> None:
+        """Cursor pages of the chat parameter take the same queries."""
+        self.assertConstantQueries(
+            self.add_writer,
+            lambda: self.client.generic(
+                "GET",
+                "/api/v1/chats/messages?cursor=",
+                json.dumps({"chat": self.chat.id}),
+                content_type="application/json"
+            ),
+            budget="chats/message-list"
+        )
+
+
+class MessageWriterTest(ChatTestCase):
+    """Batched inserts of MessageWriter."""
+
+    def write(
+        self,
+        writer: MessageWriter,
+        contents: List[Optional[str]]
+    ) -> List[Any]:
+        """Write messages concurrently, get messages or errors."""
+        async def write_all() -> List[Any]:
+            return await asyncio.gather(
+                *(
+                    writer.write(self.chat.id, self.owner.id, content)
+                    for content in contents
+                ),
+                return_exceptions=True
+            )
+
+        return async_to_sync(write_all)()
+
+    def test_batch_is_saved_in_order(self) -> None:
+        """Full buffer is flushed by one insert in arrival order."""
+        writer: MessageWriter = MessageWriter(
+            max_batch_size=3,
+            flush_interval=60
+        )
+        with self.assertQueryBudget(10):
+            messages: List[Any] = self.write(writer, ["a", "b", "c"])
+
+        self.assertEqual(
+            list(
+                Message.objects.filter(chat=self.chat)
+                .order_by("id")
+                .values_list("content", flat=True)
+            ),
+            ["a", "b", "c"]
+        )
+        self.assertEqual(
+            [message.content for message in messages],
+            ["a", "b", "c"]
+        )
+        metrics: Dict[str, Any] = writer.get_metrics()
+        self.assertEqual(metrics["flushed_batches"], 1)
+        self.assertEqual(metrics["flushed_messages"], 3)
+        self.assertEqual(metrics["failed_messages"], 0)
+
+        member: ChatMember = self.get_member()
+        self.assertEqual(member.unread_count, 3)
+        self.assertEqual(member.last_message_id, messages[-1].id)
+
+    def test_broken_message_fails_alone(self) -> None:
+        """Only the broken message of the batch is not saved."""
+        writer: MessageWriter = MessageWriter(
+            max_batch_size=3,
+            flush_interval=60
+        )
+        with self.assertLogs("chats.writer", "WARNING"):
+            results: List[Any] = self.write(writer, ["a", None, "c"])
+
+        self.assertIsInstance(results[1], IntegrityError)
+        self.assertEqual(
+            [results[0].content, results[2].content],
+            ["a", "c"]
+        )
+        self.assertEqual(
+            Message.objects.filter(chat=self.chat).count(),
+            2
+        )
+        metrics: Dict[str, Any] = writer.get_metrics()
+        self.assertEqual(metrics["flushed_messages"], 2)
+        self.assertEqual(metrics["failed_messages"], 1)
+        self.assertEqual(self.get_member().unread_count, 2)
+
+
+class SyncMessagesTest(ChatTestCase):
+    """Catch-up of chat history changes."""
+
+    def sync(self, **params: Any) -> DRF_Response:
+        """Get changes of the chat since the client state."""
+        return self.client.get(
+            f"/api/v1/chats/chats/{self.chat.id}/sync",
+            params
+        )
+
+    def test_created_messages_are_paged(self) -> None:
+        """New messages come in pages by after_id."""
+        messages: List[Message] = self.create_messages(3)
+        with mock.patch("chats.views.MESSAGES_SYNC_LIMIT", 2):
+            response: DRF_Response = self.sync(after_id=0)
+            self.assertTrue(response.data["has_more"])
+            self.assertEqual(
+                [message["id"] for message in response.data["created"]],
+                [messages[0].id, messages[1].id]
+            )
+            response = self.sync(after_id=response.data["cursor"]["after_id"])
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(
+            [message["id"] for message in response.data["created"]],
+            [messages[2].id]
+        )
+
+    def test_changes_with_equal_times_are_not_skipped(self) -> None:
+        """Page of edits ending inside equal times resumes by since_id."""
+        messages: List[Message] = self.create_messages(4)
+        since: datetime = timezone.now()
+        changed: datetime = since + timedelta(seconds=1)
+        Message.objects.filter(id__in=[m.id for m in messages[:3]])\
+            .update(datetime_updated=changed)
+        Message.objects.filter(id=messages[3].id)\
+            .update(datetime_deleted=changed)
+
+        with mock.patch("chats.views.MESSAGES_SYNC_LIMIT", 2):
+            response: DRF_Response = self.sync(
+                after_id=messages[-1].id,
+                since=since.isoformat()
+            )
+            self.assertTrue(response.data["has_more"])
+            self.assertEqual(
+                [message["id"] for message in response.data["updated"]],
+                [messages[0].id, messages[1].id]
+            )
+            cursor: Dict[str, Any] = response.data["cursor"]
+            self.assertEqual(cursor["since_id"], messages[1].id)
+
+            response = self.sync(**cursor)
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(
+            [message["id"] for message in response.data["updated"]],
+            [messages[2].id]
+        )
+        self.assertEqual(response.data["deleted"], [messages[3].id])
+        self.assertIsNone(response.data["cursor"]["since_id"])
+
+    def test_invalid_cursor(self) -> None:
+        """Malformed cursor is rejected."""
+        response: DRF_Response = self.sync(after_id=0, since_id="x")
+        self.assertEqual(response.status_code, 400)
+
+    def test_constant_queries(self) -> None:
+        """Created, edited and deleted messages take the same queries."""
+        since: str = timezone.now().isoformat()
+
+        def add() -> None:
+            messages: List[Message] = self.create_messages(3)
+            messages[0].content = "edited"
+            messages[0].save()
+            messages[1].delete()
+
+        self.assertConstantQueries(
+            add,
+            lambda: self.sync(since=since)
+        )
+
+
+class ReadMessagesTest(ChatTestCase):
+    """Read marks and unread counters of chat members."""
+
+    def read(self, message_id: Optional[int] = None) -> DRF_Response:
+        """Mark messages of the chat as read by the member."""
+        return self.client.post(
+            f"/api/v1/chats/chats/{self.chat.id}/read",
+            {} if message_id is None else {"message_id": message_id},
+            format="json"
+        )
+
+    def test_unread_counter(self) -> None:
+        """Messages of others are unread up to the read mark."""
+        messages: List[Message] = self.create_messages(3)
+        self.assertEqual(self.get_member().unread_count, 3)
+
+        response: DRF_Response = self.read(messages[1].id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data,
+            {"last_read_message": messages[1].id, "unread_count": 1}
+        )
+
+        response = self.read()
+        self.assertEqual(
+            response.data,
+            {"last_read_message": messages[2].id, "unread_count": 0}
+        )
+
+    def test_mark_never_moves_back(self) -> None:
+        """Reading an older message keeps the newer mark."""
+        messages: List[Message] = self.create_messages(3)
+        self.read(messages[2].id)
+
+        response: DRF_Response = self.read(messages[0].id)
+        self.assertEqual(
+            response.data,
+            {"last_read_message": messages[2].id, "unread_count": 0}
+        )
+        member: ChatMember = self.get_member()
+        self.assertEqual(member.last_read_message_id, messages[2].id)
+        self.assertEqual(member.unread_count, 0)
+
+    def test_own_messages_are_read(self) -> None:
+        """Sending a message reads everything before it."""
+        self.create_messages(2)
+        own: List[Message] = self.create_messages(1, owner=self.member)
+        member: ChatMember = self.get_member()
+        self.assertEqual(member.unread_count, 0)
+        self.assertEqual(member.last_read_message_id, own[0].id)
+
+    def test_bool_message_id(self) -> None:
+        """Boolean is not taken for a message id."""
+        self.create_messages(2)
+        response: DRF_Response = self.read(True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.get_member().last_read_message_id)
+
+    def test_batches_out_of_order(self) -> None:
+        """Older batch committed later keeps the newer preview and marks."""
+        # bulk_create() skips the signals, batches are added by hand
+        Message.objects.bulk_create(
+            [
+                Message(chat=self.chat, owner=self.member, content="own"),
+                Message(chat=self.chat, owner=self.owner, content="newer"),
+            ]
+        )
+        messages: List[Message] = list(
+            Message.objects.filter(chat=self.chat).order_by("id")
+        )
+        ChatMember.objects.add_messages(self.chat.id, messages[1:])
+        ChatMember.objects.add_messages(self.chat.id, messages[:1])
+
+        member: ChatMember = self.get_member()
+        self.assertEqual(member.last_message_id, messages[1].id)
+        self.assertEqual(member.last_message_preview, "newer")
+        self.assertEqual(member.last_read_message_id, messages[0].id)
+        self.assertEqual(member.unread_count, 1)
+
+    def test_deleted_message(self) -> None:
+        """Deleted message leaves the preview and the unread count."""
+        messages: List[Message] = self.create_messages(2)
+        messages[1].delete()
+        member: ChatMember = self.get_member()
+        self.assertEqual(member.unread_count, 1)
+        self.assertEqual(member.last_message_id, messages[0].id)
+        self.assertEqual(member.last_message_preview, messages[0].content)
+
+    def test_unknown_message(self) -> None:
+        """Read mark is not set to a message of no chat."""
+        self.create_messages(1)
+        response: DRF_Response = self.read(10 ** 6)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.get_member().last_read_message_id)
+
+
+class InboxTest(ChatTestCase):
+    """Chats of the user ordered by activity."""
+
+    def test_constant_queries(self) -> None:
+        """Inbox of many chats takes the same queries."""
+        def add() -> None:
+            chat: Chat = self.create_chat(f"inbox_{Chat.objects.count()}")
+            self.create_messages(2, chat=chat)
+
+        self.assertConstantQueries(
+            add,
+            lambda: self.client.get("/api/v1/chats/chats/inbox")
+        )
+
+
+class SearchMessagesTest(ChatTestCase):
+    """Full-text search of chat messages."""
+
+    def search(self, chat: Chat, query: str) -> List[int]:
+        """Get ids of chat messages found by the query."""
+        response: DRF_Response = self.client.get(
+            f"/api/v1/chats/chats/{chat.id}/search",
+            {"q": query}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [message["id"] for message in response.data["data"]]
+
+    def create_message(self, content: str, chat: Chat) -> Message:
+        """Create message and index it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(
+                chat=chat,
+                owner=self.owner,
+                content=content
+            )
+
+    def test_search_in_chat(self) -> None:
+        """Messages are found by words in their chat only."""
+        other: Chat = self.create_chat("other")
+        message: Message = self.create_message("Release tomorrow", self.chat)
+        self.create_message("Lunch today", self.chat)
+        self.create_message("Release today", other)
+
+        self.assertEqual(self.search(self.chat, "release"), [message.id])
+        self.assertEqual(self.search(self.chat, "tomorrow"), [message.id])
+        self.assertEqual(self.search(self.chat, "deploy"), [])
+
+    def test_edited_and_deleted_messages(self) -> None:
+        """Index follows edits and soft deletes."""
+        message: Message = self.create_message("Release", self.chat)
+        with self.captureOnCommitCallbacks(execute=True):
+            message.content = "Rollback"
+            message.save()
+        self.assertEqual(self.search(self.chat, "release"), [])
+        self.assertEqual(self.search(self.chat, "rollback"), [message.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message.delete()
+        self.assertEqual(self.search(self.chat, "rollback"), [])
+
+
+@override_settings(SEARCH_BACKEND="postings")
+class PostingsSearchMessagesTest(SearchMessagesTest):
+    """Search of chat messages kept in the postings table."""
+
+    def test_postings_are_used(self) -> None:
+        """Terms of the message are saved as postings."""
+        message: Message = self.create_message("Release", self.chat)
+        self.assertTrue(
+            SearchPosting.objects.filter(
+                index_name="chat_messages",
+                object_id=message.id,
+                term="release"
+            ).exists()
+        )
+
+
+@override_settings(
+    CHANNEL_LAYERS={
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    }
+)
+class ChatConsumerTest(ChatTestCase):
+    """Websocket of the chat members."""
+
+    def get_communicator(self, user: Any) -> WebsocketCommunicator:
+        """Get websocket of the user to the chat."""
+        communicator: WebsocketCommunicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns),
+            f"/ws/{self.chat.id}/"
+        )
+        communicator.scope["user"] = user
+        return communicator
+
+    def request(self, user: CustomUser, url: str) -> None:
+        """Send DELETE-request of the user and run on-commit events."""
+        client: APIClient = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response: DRF_Response = client.delete(url)
+        self.assertEqual(response.status_code, 200)
+
+    def get_close_code(self, user: Any) -> Optional[int]:
+        """Get close code of the rejected socket of the user."""
+        async def connect() -> Optional[int]:
+            communicator: WebsocketCommunicator = \
+                self.get_communicator(user)
+            connected: bool
+            code: Optional[int]
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            return code
+
+        return async_to_sync(connect)()
+
+    def get_code_after(self, url: str, user: CustomUser) -> int:
+        """Get close code of the member socket after the request."""
+        async def run() -> int:
+            communicator: WebsocketCommunicator = \
+                self.get_communicator(self.member)
+            connected: bool
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await database_sync_to_async(self.request)(user, url)
+            output: Dict[str, Any] = await communicator.receive_output()
+            self.assertEqual(output["type"], "websocket.close")
+            await communicator.wait()
+            return output["code"]
+
+        return async_to_sync(run)()
+
+    def test_anonymous_is_rejected(self) -> None:
+        """Socket without a user is closed on connect."""
+        self.assertEqual(
+            self.get_close_code(AnonymousUser()),
+            UNAUTHORIZED_CLOSE_CODE
+        )
+
+    def test_stranger_is_rejected(self) -> None:
+        """Socket of not a member is closed on connect."""
+        self.assertEqual(
+            self.get_close_code(create_user("stranger")),
+            FORBIDDEN_CLOSE_CODE
+        )
+
+    def test_left_member_is_closed(self) -> None:
+        """Socket is closed once the member leaves the chat."""
+        self.assertEqual(
+            self.get_code_after(
+                f"/api/v1/chats/chats/{self.chat.id}/leave",
+                self.member
+            ),
+            FORBIDDEN_CLOSE_CODE
+        )
+
+    def test_deleted_chat_is_closed(self) -> None:
+        """Sockets are closed once the chat is deleted."""
+        self.assertEqual(
+            self.get_code_after(
+                f"/api/v1/chats/chats/{self.chat.id}/drop",
+                self.owner
+            ),
+            GONE_CLOSE_CODE
+        )
@@ -0,0 +1,61 @@
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+)
+
+from asgiref.sync import async_to_sync
+from channels.layers import (
+    BaseChannelLayer,
+    get_channel_layer,
+)
+from django.db import transaction
+
+
+def get_chat_group_name(chat_id: int) -> str:
+    """Get name of the channel layer group of the chat."""
+    return 'chat_%s' % chat_id
+
+
+def notify_membership_changed(
+    chat_id: int,
+    added: Iterable[int] = (),
+    removed: Iterable[int] = ()
+) -> None:
+    """Send membership changes to the connected sockets of the chat.
+
+    The event is sent after the commit so sockets never see members
+    which were rolled back.
+    """
+    added = [user_id for user_id in added]
+    removed = [user_id for user_id in removed]
+    if not added and not removed:
+        return
+    send_chat_event_on_commit(
+        chat_id,
+        {
+            'type': 'chat_membership',
+            'added': added,
+            'removed': removed,
+        }
+    )
+
+
+def notify_chat_deleted(chat_id: int) -> None:
+    """Close the connected sockets of the deleted chat after the commit."""
+    send_chat_event_on_commit(chat_id, {'type': 'chat_deleted'})
+
+
+def send_chat_event_on_commit(chat_id: int, event: Dict[str, Any]) -> None:
+    """Send the event to the sockets of the chat after the commit."""
+    def send() -> None:
+        channel_layer: Optional[BaseChannelLayer] = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(
+            get_chat_group_name(chat_id),
+            event
+        )
+
+    transaction.on_commit(send)
@@ -3,12 +3,22 @@ from typing import (
     Optional,
     Tuple,
     Dict,
-    Set,
     List,
     Union,
 )
 
-from django.db.models import QuerySet
+from datetime import datetime
+
+from django.db.models import (
+    F,
+    Func,
+    Q,
+    QuerySet,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.text import slugify
 from django.http.request import QueryDict
 
@@ -29,25 +39,47 @@ from chats.models import (
     Message,
 )
 from chats.serializers import (
+    ChatInboxSerializer,
     ChatBaseModelSerializer,
     ChatListSerializer,
     ChatDetailSerializer,
     ChatUpdateSerializer,
     MessageBaseModelSerializer,
     MessageListSerializer,
+    MessageSyncSerializer,
 )
+from chats.search import MESSAGES_INDEX
+from chats.tools import (
+    notify_chat_deleted,
+    notify_membership_changed,
+)
+from chats.writer import get_message_writer
 from chats.permissions import (
     IsMemberOrAdmin,
     IsOwnerOrAdmin,
 )
 from abstracts.handlers import NoneDataHandler
-from abstracts.paginators import AbstractPageNumberPaginator
+from abstracts.search import SearchResult
+from abstracts.membership import (
+    MEMBER_ADDED,
+    MEMBER_REMOVED,
+    BulkMembershipService,
+)
+from abstracts.paginators import (
+    AbstractPageNumberPaginator,
+    AbstractCursorPaginator,
+    get_list_paginator,
+)
 from abstracts.mixins import (
     ModelInstanceMixin,
     DeletedRequestMixin,
 )
 
 
+MESSAGES_SYNC_LIMIT = 200
+MESSAGES_SEARCH_LIMIT = 50
+
+
 class ChatViewSet(
     ModelInstanceMixin,
     NoneDataHandler,
@@ -115,6 +147,31 @@ class ChatViewSet(
         )
         return response
 
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="inbox"
+    )
+    def get_inbox(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to see user chats ordered by activity."""
+        chat_members: QuerySet[ChatMember] = ChatMember.objects.filter(
+            user_id=request.user.id,
+            chat__datetime_deleted__isnull=True
+        ).select_related("chat").order_by("-last_activity")
+        response: DRF_Response = self.get_drf_response(
+            request=request,
+            data=chat_members,
+            serializer_class=ChatInboxSerializer,
+            many=True,
+            paginator=AbstractCursorPaginator()
+        )
+        return response
+
     @action(
         methods=["get"],
         detail=True,
@@ -279,7 +336,7 @@ class ChatViewSet(
         """POST-request for friends adding to the chat."""
         chat: Optional[Chat] = self.get_queryset_instance_by_id(
             class_name=Chat,
-            queryset=self.get_queryset().prefetch_related("chatmember_set"),
+            queryset=self.get_queryset(),
             pk=pk
         )
         response: Optional[DRF_Response] = self.get_none_response(
@@ -295,7 +352,6 @@ class ChatViewSet(
             obj=chat
         )
 
-        chat_members_id: QuerySet = chat.members.values_list("id", flat=True)
         required_members: Optional[List[int]] = request.data.get(
             "members", None
         )
@@ -307,39 +363,39 @@ class ChatViewSet(
         if response:
             return response
 
-        member_difference: Set[int] = (
-            set(required_members) - set(chat_members_id)
-        )
-        resulted_members: QuerySet = CustomUser.objects.get_not_deleted().\
-            filter(id__in=member_difference).values_list(
+        report: Dict[Any, str] = BulkMembershipService(
+            instance=chat,
+            field_name="members",
+            user_queryset=CustomUser.objects.get_not_deleted().only(
                 "id",
                 "username"
+            ),
+            row_factory=lambda user: ChatMember(
+                chat_id=chat.id,
+                user_id=user.id,
+                chat_name=user.username
             )
+        ).add(user_ids=required_members)
+        notify_membership_changed(
+            chat_id=chat.id,
+            added=[
+                user_id for user_id, state in report.items()
+                if state == MEMBER_ADDED
+            ]
+        )
 
-        added_people: List[ChatMember] = []
-
-        resulted_members_number: int = resulted_members.count()
-        i: int
-        for i in range(resulted_members_number):
-            added_people.append(
-                ChatMember(
-                    chat_id=chat.id,
-                    user_id=resulted_members[i][0],
-                    chat_name=resulted_members[i][1]
-                )
-            )
-        ChatMember.objects.bulk_create(added_people)
-
-        if resulted_members_number > 0:
+        if BulkMembershipService.has_changes(report):
             return DRF_Response(
                 data={
-                    "response": "Все возможные пользователи добавлены"
+                    "response": "Все возможные пользователи добавлены",
+                    "report": report
                 },
                 status=status.HTTP_200_OK
             )
         return DRF_Response(
             data={
-                "response": "Никто из данных пользователей не добавлен"
+                "response": "Никто из данных пользователей не добавлен",
+                "report": report
             },
             status=status.HTTP_400_BAD_REQUEST
         )
@@ -362,7 +418,7 @@ class ChatViewSet(
         """POST-request to remove friends from chat by id."""
         chat: Optional[Chat] = self.get_queryset_instance_by_id(
             class_name=Chat,
-            queryset=self.get_queryset().prefetch_related("chatmember_set"),
+            queryset=self.get_queryset(),
             pk=pk
         )
         response: Optional[DRF_Response] = self.get_none_response(
@@ -389,14 +445,22 @@ class ChatViewSet(
         if response:
             return response
 
-        ChatMember.objects.filter(
+        report: Dict[Any, str] = BulkMembershipService(
+            instance=chat,
+            field_name="members"
+        ).remove(user_ids=required_members)
+        notify_membership_changed(
             chat_id=chat.id,
-            user_id__in=required_members
-        ).delete()
+            removed=[
+                user_id for user_id, state in report.items()
+                if state == MEMBER_REMOVED
+            ]
+        )
 
         response = DRF_Response(
             data={
-                "response": "Все возможные пользователи удалены!"
+                "response": "Все возможные пользователи удалены!",
+                "report": report
             },
             status=status.HTTP_200_OK
         )
@@ -438,6 +502,7 @@ class ChatViewSet(
             )
             chat_name: str = chat.name
             chat.delete()
+            notify_chat_deleted(chat.id)
             response = DRF_Response(
                 data={
                     "response": f"Чат {chat_name} успешно удалён"
@@ -483,6 +548,10 @@ class ChatViewSet(
                 chat_id=chat.id,
                 user_id=request.user.id
             ).delete()
+            notify_membership_changed(
+                chat_id=chat.id,
+                removed=[request.user.id]
+            )
             response = DRF_Response(
                 data={
                     "response": "Вы успешно покинули чат",
@@ -599,10 +668,323 @@ class ChatViewSet(
                 data=messages,
                 serializer_class=MessageListSerializer,
                 many=True,
-                paginator=self.pagination_class()
+                paginator=get_list_paginator(
+                    request,
+                    self.pagination_class
+                )
             )
         return response
 
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path="read"
+    )
+    def read_messages(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to mark chat messages as read.
+
+        Messages up to message_id (the last message by default) are read.
+        """
+        chat_member: Optional[ChatMember] = ChatMember.objects.filter(
+            chat_id=pk,
+            user_id=request.user.id,
+            chat__datetime_deleted__isnull=True
+        ).first()
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=chat_member,
+            message=f"Чат с PK {pk} не найден или вы не являетесь его членом",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+
+        message_id: Optional[int] = request.data.get(
+            "message_id",
+            chat_member.last_message_id
+        )
+        if message_id is not None and (
+            not isinstance(message_id, int) or isinstance(message_id, bool)
+        ):
+            return DRF_Response(
+                data={
+                    "response": "Поле 'message_id' должно быть числом"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if message_id is None or (
+            chat_member.last_read_message_id and
+            message_id <= chat_member.last_read_message_id
+        ):
+            return DRF_Response(
+                data={
+                    "last_read_message": chat_member.last_read_message_id,
+                    "unread_count": chat_member.unread_count,
+                },
+                status=status.HTTP_200_OK
+            )
+
+        if not Message.objects.filter(chat_id=pk, id=message_id).exists():
+            return DRF_Response(
+                data={
+                    "response": f"Сообщение с PK {message_id} не найдено"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Concurrent reads never move the mark back, the counter is taken
+        # by the same statement
+        unread_messages: QuerySet[Message] = Message.objects\
+            .get_not_deleted()\
+            .filter(chat_id=pk, id__gt=message_id)\
+            .exclude(owner_id=request.user.id)\
+            .order_by()\
+            .annotate(number=Func(F("id"), function="COUNT"))\
+            .values("number")
+        ChatMember.objects.filter(
+            Q(last_read_message_id__isnull=True) |
+            Q(last_read_message_id__lt=message_id),
+            id=chat_member.id
+        ).update(
+            last_read_message_id=message_id,
+            unread_count=Subquery(unread_messages)
+        )
+        state: Dict[str, Any] = ChatMember.objects\
+            .filter(id=chat_member.id)\
+            .values("last_read_message_id", "unread_count")\
+            .get()
+        return DRF_Response(
+            data={
+                "last_read_message": state["last_read_message_id"],
+                "unread_count": state["unread_count"],
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path="search",
+        permission_classes=(
+            IsMemberOrAdmin,
+        )
+    )
+    def search_messages(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to find chat messages by words of q."""
+        chat: Optional[Chat] = self.get_queryset_instance_by_id(
+            class_name=Chat,
+            queryset=self.get_queryset(),
+            pk=pk
+        )
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=chat,
+            message=f"Чат с PK {pk} не найден или был удален",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+        self.check_object_permissions(
+            request=request,
+            obj=chat
+        )
+
+        query: str = request.query_params.get("q", "").strip()
+        if not query:
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить 'q'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit: int = min(
+                int(request.query_params.get("limit", MESSAGES_SEARCH_LIMIT)),
+                MESSAGES_SEARCH_LIMIT
+            )
+        except ValueError:
+            limit = MESSAGES_SEARCH_LIMIT
+
+        results: List[SearchResult] = MESSAGES_INDEX.search(
+            query=query,
+            group_ids=[chat.id],
+            limit=limit
+        )
+        messages: Dict[int, Message] = Message.objects.get_not_deleted()\
+            .filter(
+                chat_id=chat.id,
+                id__in=[result.object_id for result in results]
+            )\
+            .select_related("owner")\
+            .in_bulk()
+        found_messages: List[Message] = [
+            messages[result.object_id] for result in results
+            if result.object_id in messages
+        ]
+        return DRF_Response(
+            data={
+                "data": MessageListSerializer(
+                    found_messages,
+                    many=True
+                ).data
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path="sync",
+        permission_classes=(
+            IsMemberOrAdmin,
+        )
+    )
+    def sync_messages(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to get history changes since the client state.
+
+        after_id is the last message known to the client, since and
+        since_id are the cursor of the previous sync. The response contains
+        new messages, edits and soft deletes and the cursor for the next
+        sync. Edits and deletes are one stream ordered by the time of the
+        change and the id, so a page never ends between equal times.
+        """
+        chat: Optional[Chat] = self.get_queryset_instance_by_id(
+            class_name=Chat,
+            queryset=self.get_queryset(),
+            pk=pk
+        )
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=chat,
+            message=f"Чат с PK {pk} не найден или был удален",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+        self.check_object_permissions(
+            request=request,
+            obj=chat
+        )
+
+        after_id: Optional[int] = None
+        since: Optional[datetime] = None
+        since_id: Optional[int] = None
+        try:
+            if request.query_params.get("after_id", None):
+                after_id = int(request.query_params["after_id"])
+            if request.query_params.get("since", None):
+                since = parse_datetime(request.query_params["since"])
+                if not since:
+                    raise ValueError
+            if request.query_params.get("since_id", None):
+                since_id = int(request.query_params["since_id"])
+        except ValueError:
+            return DRF_Response(
+                data={
+                    "response": "Неверный формат 'after_id', 'since' \
+или 'since_id'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if after_id is None and since is None:
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить 'after_id' или 'since'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if since and timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        # Taken before the queries, so nothing committed later is skipped
+        cursor_since: datetime = timezone.now()
+        messages: QuerySet[Message] = Message.objects.filter(chat_id=chat.id)
+
+        created_messages: QuerySet[Message] = messages.get_not_deleted()
+        if after_id is not None:
+            created_messages = created_messages.filter(id__gt=after_id)
+        else:
+            created_messages = created_messages.filter(
+                datetime_created__gt=since
+            )
+        created: List[Message] = list(
+            created_messages.order_by("id")[:MESSAGES_SYNC_LIMIT + 1]
+        )
+        has_more: bool = len(created) > MESSAGES_SYNC_LIMIT
+        created = created[:MESSAGES_SYNC_LIMIT]
+
+        updated: List[Message] = []
+        deleted: List[int] = []
+        cursor_since_id: Optional[int] = None
+        if since:
+            known_messages: QuerySet[Message] = messages.filter(
+                id__lte=after_id
+            ) if after_id is not None else messages.filter(
+                datetime_created__lte=since
+            )
+            # Soft delete keeps datetime_updated, its change time is
+            # datetime_deleted
+            known_messages = known_messages.annotate(
+                datetime_changed=Coalesce(
+                    "datetime_deleted",
+                    "datetime_updated"
+                )
+            )
+            changes: QuerySet[Message] = known_messages.filter(
+                datetime_changed__gt=since
+            ) if since_id is None else known_messages.filter(
+                Q(datetime_changed__gt=since) |
+                Q(datetime_changed=since, id__gt=since_id)
+            )
+            changed: List[Message] = list(
+                changes.order_by("datetime_changed", "id")
+                [:MESSAGES_SYNC_LIMIT + 1]
+            )
+            if len(changed) > MESSAGES_SYNC_LIMIT:
+                has_more = True
+                changed = changed[:MESSAGES_SYNC_LIMIT]
+                cursor_since = changed[-1].datetime_changed
+                cursor_since_id = changed[-1].id
+            message: Message
+            for message in changed:
+                if message.datetime_deleted:
+                    deleted.append(message.id)
+                else:
+                    updated.append(message)
+
+        last_id: Optional[int] = created[-1].id if created else after_id
+        return DRF_Response(
+            data={
+                "created": MessageSyncSerializer(created, many=True).data,
+                "updated": MessageSyncSerializer(updated, many=True).data,
+                "deleted": deleted,
+                "has_more": has_more,
+                "cursor": {
+                    "after_id": last_id,
+                    "since": cursor_since.isoformat().replace(
+                        "+00:00", "Z"
+                    ),
+                    "since_id": cursor_since_id,
+                },
+            },
+            status=status.HTTP_200_OK
+        )
+
 
 class MessageViewSet(
     ModelInstanceMixin,
@@ -625,6 +1007,28 @@ class MessageViewSet(
         """Get not-deleted messages."""
         return self.queryset.get_not_deleted()
 
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="writer_metrics",
+        permission_classes=(
+            IsAdminUser,
+        )
+    )
+    def get_writer_metrics(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to get metrics of websocket message writer."""
+        return DRF_Response(
+            data={
+                "data": get_message_writer().get_metrics()
+            },
+            status=status.HTTP_200_OK
+        )
+
     def retrieve_chat(
         self,
         request: DRF_Request,
@@ -676,10 +1080,15 @@ class MessageViewSet(
             )
             response = self.get_drf_response(
                 request=request,
-                data=self.get_queryset().filter(chat=chat),
+                data=self.get_queryset()
+                .filter(chat=chat)
+                .select_related("owner"),
                 serializer_class=MessageListSerializer,
                 many=True,
-                paginator=self.pagination_class()
+                paginator=get_list_paginator(
+                    request,
+                    self.pagination_class
+                )
             )
         return response
 
@@ -0,0 +1,247 @@
+"""Write-behind pipeline of chat messages received by websockets."""
+import asyncio
+from logging import (
+    getLogger,
+    Logger,
+)
+from time import monotonic
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    transaction,
+)
+from django.dispatch import Signal
+
+from chats.models import Message
+
+
+logger: Logger = getLogger(__name__)
+
+# Sent after every flush with messages=[Message, ...] in arrival order
+messages_flushed: Signal = Signal()
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+class MessageWriter:
+    """Buffer of incoming messages flushed with one bulk_create.
+
+    The buffer is flushed when it reaches MAX_BATCH_SIZE messages or
+    FLUSH_INTERVAL seconds after the first buffered message. Flushes are
+    serialized and messages are inserted in arrival order, so ids grow
+    in the order the messages came in every chat. write() returns only
+    when the message is saved.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ) -> None:
+        """Initialize parameters."""
+        self.max_batch_size: int = max_batch_size
+        self.flush_interval: float = flush_interval
+        self.buffer: List[Tuple[Message, asyncio.Future]] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: set = set()
+
+        self.flushed_batches: int = 0
+        self.flushed_messages: int = 0
+        self.failed_messages: int = 0
+        self.max_queue_depth: int = 0
+        self.last_flush_latency: float = 0.0
+        self.max_flush_latency: float = 0.0
+        self.total_flush_latency: float = 0.0
+
+    def __bind_loop(self) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Futures and locks are bound to the loop they were made in
+            self.loop = loop
+            self.lock = asyncio.Lock()
+            self.buffer = []
+            self.timer = None
+
+    def __schedule_flush(self) -> None:
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        task: asyncio.Task = self.loop.create_task(self.flush())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def write(
+        self,
+        chat_id: int,
+        owner_id: int,
+        content: str
+    ) -> Message:
+        """Buffer message and wait until it is saved."""
+        self.__bind_loop()
+        future: asyncio.Future = self.loop.create_future()
+        self.buffer.append(
+            (
+                Message(
+                    chat_id=chat_id,
+                    owner_id=owner_id,
+                    content=content
+                ),
+                future
+            )
+        )
+        self.max_queue_depth = max(self.max_queue_depth, len(self.buffer))
+
+        if len(self.buffer) >= self.max_batch_size:
+            self.__schedule_flush()
+        elif not self.timer:
+            self.timer = self.loop.call_later(
+                self.flush_interval,
+                self.__schedule_flush
+            )
+        return await future
+
+    async def flush(self) -> None:
+        """Save all buffered messages."""
+        self.__bind_loop()
+        async with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            batch: List[Tuple[Message, asyncio.Future]] = self.buffer
+            self.buffer = []
+            if not batch:
+                return
+
+            messages: List[Message] = [message for message, _ in batch]
+            started: float = monotonic()
+            errors: List[Optional[Exception]]
+            try:
+                errors = await database_sync_to_async(self.save_messages)(
+                    messages
+                )
+            except Exception as exc:
+                errors = [exc] * len(batch)
+                logger.exception(
+                    "Flush of %d chat messages failed", len(batch)
+                )
+
+            latency: float = monotonic() - started
+            failed: int = len(errors) - errors.count(None)
+            self.failed_messages += failed
+            if failed < len(batch):
+                self.flushed_batches += 1
+                self.flushed_messages += len(batch) - failed
+                self.last_flush_latency = latency
+                self.total_flush_latency += latency
+                self.max_flush_latency = max(
+                    self.max_flush_latency,
+                    latency
+                )
+            logger.debug(
+                "Flushed %d of %d chat messages in %.4f s",
+                len(batch) - failed,
+                len(batch),
+                latency
+            )
+
+            message: Message
+            future: asyncio.Future
+            error: Optional[Exception]
+            for (message, future), error in zip(batch, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(message)
+                else:
+                    future.set_exception(error)
+
+    def save_messages(
+        self,
+        messages: List[Message]
+    ) -> List[Optional[Exception]]:
+        """Insert messages and notify receivers of the saved ones.
+
+        The batch is inserted in one query. If it fails the messages are
+        inserted one by one, so only the broken ones are not saved. Get
+        the error of every message, None if it is saved.
+        """
+        errors: List[Optional[Exception]] = [None] * len(messages)
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create(
+                    messages,
+                    batch_size=self.max_batch_size
+                )
+        except DatabaseError:
+            logger.warning(
+                "Batch of %d chat messages failed, saving them one by one",
+                len(messages)
+            )
+            i: int
+            message: Message
+            for i, message in enumerate(messages):
+                message.pk = None
+                message._state.adding = True
+                try:
+                    with transaction.atomic():
+                        Message.objects.bulk_create([message])
+                except DatabaseError as exc:
+                    logger.exception("Chat message was not saved")
+                    errors[i] = exc
+        saved: List[Message] = [
+            message
+            for message, error in zip(messages, errors)
+            if error is None
+        ]
+        if saved:
+            messages_flushed.send(sender=Message, messages=saved)
+        return errors
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and flush latency metrics."""
+        return {
+            "queue_depth": len(self.buffer),
+            "max_queue_depth": self.max_queue_depth,
+            "flushed_batches": self.flushed_batches,
+            "flushed_messages": self.flushed_messages,
+            "failed_messages": self.failed_messages,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+            "avg_flush_latency": (
+                self.total_flush_latency / self.flushed_batches
+                if self.flushed_batches else 0.0
+            ),
+        }
+
+
+_writer: Optional[MessageWriter] = None
+
+
+def get_message_writer() -> MessageWriter:
+    """Get message writer of the process configured by settings."""
+    global _writer
+    if _writer is None:
+        config: Dict[str, Any] = getattr(
+            settings, "CHAT_MESSAGE_WRITER", {}
+        )
+        _writer = MessageWriter(
+            max_batch_size=config.get(
+                "MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE
+            ),
+            flush_interval=config.get(
+                "FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL
+            )
+        )
+    return _writer
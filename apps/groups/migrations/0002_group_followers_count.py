@@ -0,0 +1,44 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:34
+
+import abstracts.counters
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_followers_count(apps, schema_editor):
+    group_model = apps.get_model('groups', 'Group')
+    through_model = group_model._meta.get_field(
+        'followers'
+    ).remote_field.through
+    group_model.objects.update(
+        followers_count=Coalesce(
+            Subquery(
+                through_model.objects.filter(
+                    group_id=OuterRef('pk')
+                ).order_by().values('group_id').annotate(
+                    number=Count('pk')
+                ).values('number')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='followers_count',
+            field=abstracts.counters.CounterField(default=0, editable=False, source='followers', verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(
+            fill_followers_count,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.utils.text import slugify
 
 from abstracts.models import AbstractDateTime
+from abstracts.counters import CounterField
 from auths.models import CustomUser
 
 
@@ -25,6 +26,10 @@ class Group(AbstractDateTime):  # noqa
         related_name="followed_groups",
         verbose_name="Подписчики"
     )
+    followers_count = CounterField(
+        source="followers",
+        verbose_name="Количество подписчиков"
+    )
     members_rights = models.ManyToManyField(
         to=CustomUser,
         through="GroupAdministration",
@@ -36,6 +36,7 @@ class GroupBaseSerializer(ModelSerializer):
             "slug",
             "datetime_created",
             "is_deleted",
+            "followers_count",
         )
 
     def get_is_deleted(self, obj: Group) -> bool:
@@ -58,6 +59,7 @@ class GroupDetailSerializer(GroupBaseSerializer):
             "slug",
             "datetime_created",
             "is_deleted",
+            "followers_count",
             "followers",
             "members_rights",
         )
@@ -4,7 +4,6 @@ from typing import (
     Any,
     Dict,
     List,
-    Set,
 )
 
 from django.db.models import QuerySet
@@ -28,7 +27,7 @@ from abstracts.handlers import (
     NoneDataHandler,
 )
 from abstracts.paginators import AbstractPageNumberPaginator
-from auths.models import CustomUser
+from abstracts.membership import BulkMembershipService
 
 
 class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
@@ -193,10 +192,6 @@ class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
         if response:
             return response
 
-        group_followers_id: QuerySet = group.followers.values_list(
-            "id",
-            flat=True
-        )
         required_followers: Optional[List[int]] = request.data.get(
             "members", None
         )
@@ -208,15 +203,12 @@ class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
         if response:
             return response
 
-        member_difference: Set[int] = (
-            set(required_followers) - set(group_followers_id)
-        )
-        resulted_members: QuerySet = CustomUser.objects.get_not_deleted().\
-            filter(id__in=member_difference)
-
-        i: int
-        for i in range(resulted_members.count()):
-            group.followers.add(resulted_members[i])
+        report: Dict[Any, str] = BulkMembershipService(
+            instance=group,
+            field_name="followers"
+        ).add(user_ids=required_followers)
+        # Followers and their counter were changed past the prefetch
+        group = self.get_instance(pk=pk)
 
         response = self.get_drf_response(
             request=request,
@@ -224,6 +216,7 @@ class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
             serializer_class=GroupDetailSerializer,
             many=False
         )
+        response.data["report"] = report
         return response
 
     @action(
@@ -259,13 +252,11 @@ class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
         if response:
             return response
 
-        found_people: QuerySet[CustomUser] = group.followers.filter(
-            id__in=required_followers
-        )
-
-        i: int
-        for i in range(found_people.count()):
-            group.followers.remove(found_people[i])
+        report: Dict[Any, str] = BulkMembershipService(
+            instance=group,
+            field_name="followers"
+        ).remove(user_ids=required_followers)
+        group = self.get_instance(pk=pk)
 
         response = self.get_drf_response(
             request=request,
@@ -273,5 +264,6 @@ class GroupViewSet(NoneDataHandler, DRFResponseHandler, ViewSet):
             serializer_class=GroupDetailSerializer,
             many=False
         )
+        response.data["report"] = report
 
         return response
@@ -5,3 +5,6 @@ class MusicConfig(AppConfig):  # noqa
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'music'
     verbose_name: str = "Музыка"
+
+    def ready(self) -> None:  # noqa
+        import music.signals  # noqa
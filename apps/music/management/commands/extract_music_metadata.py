@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+from django.db.models import QuerySet
+
+from music.metadata import extract_metadata
+from music.models import Music
+
+
+class Command(BaseCommand):
+    """Store metadata of uploaded songs."""
+
+    help = 'Extract metadata of songs uploaded before the pipeline.'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Extract metadata of all songs'
+        )
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle metadata extraction."""
+        start: datetime = datetime.now()
+
+        music_ids: QuerySet = Music.objects.values_list('id', flat=True)
+        if not kwargs['all']:
+            music_ids = music_ids.filter(content_hash='')
+        number: int = sum(
+            extract_metadata(music_id) for music_id in list(music_ids)
+        )
+        print(f"Обработано {number} песен")
+
+        print(
+            'Извлечение метаданных составило: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
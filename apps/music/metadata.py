@@ -0,0 +1,285 @@
+"""Audio metadata of uploaded songs.
+
+Files are parsed as streams: only the ID3v2 tag, the first MPEG frames
+and the ID3v1 tag are read for the audio properties, the content hash is
+computed chunk by chunk.
+"""
+from hashlib import sha256
+from typing import (
+    IO,
+    Any,
+    Dict,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from abstracts.workers import get_worker
+from music.models import Music
+
+
+MUSIC_WORKER_NAME = "music"
+HASH_CHUNK_SIZE = 64 * 1024
+FRAME_SEARCH_SIZE = 64 * 1024
+ID3_TEXT_MAX_SIZE = 256 * 1024
+ID3V1_SIZE = 128
+
+# (version, layer) -> bitrates in kbit/s by the bitrate index
+BITRATES: Dict[Tuple[int, int], Tuple[int, ...]] = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384,
+             416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320,
+             384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256,
+             320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224,
+             256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Version bits of the frame header -> (version, sample rates)
+SAMPLE_RATES: Dict[int, Tuple[float, Tuple[int, int, int]]] = {
+    0b11: (1, (44100, 48000, 32000)),
+    0b10: (2, (22050, 24000, 16000)),
+    0b00: (2.5, (11025, 12000, 8000)),
+}
+ID3_TITLE_FRAMES = ("TIT2", "TT2")
+ID3_ARTIST_FRAMES = ("TPE1", "TP1")
+ID3_ENCODINGS = ("latin-1", "utf-16", "utf-16-be", "utf-8")
+
+
+class FrameHeader(NamedTuple):
+    """Properties of one MPEG audio frame."""
+
+    version: float
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    samples: int
+    length: int
+
+
+class AudioMetadata(NamedTuple):
+    """Metadata stored in Music columns."""
+
+    duration: Optional[float]
+    bitrate: Optional[int]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    tag_title: str
+    tag_artist: str
+    content_hash: str
+
+
+def parse_frame_header(data: bytes) -> Optional[FrameHeader]:
+    """Get frame properties of 4 header bytes, None if it is no header."""
+    if len(data) < 4 or data[0] != 0xFF or data[1] & 0xE0 != 0xE0:
+        return None
+    version_bits: int = (data[1] >> 3) & 0b11
+    layer: int = 4 - ((data[1] >> 1) & 0b11)
+    bitrate_index: int = data[2] >> 4
+    sample_rate_index: int = (data[2] >> 2) & 0b11
+    if version_bits not in SAMPLE_RATES or layer == 4 or \
+            bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version: float
+    sample_rates: Tuple[int, int, int]
+    version, sample_rates = SAMPLE_RATES[version_bits]
+    bitrate: int = BITRATES[(min(int(version), 2), layer)][bitrate_index]
+    sample_rate: int = sample_rates[sample_rate_index]
+    padding: int = (data[2] >> 1) & 1
+    samples: int = 384 if layer == 1 else \
+        576 if layer == 3 and version != 1 else 1152
+    length: int = (12 * bitrate * 1000 // sample_rate + padding) * 4 \
+        if layer == 1 else \
+        samples // 8 * bitrate * 1000 // sample_rate + padding
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        channels=1 if data[3] >> 6 == 0b11 else 2,
+        samples=samples,
+        length=length
+    )
+
+
+def get_syncsafe_int(data: bytes) -> int:
+    """Get integer of 7 bit bytes used by ID3v2 sizes."""
+    number: int = 0
+    byte: int
+    for byte in data:
+        number = (number << 7) | (byte & 0x7F)
+    return number
+
+
+def decode_id3_text(data: bytes) -> str:
+    """Get string of ID3 text frame content."""
+    if not data or data[0] >= len(ID3_ENCODINGS):
+        return ""
+    return data[1:].decode(ID3_ENCODINGS[data[0]], errors="ignore")\
+        .split("\x00")[0].strip()
+
+
+def parse_id3v2_frames(tag: bytes, major: int) -> Dict[str, str]:
+    """Get title and artist text frames of ID3v2 tag body."""
+    texts: Dict[str, str] = {}
+    id_size: int = 3 if major == 2 else 4
+    header_size: int = 6 if major == 2 else 10
+    i: int = 0
+    while i + header_size <= len(tag) and tag[i] != 0:
+        frame_id: str = tag[i:i + id_size].decode("latin-1")
+        size_bytes: bytes = tag[i + id_size:i + id_size * 2]
+        size: int = get_syncsafe_int(size_bytes) if major == 4 else \
+            int.from_bytes(size_bytes, "big")
+        body: bytes = tag[i + header_size:i + header_size + size]
+        if frame_id in ID3_TITLE_FRAMES:
+            texts["title"] = decode_id3_text(body)
+        elif frame_id in ID3_ARTIST_FRAMES:
+            texts["artist"] = decode_id3_text(body)
+        i += header_size + size
+    return texts
+
+
+def read_id3v2(file: IO) -> Tuple[int, Dict[str, str]]:
+    """Get size of ID3v2 tag at the start of the file and its texts."""
+    header: bytes = file.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0, {}
+    size: int = get_syncsafe_int(header[6:10]) + 10
+    if header[5] & 0x10:
+        size += 10  # Footer
+    texts: Dict[str, str] = {}
+    # Unsynchronised tags and huge tags (covers) are skipped unparsed
+    if not header[5] & 0x80 and size <= ID3_TEXT_MAX_SIZE:
+        texts = parse_id3v2_frames(file.read(size - 10), header[3])
+    return size, texts
+
+
+def read_id3v1(file: IO, file_size: int) -> Dict[str, str]:
+    """Get texts of ID3v1 tag at the end of the file."""
+    if file_size < ID3V1_SIZE:
+        return {}
+    file.seek(file_size - ID3V1_SIZE)
+    tag: bytes = file.read(ID3V1_SIZE)
+    if tag[:3] != b"TAG":
+        return {}
+    return {
+        "title": tag[3:33].decode("latin-1").split("\x00")[0].strip(),
+        "artist": tag[33:63].decode("latin-1").split("\x00")[0].strip(),
+    }
+
+
+def find_first_frame(
+    file: IO,
+    offset: int
+) -> Tuple[int, Optional[FrameHeader], bytes]:
+    """Get offset, header and bytes of the first frame after offset.
+
+    A sync word is taken as a frame only if the next frame follows it.
+    """
+    file.seek(offset)
+    data: bytes = file.read(FRAME_SEARCH_SIZE)
+    i: int = data.find(b"\xFF")
+    while 0 <= i < len(data) - 4:
+        frame: Optional[FrameHeader] = parse_frame_header(data[i:i + 4])
+        if frame and (
+            i + frame.length + 4 > len(data) or
+            parse_frame_header(data[i + frame.length:i + frame.length + 4])
+        ):
+            return offset + i, frame, data[i:i + frame.length]
+        i = data.find(b"\xFF", i + 1)
+    return offset, None, b""
+
+
+def get_vbr_frames(frame: FrameHeader, data: bytes) -> Optional[int]:
+    """Get number of frames from Xing/Info or VBRI header of the frame."""
+    side_info: int = (32 if frame.channels == 2 else 17) \
+        if frame.version == 1 else (17 if frame.channels == 2 else 9)
+    xing: bytes = data[4 + side_info:4 + side_info + 12]
+    if len(xing) == 12 and xing[:4] in (b"Xing", b"Info") and xing[7] & 1:
+        return int.from_bytes(xing[8:12], "big") or None
+    vbri: bytes = data[36:54]
+    if len(vbri) == 18 and vbri[:4] == b"VBRI":
+        return int.from_bytes(vbri[14:18], "big") or None
+    return None
+
+
+def get_content_hash(file: IO) -> str:
+    """Get SHA-256 of the file read by chunks."""
+    file.seek(0)
+    content_hash = sha256()
+    chunk: bytes = file.read(HASH_CHUNK_SIZE)
+    while chunk:
+        content_hash.update(chunk)
+        chunk = file.read(HASH_CHUNK_SIZE)
+    return content_hash.hexdigest()
+
+
+def read_metadata(file: IO, file_size: int) -> AudioMetadata:
+    """Get metadata of MP3 file, unknown properties are None."""
+    file.seek(0)
+    tag_size: int
+    texts: Dict[str, str]
+    tag_size, texts = read_id3v2(file)
+    id3v1: Dict[str, str] = read_id3v1(file, file_size)
+    audio_size: int = file_size - tag_size - \
+        (ID3V1_SIZE if id3v1 else 0)
+
+    offset: int
+    frame: Optional[FrameHeader]
+    data: bytes
+    offset, frame, data = find_first_frame(file, tag_size)
+    duration: Optional[float] = None
+    bitrate: Optional[int] = None
+    if frame:
+        audio_size -= offset - tag_size
+        frames: Optional[int] = get_vbr_frames(frame, data)
+        if frames:
+            duration = frames * frame.samples / frame.sample_rate
+            bitrate = round(audio_size * 8 / duration / 1000) \
+                if duration else frame.bitrate
+        else:
+            bitrate = frame.bitrate
+            duration = audio_size * 8 / (bitrate * 1000)
+
+    max_length: int = Music.MUSIC_MAX_TAG_LEN
+    return AudioMetadata(
+        duration=round(duration, 3) if duration is not None else None,
+        bitrate=bitrate,
+        sample_rate=frame.sample_rate if frame else None,
+        channels=frame.channels if frame else None,
+        tag_title=(
+            texts.get("title") or id3v1.get("title", "")
+        )[:max_length],
+        tag_artist=(
+            texts.get("artist") or id3v1.get("artist", "")
+        )[:max_length],
+        content_hash=get_content_hash(file)
+    )
+
+
+def extract_metadata(music_id: int) -> bool:
+    """Store metadata of the song file, get whether it is stored."""
+    music: Optional[Music] = Music.objects.filter(id=music_id)\
+        .only("id", "music")\
+        .first()
+    if not music or not music.music:
+        return False
+    try:
+        with music.music.open("rb") as file:
+            metadata: AudioMetadata = read_metadata(file, music.music.size)
+    except OSError:
+        return False
+    fields: Dict[str, Any] = metadata._asdict()
+    return bool(Music.objects.filter(id=music_id).update(**fields))
+
+
+def extract_metadata_on_commit(music_id: int) -> None:
+    """Store metadata by the background worker after the commit."""
+    get_worker(MUSIC_WORKER_NAME).submit_on_commit(
+        extract_metadata,
+        music_id
+    )
@@ -0,0 +1,44 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:34
+
+import abstracts.counters
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_listeners_count(apps, schema_editor):
+    playlist_model = apps.get_model('music', 'Playlist')
+    through_model = playlist_model._meta.get_field(
+        'listeners'
+    ).remote_field.through
+    playlist_model.objects.update(
+        listeners_count=Coalesce(
+            Subquery(
+                through_model.objects.filter(
+                    playlist_id=OuterRef('pk')
+                ).order_by().values('playlist_id').annotate(
+                    number=Count('pk')
+                ).values('number')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='listeners_count',
+            field=abstracts.counters.CounterField(default=0, editable=False, source='listeners', verbose_name='Количество слушателей'),
+        ),
+        migrations.RunPython(
+            fill_listeners_count,
+            migrations.RunPython.noop
+        ),
+    ]
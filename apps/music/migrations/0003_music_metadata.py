@@ -0,0 +1,48 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0002_playlist_listeners_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='music',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Битрейт в кбит/с'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Количество каналов'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='SHA-256 файла'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Длительность в секундах'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Частота дискретизации'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='tag_artist',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Исполнитель из тегов'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='tag_title',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Название из тегов'),
+        ),
+    ]
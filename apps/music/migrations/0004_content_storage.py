@@ -0,0 +1,24 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:03
+
+import abstracts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0003_music_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='music',
+            name='music',
+            field=models.FileField(storage=abstracts.storage.ContentAddressedStorage(), upload_to='documents/songs/%Y/%m/%d', verbose_name='Файл песни'),
+        ),
+        migrations.AlterField(
+            model_name='playlist',
+            name='photo',
+            field=models.ImageField(blank=True, storage=abstracts.storage.ContentAddressedStorage(), upload_to='photos/playlists/%Y/%m/%d', verbose_name='Фото плэйлиста'),
+        ),
+    ]
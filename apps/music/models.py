@@ -2,6 +2,8 @@ from django.db import models
 from django.utils.text import slugify
 
 from abstracts.models import AbstractDateTime
+from abstracts.counters import CounterField
+from abstracts.storage import content_storage
 from auths.models import CustomUser
 
 
@@ -13,6 +15,7 @@ class Playlist(AbstractDateTime):  # noqa
     )
     photo = models.ImageField(
         upload_to="photos/playlists/%Y/%m/%d",
+        storage=content_storage,
         blank=True,
         verbose_name="Фото плэйлиста"
     )
@@ -22,6 +25,10 @@ class Playlist(AbstractDateTime):  # noqa
         verbose_name="Слушатели",
         blank=True
     )
+    listeners_count = CounterField(
+        source="listeners",
+        verbose_name="Количество слушателей"
+    )
 
     class Meta:  # noqa
         verbose_name = "Плэйлист"
@@ -73,10 +80,54 @@ class Performer(AbstractDateTime):  # noqa
 
 
 class Music(AbstractDateTime):  # noqa
+    MUSIC_MAX_TAG_LEN = 255
     music = models.FileField(
         upload_to="documents/songs/%Y/%m/%d",
-        verbose_name="Файл песни",
-        unique=True
+        storage=content_storage,
+        verbose_name="Файл песни"
+    )
+    duration = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Длительность в секундах"
+    )
+    bitrate = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Битрейт в кбит/с"
+    )
+    sample_rate = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Частота дискретизации"
+    )
+    channels = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Количество каналов"
+    )
+    tag_title = models.CharField(
+        max_length=MUSIC_MAX_TAG_LEN,
+        blank=True,
+        editable=False,
+        verbose_name="Название из тегов"
+    )
+    tag_artist = models.CharField(
+        max_length=MUSIC_MAX_TAG_LEN,
+        blank=True,
+        editable=False,
+        verbose_name="Исполнитель из тегов"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="SHA-256 файла"
     )
     playlist = models.ForeignKey(
         to=Playlist,
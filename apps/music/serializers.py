@@ -73,12 +73,32 @@ class MusicBaseSerializer(
 
 
 class MusicListSerializer(MusicBaseSerializer):
-    """MusicListSerializer."""
+    """MusicListSerializer with metadata stored on upload."""
 
     performers: PerformerBaseSerializer = PerformerBaseSerializer(
         many=True
     )
 
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: Music = Music
+        fields: Tuple[str] = (
+            "id",
+            "music",
+            "performers",
+            "playlist",
+            "datetime_created",
+            "is_deleted",
+            "duration",
+            "bitrate",
+            "sample_rate",
+            "channels",
+            "tag_title",
+            "tag_artist",
+            "content_hash",
+        )
+
 
 class MusicDetailSerializer(MusicListSerializer):
     """MusicDetailSerializer."""
@@ -101,6 +121,13 @@ class MusicDetailSerializer(MusicListSerializer):
             "playlist",
             "datetime_created",
             "is_deleted",
+            "duration",
+            "bitrate",
+            "sample_rate",
+            "channels",
+            "tag_title",
+            "tag_artist",
+            "content_hash",
             "users",
             "listeners_number",
         )
@@ -131,6 +158,7 @@ class PlaylistBaseSerializer(
             "photo",
             "datetime_created",
             "is_deleted",
+            "listeners_count",
         )
 
 
@@ -152,6 +180,7 @@ class PlaylistDetailSerializer(PlaylistBaseSerializer):
             "photo",
             "datetime_created",
             "is_deleted",
+            "listeners_count",
             "songs",
         )
 
@@ -0,0 +1,66 @@
+from typing import (
+    Any,
+    FrozenSet,
+    Optional,
+)
+
+from django.dispatch import receiver
+from django.db.models.signals import (
+    post_init,
+    post_save,
+)
+from django.db.models.base import ModelBase
+
+from music.metadata import extract_metadata_on_commit
+from music.models import Music
+
+
+# Name of the file the row was loaded with, missing if music is deferred
+LOADED_MUSIC_KEY = "_loaded_music_name"
+
+
+def get_music_name(instance: Music) -> Optional[str]:
+    """Get name of the file set in the row, None if music is deferred."""
+    if "music" not in instance.__dict__:
+        return None
+    value: Any = instance.__dict__["music"]
+    return getattr(value, "name", value) or ""
+
+
+@receiver(
+    signal=post_init,
+    sender=Music
+)
+def post_init_music(
+    sender: ModelBase,
+    instance: Music,
+    **kwargs: dict
+) -> None:
+    """Signal post-init Music."""
+    name: Optional[str] = get_music_name(instance)
+    if name is not None:
+        instance.__dict__[LOADED_MUSIC_KEY] = name
+
+
+@receiver(
+    signal=post_save,
+    sender=Music
+)
+def post_save_music(
+    sender: ModelBase,
+    instance: Music,
+    created: bool,
+    update_fields: Optional[FrozenSet[str]] = None,
+    **kwargs: dict
+) -> None:
+    """Signal post-save Music."""
+    # Saves of other fields keep the file and its metadata
+    if update_fields and "music" not in update_fields:
+        return
+    name: Optional[str] = get_music_name(instance)
+    if not created and name is not None and \
+            instance.__dict__.get(LOADED_MUSIC_KEY) == name:
+        return
+    if name is not None:
+        instance.__dict__[LOADED_MUSIC_KEY] = name
+    extract_metadata_on_commit(instance.id)
@@ -1,3 +1,272 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from hashlib import sha256
+from typing import (
+    Any,
+    Dict,
+    Tuple,
+)
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.http.response import HttpResponseBase
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from rest_framework.test import APIClient
+
+from abstracts.testing import create_user
+from auths.models import CustomUser
+from music.metadata import (
+    AudioMetadata,
+    read_metadata,
+)
+from music.models import (
+    Music,
+    Playlist,
+)
+
+
+SONG_CONTENT = bytes(range(256)) * 4
+# MPEG-1 Layer III, 128 kbit/s, 44100 Hz, stereo: 417 bytes per frame
+MP3_FRAME = b"\xFF\xFB\x90\x00" + bytes(413)
+
+
+def get_id3v2_tag(title: str, artist: str) -> bytes:
+    """Get ID3v2.3 tag with the title and artist text frames."""
+    frames: bytes = b"".join(
+        frame_id + (len(text) + 1).to_bytes(4, "big") + b"\x00\x00" +
+        b"\x00" + text.encode("latin-1")
+        for frame_id, text in ((b"TIT2", title), (b"TPE1", artist))
+    )
+    return b"ID3\x03\x00\x00" + len(frames).to_bytes(4, "big") + frames
+
+
+class MusicTestCase(TestCase):
+    """Song of the playlist listened by the listener."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.directory: str = tempfile.mkdtemp()
+        self.media: Any = override_settings(MEDIA_ROOT=self.directory)
+        self.media.enable()
+        self.listener: CustomUser = create_user("listener")
+        self.playlist: Playlist = Playlist.objects.create(name="playlist")
+        self.playlist.listeners.add(self.listener)
+        self.music: Music = self.create_music(SONG_CONTENT)
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(self.listener)
+
+    def tearDown(self) -> None:  # noqa
+        self.media.disable()
+        shutil.rmtree(self.directory)
+
+    def create_music(self, content: bytes) -> Music:
+        """Create song of the playlist with the file content."""
+        music: Music = Music(playlist=self.playlist)
+        music.music.save("song.mp3", ContentFile(content), save=True)
+        return music
+
+
+class StreamTest(MusicTestCase):
+    """Byte ranges and validators of the song stream."""
+
+    def stream(self, **headers: str) -> HttpResponseBase:
+        """Get the song with the request headers."""
+        return self.client.get(
+            f"/api/v1/music/music/{self.music.id}/stream",
+            **{
+                f"HTTP_{name.upper()}": value
+                for name, value in headers.items()
+            }
+        )
+
+    def assertContent(
+        self,
+        response: HttpResponseBase,
+        status: int,
+        content: bytes
+    ) -> None:
+        """Check status and the streamed bytes."""
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(b"".join(response.streaming_content), content)
+        self.assertEqual(int(response["Content-Length"]), len(content))
+
+    def test_whole_file(self) -> None:
+        """File without a range is sent with its validators."""
+        response: HttpResponseBase = self.stream()
+        self.assertContent(response, 200, SONG_CONTENT)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+
+    def test_ranges(self) -> None:
+        """Closed, open and suffix ranges are partial content."""
+        size: int = len(SONG_CONTENT)
+        ranges: Dict[str, Tuple[int, int]] = {
+            "bytes=10-19": (10, 19),
+            "bytes=1000-": (1000, size - 1),
+            "bytes=1000-5000": (1000, size - 1),
+            "bytes=-24": (size - 24, size - 1),
+            "bytes=-5000": (0, size - 1),
+        }
+        header: str
+        first: int
+        last: int
+        for header, (first, last) in ranges.items():
+            with self.subTest(header):
+                response: HttpResponseBase = self.stream(range=header)
+                self.assertContent(
+                    response,
+                    206,
+                    SONG_CONTENT[first:last + 1]
+                )
+                self.assertEqual(
+                    response["Content-Range"],
+                    f"bytes {first}-{last}/{size}"
+                )
+
+    def test_range_past_end(self) -> None:
+        """Range starting after the file is not satisfiable."""
+        header: str
+        for header in ("bytes=1024-", "bytes=2000-3000", "bytes=-0"):
+            with self.subTest(header):
+                response: HttpResponseBase = self.stream(range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(
+                    response["Content-Range"],
+                    f"bytes */{len(SONG_CONTENT)}"
+                )
+
+    def test_ignored_ranges(self) -> None:
+        """Reversed, malformed and multiple ranges get the whole file."""
+        header: str
+        for header in ("bytes=20-10", "items=0-10", "bytes=0-1,5-6"):
+            with self.subTest(header):
+                self.assertContent(
+                    self.stream(range=header),
+                    200,
+                    SONG_CONTENT
+                )
+
+    def test_if_range(self) -> None:
+        """Range is served only for the current validator."""
+        etag: str = self.stream()["ETag"]
+        self.assertContent(
+            self.stream(range="bytes=0-9", if_range=etag),
+            206,
+            SONG_CONTENT[:10]
+        )
+        self.assertContent(
+            self.stream(range="bytes=0-9", if_range='"stale"'),
+            200,
+            SONG_CONTENT
+        )
+
+    def test_conditional_requests(self) -> None:
+        """Validators of the client get 304 and 412 without the file."""
+        etag: str = self.stream()["ETag"]
+        response: HttpResponseBase = self.stream(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.stream(if_match='"other"')
+        self.assertEqual(response.status_code, 412)
+
+    @override_settings(
+        FILE_STREAMING={"X_ACCEL_REDIRECT_PREFIX": "/protected/"}
+    )
+    def test_x_accel_redirect(self) -> None:
+        """With the prefix nginx sends the file from internal location."""
+        response: HttpResponseBase = self.stream(range="bytes=0-9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            f"/protected/{self.music.music.name}"
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_permission(self) -> None:
+        """Song is played by its listeners and by users who added it."""
+        stranger: CustomUser = create_user("stranger")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.stream().status_code, 403)
+
+        self.music.users.add(stranger)
+        self.assertEqual(self.stream().status_code, 200)
+
+        self.client.force_authenticate(self.listener)
+        self.playlist.listeners.remove(self.listener)
+        self.assertEqual(self.stream().status_code, 403)
+
+
+class MetadataTest(MusicTestCase):
+    """Audio properties and tags of song files."""
+
+    def read(self, content: bytes) -> AudioMetadata:
+        """Get metadata of the file content."""
+        return read_metadata(io.BytesIO(content), len(content))
+
+    def test_valid_file(self) -> None:
+        """Tags and properties of MP3 frames are read."""
+        content: bytes = get_id3v2_tag("Song", "Band") + MP3_FRAME * 10
+        self.assertEqual(
+            self.read(content),
+            AudioMetadata(
+                duration=0.261,
+                bitrate=128,
+                sample_rate=44100,
+                channels=2,
+                tag_title="Song",
+                tag_artist="Band",
+                content_hash=sha256(content).hexdigest()
+            )
+        )
+
+    def test_truncated_file(self) -> None:
+        """Cut frame and tag give what is left in the file."""
+        content: bytes = get_id3v2_tag("Song", "Band") + MP3_FRAME[:100]
+        metadata: AudioMetadata = self.read(content)
+        self.assertEqual(metadata.tag_title, "Song")
+        self.assertEqual(metadata.sample_rate, 44100)
+
+        content = get_id3v2_tag("Song", "Band")[:16]
+        metadata = self.read(content)
+        self.assertIsNone(metadata.duration)
+        self.assertEqual(metadata.tag_title, "")
+        self.assertEqual(metadata.content_hash, sha256(content).hexdigest())
+
+    def test_garbage_file(self) -> None:
+        """File of no audio has only the content hash."""
+        self.assertEqual(
+            self.read(SONG_CONTENT),
+            AudioMetadata(
+                duration=None,
+                bitrate=None,
+                sample_rate=None,
+                channels=None,
+                tag_title="",
+                tag_artist="",
+                content_hash=sha256(SONG_CONTENT).hexdigest()
+            )
+        )
+
+    def test_saved_by_signal(self) -> None:
+        """Metadata of a new file is stored after the commit."""
+        content: bytes = get_id3v2_tag("Song", "Band") + MP3_FRAME * 10
+        with self.captureOnCommitCallbacks(execute=True):
+            music: Music = self.create_music(content)
+        music.refresh_from_db()
+        self.assertEqual(music.tag_title, "Song")
+        self.assertEqual(music.bitrate, 128)
+        self.assertEqual(music.duration, 0.261)
+        self.assertEqual(music.content_hash, sha256(content).hexdigest())
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            music.save(update_fields=["playlist"])
+            music.save()
+        self.assertEqual(callbacks, [])
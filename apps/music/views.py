@@ -9,7 +9,9 @@ from django.db.models import (
     QuerySet,
     Model,
     Prefetch,
+    Q,
 )
+from django.http.response import HttpResponseBase
 
 from rest_framework.viewsets import ViewSet
 from rest_framework.permissions import (
@@ -37,6 +39,7 @@ from music.serializers import (
 )
 from music.tools import is_music_file
 from abstracts.handlers import NoneDataHandler
+from abstracts.streaming import stream_file
 from abstracts.paginators import AbstractPageNumberPaginator
 from abstracts.mixins import (
     ModelInstanceMixin,
@@ -667,3 +670,49 @@ class MusicViewSet(
             },
             status=status.HTTP_200_OK
         )
+
+    def is_music_available(self, music: Music, user: Any) -> bool:
+        """Check that the user added the song or listens to its playlist."""
+        return user.is_staff or Music.objects.filter(
+            Q(users__id=user.id) | Q(playlist__listeners__id=user.id),
+            id=music.id
+        ).exists()
+
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path="stream",
+        permission_classes=(
+            IsAuthenticated,
+        )
+    )
+    def stream(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> HttpResponseBase:
+        """Handle GET-request to play the song from the requested byte."""
+        music: Optional[Music] = self.get_instance_by_id(
+            Music,
+            pk=pk
+        )
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=music and music.music,
+            message=f"Данной песни c ID {pk} не существует или она удалена",
+            status=status.HTTP_404_NOT_FOUND
+        )
+        if response:
+            return response
+
+        if not self.is_music_available(music, request.user):
+            return DRF_Response(
+                data={
+                    "response": "Добавьте песню или её плэйлист, "
+                                "чтобы её слушать"
+                },
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return stream_file(request, music.music)
@@ -5,3 +5,6 @@ class NewsConfig(AppConfig):  # noqa
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name: str = "Новости"
+
+    def ready(self) -> None:  # noqa
+        import news.signals  # noqa
@@ -0,0 +1,111 @@
+"""Comments of news: cached numbers and batched lookups."""
+from typing import (
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+)
+
+from django.core.cache import (
+    BaseCache,
+    caches,
+)
+from django.db import transaction
+from django.db.models import (
+    Count,
+    QuerySet,
+)
+
+from news.models import Comment
+
+
+COMMENTS_CACHE_ALIAS = "comments"
+
+
+def get_comments_cache() -> BaseCache:
+    """Get cache backend for numbers of comments."""
+    return caches[COMMENTS_CACHE_ALIAS]
+
+
+def _get_comments_count_key(news_id: int) -> str:
+    return f"news-comments:{news_id}"
+
+
+def get_comments_counts(news_ids: Iterable[int]) -> Dict[int, int]:
+    """Get numbers of not deleted comments of the news (read-through).
+
+    Missing numbers are counted with one GROUP BY query.
+    """
+    news_ids = set(news_ids)
+    if not news_ids:
+        return {}
+    cache: BaseCache = get_comments_cache()
+    keys: Dict[int, str] = {
+        news_id: _get_comments_count_key(news_id) for news_id in news_ids
+    }
+    cached: Dict[str, int] = cache.get_many(keys.values())
+    counts: Dict[int, int] = {
+        news_id: cached[key]
+        for news_id, key in keys.items() if key in cached
+    }
+    missing_ids: Set[int] = news_ids - counts.keys()
+    if missing_ids:
+        found: Dict[int, int] = dict(
+            Comment.objects.get_not_deleted()
+            .filter(news_id__in=missing_ids)
+            .values("news_id")
+            .annotate(count=Count("id"))
+            .values_list("news_id", "count")
+        )
+        missing: Dict[int, int] = {
+            news_id: found.get(news_id, 0) for news_id in missing_ids
+        }
+        cache.set_many(
+            {keys[news_id]: count for news_id, count in missing.items()}
+        )
+        counts.update(missing)
+    return counts
+
+
+def invalidate_comments_count(news_id: int) -> None:
+    """Drop cached number of comments of the news now and after commit."""
+    key: str = _get_comments_count_key(news_id)
+    get_comments_cache().delete(key)
+    # Readers inside the transaction could cache not committed number
+    transaction.on_commit(lambda: get_comments_cache().delete(key))
+
+
+def get_liked_comment_ids(
+    user_id: int,
+    comment_ids: Iterable[int]
+) -> Set[int]:
+    """Get which of the comments are liked by the user with one query."""
+    comment_ids = list(comment_ids)
+    if not comment_ids:
+        return set()
+    return set(
+        Comment.likes.through.objects.filter(
+            customuser_id=user_id,
+            comment_id__in=comment_ids
+        ).values_list("comment_id", flat=True)
+    )
+
+
+def get_thread(news_id: int, parent_id: Optional[int] = None) -> QuerySet:
+    """Get not deleted first-level comments of the news or replies."""
+    return Comment.objects.get_not_deleted().filter(
+        news_id=news_id,
+        parent_id=parent_id
+    ).select_related("commentator").order_by("datetime_created")
+
+
+def get_branch(news_id: int, root_id: int) -> QuerySet:
+    """Get not deleted replies of the first-level comment at all depths.
+
+    Replies keep the first comment of their branch in root, so the branch
+    is read with one query; depth and parent let the client nest it.
+    """
+    return Comment.objects.get_not_deleted().filter(
+        news_id=news_id,
+        root_id=root_id
+    ).select_related("commentator").order_by("datetime_created")
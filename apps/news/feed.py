@@ -0,0 +1,169 @@
+"""Personal news feed of users.
+
+News are pushed to timelines of group followers and author friends when
+they are created (fan-out on write). News of groups with more than
+FANOUT_MAX_FOLLOWERS followers are not pushed, the followers pull them
+into their timelines when the feed is read (fan-out on read).
+"""
+from datetime import datetime
+from time import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.cache import (
+    BaseCache,
+    caches,
+)
+from django.db.models import QuerySet
+
+from auths.graph import get_friend_ids
+from abstracts.workers import get_worker
+from groups.models import Group
+from news.models import (
+    FeedEntry,
+    News,
+)
+
+
+FEED_WORKER_NAME = "feed"
+FEED_CACHE_ALIAS = "feed"
+DEFAULT_FANOUT_MAX_FOLLOWERS = 10000
+DEFAULT_PULL_LIMIT = 100
+DEFAULT_PULL_INTERVAL = 30
+
+# (time of the pull, datetime_created of the newest pulled news)
+PullState = Tuple[float, Optional[datetime]]
+
+
+def get_feed_config() -> Dict[str, Any]:
+    """Get feed configuration from settings.NEWS_FEED."""
+    config: Dict[str, Any] = getattr(settings, "NEWS_FEED", {})
+    return {
+        "FANOUT_MAX_FOLLOWERS": config.get(
+            "FANOUT_MAX_FOLLOWERS", DEFAULT_FANOUT_MAX_FOLLOWERS
+        ),
+        "PULL_LIMIT": config.get("PULL_LIMIT", DEFAULT_PULL_LIMIT),
+        "PULL_INTERVAL": config.get("PULL_INTERVAL", DEFAULT_PULL_INTERVAL),
+    }
+
+
+def get_feed_cache() -> BaseCache:
+    """Get cache backend for the last pulls of users."""
+    return caches[FEED_CACHE_ALIAS]
+
+
+def _get_pull_key(user_id: int) -> str:
+    return f"feed-pull:{user_id}"
+
+
+def get_news_recipient_ids(news: News) -> Set[int]:
+    """Get ids of users whose timelines get the news on write."""
+    user_ids: Set[int] = set()
+    if news.author_id:
+        user_ids.add(news.author_id)
+        user_ids.update(get_friend_ids(news.author_id))
+    if news.group_id:
+        group: Group = news.group
+        if group.followers_count <= \
+                get_feed_config()["FANOUT_MAX_FOLLOWERS"]:
+            user_ids.update(
+                group.followers.values_list("id", flat=True)
+            )
+    return user_ids
+
+
+def fan_out_news(news_id: int) -> int:
+    """Push the news into the timelines, get number of new entries."""
+    news: News = News.objects.get_not_deleted()\
+        .select_related("group")\
+        .filter(id=news_id)\
+        .first()
+    if not news:
+        return 0
+    entries: List[FeedEntry] = [
+        FeedEntry(
+            user_id=user_id,
+            news_id=news.id,
+            datetime_created=news.datetime_created
+        )
+        for user_id in get_news_recipient_ids(news)
+    ]
+    FeedEntry.objects.bulk_create(
+        entries,
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    return len(entries)
+
+
+def fan_out_news_on_commit(news_id: int) -> None:
+    """Push the news by the background worker after the commit."""
+    get_worker(FEED_WORKER_NAME).submit_on_commit(fan_out_news, news_id)
+
+
+def remove_news_on_commit(news_id: int) -> None:
+    """Drop the deleted news from timelines after the commit."""
+    get_worker(FEED_WORKER_NAME).submit_on_commit(
+        lambda: FeedEntry.objects.filter(news_id=news_id).delete()
+    )
+
+
+def pull_large_groups_news(user_id: int) -> int:
+    """Copy latest news of followed large groups into the timeline.
+
+    Pulls within PULL_INTERVAL of the last one are skipped, later ones
+    read only news newer than the newest pulled one. Lost state of the
+    last pull costs one pull of PULL_LIMIT news, get number of news.
+    """
+    config: Dict[str, Any] = get_feed_config()
+    key: str = _get_pull_key(user_id)
+    state: Optional[PullState] = get_feed_cache().get(key)
+    now: float = time()
+    if state and now - state[0] < config["PULL_INTERVAL"]:
+        return 0
+
+    news: QuerySet = News.objects.get_not_deleted().filter(
+        group__followers__id=user_id,
+        group__followers_count__gt=config["FANOUT_MAX_FOLLOWERS"]
+    )
+    watermark: Optional[datetime] = state[1] if state else None
+    if watermark:
+        news = news.filter(datetime_created__gt=watermark)
+    news_rows: List[Tuple[int, datetime]] = list(
+        news.order_by("-datetime_created")
+        .values_list("id", "datetime_created")[:config["PULL_LIMIT"]]
+    )
+    if news_rows:
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=user_id,
+                    news_id=news_id,
+                    datetime_created=datetime_created
+                )
+                for news_id, datetime_created in news_rows
+            ],
+            ignore_conflicts=True
+        )
+        watermark = news_rows[0][1]
+    get_feed_cache().set(key, (now, watermark))
+    return len(news_rows)
+
+
+def get_feed(user_id: int) -> QuerySet:
+    """Get timeline of the user ordered from the newest news."""
+    return FeedEntry.objects.filter(
+        user_id=user_id,
+        news__datetime_deleted__isnull=True
+    ).select_related(
+        "news__author",
+        "news__group",
+        "news__category"
+    ).order_by("-datetime_created")
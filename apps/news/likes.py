@@ -0,0 +1,99 @@
+"""Likes of news and comments."""
+from typing import Any
+
+from django.db import (
+    connection,
+    models,
+    transaction,
+)
+from django.db.models import Model
+from django.db.models.base import ModelBase
+from django.dispatch import Signal
+
+from abstracts.counters import (
+    CounterBuffer,
+    CounterField,
+    get_counter_buffer,
+    get_counter_field,
+)
+
+
+# Sent with instance=, field_name= and delta= (+1 or -1) when a like is
+# really added or removed by set_liked
+likes_changed: Signal = Signal()
+
+
+def _add_like(
+    through: ModelBase,
+    owner_column: str,
+    target_column: str,
+    owner_id: Any,
+    user_id: int
+) -> int:
+    quote: Any = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {quote(through._meta.db_table)}
+                ({quote(owner_column)}, {quote(target_column)})
+            VALUES (%s, %s)
+            ON CONFLICT DO NOTHING
+            """,
+            [owner_id, user_id]
+        )
+        return cursor.rowcount
+
+
+def set_liked(
+    instance: Model,
+    field_name: str,
+    user_id: int,
+    is_liked: bool
+) -> int:
+    """Like or unlike the object by the user, get number of its likes.
+
+    Repeated and concurrent calls change the counter only by the rows
+    really inserted or deleted: the through table is written directly,
+    not by m2m add()/remove() whose signals count rows before the write.
+    The counter goes through the counter buffer, so the returned number
+    includes buffered likes.
+    """
+    model: ModelBase = type(instance)
+    counter: CounterField = get_counter_field(model, field_name)
+    m2m_field: models.ManyToManyField = model._meta.get_field(field_name)
+    through: ModelBase = m2m_field.remote_field.through
+    owner_name: str = m2m_field.m2m_field_name()
+    target_name: str = m2m_field.m2m_reverse_field_name()
+    buffer: CounterBuffer = get_counter_buffer()
+
+    with transaction.atomic():
+        delta: int
+        if is_liked:
+            delta = _add_like(
+                through,
+                through._meta.get_field(owner_name).column,
+                through._meta.get_field(target_name).column,
+                instance.pk,
+                user_id
+            )
+        else:
+            delta = -through._default_manager.filter(
+                **{owner_name: instance.pk, target_name: user_id}
+            ).delete()[0]
+        if delta:
+            buffer.adjust(model, instance.pk, counter.attname, delta)
+            likes_changed.send(
+                sender=model,
+                instance=instance,
+                field_name=field_name,
+                delta=delta
+            )
+    likes_count: int = model._default_manager\
+        .filter(pk=instance.pk)\
+        .values_list(counter.attname, flat=True)\
+        .first() or 0
+    return likes_count + buffer.get_pending(
+        model,
+        instance.pk,
+        counter.attname
+    )
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandParser,
+)
+
+from news.models import (
+    News,
+    NewsScore,
+)
+from news.trending import (
+    create_scores,
+    update_stale_scores,
+)
+
+
+class Command(BaseCommand):
+    """Recompute trending scores of news with recent activity."""
+
+    help = 'Update stale trending scores of news (run periodically).'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute scores of all news'
+        )
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle scores updating."""
+        start: datetime = datetime.now()
+
+        if kwargs['all']:
+            create_scores(News.objects.values_list('id', flat=True))
+            NewsScore.objects.update(is_stale=True)
+        print(f"Обновлено {update_stale_scores()} рейтингов новостей")
+
+        print(
+            'Обновление рейтингов составило: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:34
+
+import abstracts.counters
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_likes_count(apps, schema_editor):
+    news_model = apps.get_model('news', 'News')
+    through_model = news_model._meta.get_field(
+        'liked_users'
+    ).remote_field.through
+    news_model.objects.update(
+        likes_count=Coalesce(
+            Subquery(
+                through_model.objects.filter(
+                    news_id=OuterRef('pk')
+                ).order_by().values('news_id').annotate(
+                    number=Count('pk')
+                ).values('number')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='likes_count',
+            field=abstracts.counters.CounterField(default=0, editable=False, source='liked_users', verbose_name='Количество лайков'),
+        ),
+        migrations.RunPython(
+            fill_likes_count,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_news_scores(apps, schema_editor):
+    news_model = apps.get_model('news', 'News')
+    news_score_model = apps.get_model('news', 'NewsScore')
+    news_score_model.objects.bulk_create(
+        [
+            news_score_model(news_id=news_id)
+            for news_id in news_model.objects.values_list('id', flat=True)
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsScore',
+            fields=[
+                ('news', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='news.news', verbose_name='Новость')),
+                ('score', models.FloatField(default=0.0, verbose_name='Рейтинг')),
+                ('is_stale', models.BooleanField(default=True, verbose_name='Требует пересчета')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг новости',
+                'verbose_name_plural': 'Рейтинги новостей',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='newsscore',
+            index=models.Index(fields=['-score'], name='news_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsscore',
+            index=models.Index(condition=models.Q(('is_stale', True)), fields=['news'], name='news_score_stale_idx'),
+        ),
+        migrations.RunPython(
+            create_news_scores,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:55
+
+import abstracts.counters
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_likes_count(apps, schema_editor):
+    comment_model = apps.get_model('news', 'Comment')
+    through_model = comment_model._meta.get_field(
+        'likes'
+    ).remote_field.through
+    comment_model.objects.update(
+        likes_count=Coalesce(
+            Subquery(
+                through_model.objects.filter(
+                    comment_id=OuterRef('pk')
+                ).order_by().values('comment_id').annotate(
+                    number=Count('pk')
+                ).values('number')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_newsscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=abstracts.counters.CounterField(default=0, editable=False, source='likes', verbose_name='Количество лайков'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='news.comment', verbose_name='Ответ на комментарий'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество ответов'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.comment', verbose_name='Первый комментарий ветки'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['news', 'parent', 'datetime_created', 'id'], name='comment_thread_idx'),
+        ),
+        migrations.RunPython(
+            fill_likes_count,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.4 on 2026-10-18 19:05
+
+from django.db import migrations
+
+from abstracts.search import is_fts5_available
+
+
+def create_table(apps, schema_editor):
+    # Without FTS5 the index is kept in the postings table
+    if not is_fts5_available(schema_editor.connection):
+        return
+    schema_editor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_news USING fts5(
+            content,
+            group_id UNINDEXED,
+            timestamp UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+
+
+def drop_table(apps, schema_editor):
+    schema_editor.execute('DROP TABLE IF EXISTS search_news')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_comment_threads'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_table, drop_table),
+    ]
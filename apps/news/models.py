@@ -1,8 +1,14 @@
+from typing import Optional
+
 from django.db import models
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 
 from abstracts.models import AbstractDateTime
+from abstracts.counters import (
+    CounterField,
+    adjust_counter,
+)
 from auths.models import CustomUser
 from groups.models import Group
 
@@ -107,6 +113,10 @@ class News(AbstractDateTime):  # noqa
         verbose_name="Лайки ползователей",
         blank=True
     )
+    likes_count = CounterField(
+        source="liked_users",
+        verbose_name="Количество лайков"
+    )
     tags = models.ManyToManyField(
         to=Tag,
         blank=True,
@@ -140,7 +150,13 @@ class News(AbstractDateTime):  # noqa
 
 
 class Comment(AbstractDateTime):
-    """Comment for NEWS."""
+    """Comment for NEWS.
+
+    Replies form threads not deeper than MAX_DEPTH: a reply to the
+    deepest comment becomes a reply to its parent.
+    """
+
+    MAX_DEPTH = 3
 
     content = models.TextField(
         verbose_name="Контент",
@@ -152,6 +168,35 @@ class Comment(AbstractDateTime):
         blank=True,
         verbose_name="Лайки пользователей"
     )
+    likes_count = CounterField(
+        source="likes",
+        verbose_name="Количество лайков"
+    )
+    parent = models.ForeignKey(
+        to="self",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="replies",
+        verbose_name="Ответ на комментарий"
+    )
+    root = models.ForeignKey(
+        to="self",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name="Первый комментарий ветки"
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Уровень вложенности"
+    )
+    replies_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество ответов"
+    )
     commentator = models.ForeignKey(
         to=CustomUser,
         on_delete=models.CASCADE,
@@ -175,6 +220,113 @@ class Comment(AbstractDateTime):
         ordering = (
             "datetime_created",
         )
+        indexes = (
+            models.Index(
+                fields=("news", "parent", "datetime_created", "id"),
+                name="comment_thread_idx"
+            ),
+        )
 
     def __str__(self) -> str:  # noqa
         return f'Пользователь {self.commentator} прокомментировал {self.news}'
+
+    def set_parent(self, parent: Optional["Comment"]) -> None:
+        """Attach the comment to the thread keeping depth bounded."""
+        while parent and parent.depth >= self.MAX_DEPTH:
+            parent = parent.parent
+        self.parent = parent
+        self.root_id = (parent.root_id or parent.id) if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+
+    def delete(self, *args: tuple, **kwargs: dict) -> None:  # noqa
+        is_deleted: bool = self.datetime_deleted is not None
+        super().delete(*args, **kwargs)
+        if not is_deleted and self.parent_id:
+            adjust_counter(Comment, [self.parent_id], "replies_count", -1)
+
+
+class FeedEntry(models.Model):
+    """News in the timeline of the user (see news.feed)."""
+
+    user = models.ForeignKey(
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пользователь"
+    )
+    news = models.ForeignKey(
+        to=News,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Новость"
+    )
+    datetime_created = models.DateTimeField(
+        verbose_name="Время создания новости"
+    )
+
+    class Meta:
+        """Customization of the Model."""
+
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        ordering = (
+            "-datetime_created",
+        )
+        constraints = [
+            models.UniqueConstraint(
+                name="%(app_label)s_%(class)s_unique_entry",
+                fields=["user", "news"]
+            ),
+        ]
+        indexes = (
+            models.Index(
+                fields=("user", "datetime_created", "id"),
+                name="feed_entry_user_idx"
+            ),
+        )
+
+    def __str__(self) -> str:  # noqa
+        return f'Новость {self.news_id} в ленте {self.user_id}'
+
+
+class NewsScore(models.Model):
+    """Popularity score of the news (see news.trending)."""
+
+    news = models.OneToOneField(
+        to=News,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="score",
+        verbose_name="Новость"
+    )
+    score = models.FloatField(
+        default=0.0,
+        verbose_name="Рейтинг"
+    )
+    is_stale = models.BooleanField(
+        default=True,
+        verbose_name="Требует пересчета"
+    )
+
+    class Meta:
+        """Customization of the Model."""
+
+        verbose_name = "Рейтинг новости"
+        verbose_name_plural = "Рейтинги новостей"
+        ordering = (
+            "-score",
+        )
+        indexes = (
+            models.Index(
+                fields=("-score",),
+                name="news_score_idx"
+            ),
+            models.Index(
+                fields=("news",),
+                condition=models.Q(is_stale=True),
+                name="news_score_stale_idx"
+            ),
+        )
+
+    def __str__(self) -> str:  # noqa
+        return f'Рейтинг новости {self.news_id}: {self.score}'
@@ -0,0 +1,57 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+from django.db.models import (
+    Count,
+    F,
+    QuerySet,
+)
+
+from abstracts.search import (
+    SearchIndex,
+    register_index,
+)
+from news.models import News
+
+
+NEWS_INDEX: SearchIndex = register_index(
+    SearchIndex(
+        name="news",
+        get_queryset=lambda: News.objects.get_not_deleted(),
+        get_text=lambda news: f"{news.title}\n{news.content}"
+    )
+)
+
+
+def get_facets(news: QuerySet) -> Dict[str, List[Dict[str, Any]]]:
+    """Get numbers of the news per category and per tag in SQL."""
+    categories: QuerySet = news.values("category_id")\
+        .annotate(title=F("category__title"), count=Count("id"))\
+        .order_by("-count", "category_id")
+    tags: QuerySet = News.tags.through.objects.filter(
+        news_id__in=news.values("id"),
+        tag__datetime_deleted__isnull=True
+    ).values("tag_id")\
+        .annotate(name=F("tag__name"), count=Count("id"))\
+        .order_by("-count", "tag_id")
+    return {
+        "categories": [
+            {
+                "id": row["category_id"],
+                "title": row["title"],
+                "count": row["count"],
+            }
+            for row in categories
+        ],
+        "tags": [
+            {
+                "id": row["tag_id"],
+                "name": row["name"],
+                "count": row["count"],
+            }
+            for row in tags
+        ],
+    }
@@ -1,7 +1,16 @@
-from typing import Tuple
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
+from django.db.models import Manager
 from rest_framework.serializers import (
     ModelSerializer,
+    ListSerializer,
     SerializerMethodField,
     DateTimeField,
     SlugField,
@@ -11,7 +20,13 @@ from abstracts.mixins import (
     AbstractDateTimeSerializerMixin,
 )
 from auths.serializers import CustomUserShortSerializer
+from news.comments import (
+    get_comments_counts,
+    get_liked_comment_ids,
+)
 from news.models import (
+    Comment,
+    FeedEntry,
     Tag,
     News,
     Category,
@@ -99,12 +114,31 @@ class NewsBaseSerializer(
         )
 
 
+class CommentsCountListSerializer(ListSerializer):
+    """List looking up numbers of comments of all its news at once."""
+
+    news_id_field: str = "id"
+
+    def to_representation(self, data: Any) -> List[Dict[str, Any]]:
+        """Put numbers of comments to the context before serializing."""
+        items: List[Any] = list(
+            data.all() if isinstance(data, Manager) else data
+        )
+        self.context.setdefault("comments_counts", {}).update(
+            get_comments_counts(
+                getattr(item, self.news_id_field) for item in items
+            )
+        )
+        return super().to_representation(items)
+
+
 class NewsListSerializer(NewsBaseSerializer):
     """NewsListSerializer."""
 
     group: GroupBaseSerializer = GroupBaseSerializer()
     author: CustomUserShortSerializer = CustomUserShortSerializer()
     category: CategoryBaseModelSerializer = CategoryBaseModelSerializer()
+    comments_count: SerializerMethodField = SerializerMethodField()
 
     class Meta:
         """Customization of the Serializer."""
@@ -120,7 +154,97 @@ class NewsListSerializer(NewsBaseSerializer):
             "category",
             "is_deleted",
             "datetime_created",
+            "likes_count",
+            "comments_count",
+        )
+        list_serializer_class: ListSerializer = CommentsCountListSerializer
+
+    def get_comments_count(self, obj: News) -> int:
+        """Get number of comments (see news.comments)."""
+        counts: Dict[int, int] = self.context.get("comments_counts", {})
+        if obj.id not in counts:
+            return get_comments_counts([obj.id])[obj.id]
+        return counts[obj.id]
+
+
+class FeedEntryListSerializer(CommentsCountListSerializer):
+    """List of timeline entries with numbers of comments of the news."""
+
+    news_id_field: str = "news_id"
+
+
+class FeedEntrySerializer(ModelSerializer):
+    """FeedEntrySerializer."""
+
+    news: NewsListSerializer = NewsListSerializer()
+
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: FeedEntry = FeedEntry
+        fields: Tuple[str] = (
+            "id",
+            "news",
+        )
+        list_serializer_class: ListSerializer = FeedEntryListSerializer
+
+
+class CommentListSerializer(ListSerializer):
+    """List of comments looking up likes of the user at once."""
+
+    def to_representation(self, data: Any) -> List[Dict[str, Any]]:
+        """Look up liked comments before the comments are serialized."""
+        comments: List[Comment] = list(
+            data.all() if isinstance(data, Manager) else data
+        )
+        request: Optional[Any] = self.context.get("request")
+        self.liked_ids: Set[int] = get_liked_comment_ids(
+            user_id=request.user.id,
+            comment_ids=[comment.id for comment in comments]
+        ) if request else set()
+        return super().to_representation(comments)
+
+
+class CommentSerializer(
+    AbstractDateTimeSerializerMixin,
+    ModelSerializer
+):
+    """CommentSerializer."""
+
+    datetime_created: DateTimeField = \
+        AbstractDateTimeSerializerMixin.datetime_created
+    commentator: CustomUserShortSerializer = CustomUserShortSerializer()
+    is_liked: SerializerMethodField = SerializerMethodField()
+
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: Comment = Comment
+        fields: Tuple[str] = (
+            "id",
+            "news",
+            "parent",
+            "depth",
+            "content",
+            "commentator",
+            "likes_count",
+            "replies_count",
+            "is_liked",
+            "datetime_created",
+        )
+        list_serializer_class: ListSerializer = CommentListSerializer
+
+    def get_is_liked(self, obj: Comment) -> bool:
+        """Check if the comment is liked by the user of the request."""
+        liked_ids: Optional[Set[int]] = getattr(
+            self.parent, "liked_ids", None
         )
+        if liked_ids is None:
+            request: Optional[Any] = self.context.get("request")
+            if not request:
+                return False
+            liked_ids = get_liked_comment_ids(request.user.id, [obj.id])
+        return obj.id in liked_ids
 
 
 class NewsCreateSerializer(NewsBaseSerializer):
@@ -174,11 +298,12 @@ class NewsDetailSerializer(NewsListSerializer):
             "likes_number",
             "liked_users",
             "tags",
+            "comments_count",
         )
 
     def get_likes_number(self, obj: News):
         """View number of user likes."""
-        return obj.liked_users.count()
+        return obj.likes_count
 
 
 class NewsUpdateSerializer(NewsBaseSerializer):
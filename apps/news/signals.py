@@ -0,0 +1,121 @@
+from typing import (
+    Optional,
+    Set,
+)
+
+from django.dispatch import receiver
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+from django.db.models.base import ModelBase
+
+from abstracts.counters import adjust_counter
+from news.comments import invalidate_comments_count
+from news.feed import (
+    fan_out_news_on_commit,
+    remove_news_on_commit,
+)
+from news.likes import likes_changed
+from news.models import (
+    Comment,
+    News,
+)
+from news.search import NEWS_INDEX
+from news.trending import (
+    create_scores,
+    mark_scores_stale,
+)
+
+
+@receiver(
+    signal=post_save,
+    sender=News
+)
+def post_save_news(
+    sender: ModelBase,
+    instance: News,
+    created: bool,
+    **kwargs: dict
+) -> None:
+    """Signal post-save News."""
+    if created:
+        create_scores([instance.id])
+        fan_out_news_on_commit(instance.id)
+    elif instance.datetime_deleted:
+        remove_news_on_commit(instance.id)
+    # Edits and soft deletes are reindexed too
+    NEWS_INDEX.update_on_commit([instance.id])
+
+
+@receiver(
+    signal=m2m_changed,
+    sender=News.liked_users.through
+)
+def m2m_changed_news_likes(
+    sender: ModelBase,
+    instance: object,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[Set[int]],
+    **kwargs: dict
+) -> None:
+    """Signal of liked_users changes of News."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        mark_scores_stale([instance.pk])
+    elif action == "pre_clear":
+        mark_scores_stale(
+            instance.liked_posts.values_list("id", flat=True)
+        )
+    else:
+        mark_scores_stale(pk_set or ())
+
+
+@receiver(
+    signal=likes_changed,
+    sender=News
+)
+def likes_changed_news(
+    sender: ModelBase,
+    instance: News,
+    **kwargs: dict
+) -> None:
+    """Signal of likes set by news.likes.set_liked."""
+    mark_scores_stale([instance.pk])
+
+
+@receiver(
+    signal=post_save,
+    sender=Comment
+)
+def post_save_comment(
+    sender: ModelBase,
+    instance: Comment,
+    created: bool,
+    **kwargs: dict
+) -> None:
+    """Signal post-save Comment."""
+    if created and instance.parent_id:
+        adjust_counter(Comment, [instance.parent_id], "replies_count", 1)
+    invalidate_comments_count(instance.news_id)
+    mark_scores_stale([instance.news_id])
+
+
+@receiver(
+    signal=post_delete,
+    sender=Comment
+)
+def post_delete_comment(
+    sender: ModelBase,
+    instance: Comment,
+    **kwargs: dict
+) -> None:
+    """Signal post-delete Comment."""
+    # Soft deleted replies are already subtracted (see Comment.delete)
+    if instance.parent_id and not instance.datetime_deleted:
+        adjust_counter(Comment, [instance.parent_id], "replies_count", -1)
+    invalidate_comments_count(instance.news_id)
+    mark_scores_stale([instance.news_id])
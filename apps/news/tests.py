@@ -1,3 +1,503 @@
-from django.test import TestCase
+from time import time
+from typing import (
+    Any,
+    List,
+    Optional,
+)
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import transaction
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from rest_framework.response import Response as DRF_Response
+from rest_framework.test import APIClient
+
+from abstracts.counters import CounterBuffer
+from abstracts.queries import QueryBudgetTestMixin
+from abstracts.testing import create_user
+from auths.models import CustomUser
+from groups.models import Group
+from news.feed import (
+    get_feed_cache,
+    pull_large_groups_news,
+)
+from news.likes import set_liked
+from news.models import (
+    Category,
+    Comment,
+    FeedEntry,
+    News,
+    NewsScore,
+    Tag,
+)
+from news.trending import update_stale_scores
+
+
+class NewsTestCase(QueryBudgetTestMixin, TestCase):
+    """News of the author read by the reader."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.author: CustomUser = create_user("author")
+        self.reader: CustomUser = create_user("reader")
+        self.category: Category = Category.objects.get_or_create(
+            title="Технологии",
+            defaults={"slug": "tech"}
+        )[0]
+        self.news: News = self.create_news()
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def create_news(self, author: Optional[CustomUser] = None) -> News:
+        """Create news and push it into the timelines."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return News.objects.create(
+                title="News",
+                content="Content",
+                category=self.category,
+                photo="news.jpg",
+                author=author or self.author
+            )
+
+    def create_comment(
+        self,
+        parent: Optional[Comment] = None,
+        commentator: Optional[CustomUser] = None,
+        news: Optional[News] = None
+    ) -> Comment:
+        """Create comment as the comments view does."""
+        comment: Comment = Comment(
+            content="Comment",
+            commentator=commentator or self.author,
+            news=news or self.news
+        )
+        comment.set_parent(parent)
+        comment.save()
+        return comment
+
+
+class NewsListTest(NewsTestCase):
+    """List of news."""
+
+    def test_constant_queries(self) -> None:
+        """News with authors, categories and comment counts."""
+        def add() -> None:
+            news: News = self.create_news(
+                create_user(f"author_{News.objects.count()}")
+            )
+            self.create_comment(news=news)
+
+        self.assertConstantQueries(
+            add,
+            lambda: self.client.get("/api/v1/news/news"),
+            budget="news/news-list"
+        )
+
+    def test_cursor_pages(self) -> None:
+        """Cursor mode walks all news without count."""
+        news: List[News] = [self.news, self.create_news(), self.create_news()]
+        ids: List[int] = []
+        url: Optional[str] = "/api/v1/news/news?cursor=&page_size=2"
+        while url:
+            response: DRF_Response = self.client.get(url)
+            self.assertNotIn("count", response.data["pagination"])
+            ids.extend(item["id"] for item in response.data["data"])
+            url = response.data["pagination"]["next"]
+        self.assertEqual(sorted(ids), sorted(item.id for item in news))
+
+    def test_cursor_queries(self) -> None:
+        """Cursor pages take the same queries for any size."""
+        self.assertConstantQueries(
+            self.create_news,
+            lambda: self.client.get("/api/v1/news/news", {"cursor": ""}),
+            budget="news/news-list"
+        )
+
+
+class FeedTest(NewsTestCase):
+    """Personal news feed."""
+
+    def test_constant_queries(self) -> None:
+        """Timeline of the user takes the same queries for any size."""
+        self.client.force_authenticate(self.author)
+        self.assertConstantQueries(
+            self.create_news,
+            lambda: self.client.get("/api/v1/news/news/feed")
+        )
+
+
+@override_settings(
+    NEWS_FEED={
+        "FANOUT_MAX_FOLLOWERS": 1,
+        "PULL_LIMIT": 100,
+        "PULL_INTERVAL": 30,
+    }
+)
+class FeedPullTest(NewsTestCase):
+    """Timeline of pushed news of small and pulled of large groups."""
+
+    def setUp(self) -> None:  # noqa
+        super().setUp()
+        self.small_group: Group = self.create_group("small", [self.reader])
+        self.large_group: Group = self.create_group(
+            "large",
+            [self.reader, self.author]
+        )
+
+    def create_group(self, slug: str, followers: List[CustomUser]) -> Group:
+        """Create group with the followers."""
+        with self.captureOnCommitCallbacks(execute=True):
+            group: Group = Group.objects.create(name=slug, slug=slug)
+            group.followers.add(*followers)
+        group.refresh_from_db()
+        self.assertEqual(group.followers_count, len(followers))
+        return group
+
+    def create_group_news(self, group: Group) -> News:
+        """Create news of the group and push it into the timelines."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return News.objects.create(
+                title="News",
+                content="Content",
+                category=self.category,
+                photo="news.jpg",
+                group=group
+            )
+
+    def get_feed_ids(self) -> List[int]:
+        """Get ids of the news in the feed of the reader."""
+        response: DRF_Response = self.client.get("/api/v1/news/news/feed")
+        self.assertEqual(response.status_code, 200)
+        return [entry["news"]["id"] for entry in response.data["data"]]
+
+    def pull_later(self) -> int:
+        """Pull news of the reader after the pull interval."""
+        with mock.patch("news.feed.time", return_value=time() + 31):
+            return pull_large_groups_news(self.reader.id)
+
+    def test_pushed_and_pulled_order(self) -> None:
+        """Pushed and pulled news are ordered by creation together."""
+        news: List[News] = [
+            self.create_group_news(group)
+            for group in (
+                self.small_group,
+                self.large_group,
+                self.small_group,
+                self.large_group,
+            )
+        ]
+        self.assertFalse(
+            FeedEntry.objects.filter(
+                user=self.reader,
+                news__group=self.large_group
+            ).exists()
+        )
+        self.assertEqual(
+            self.get_feed_ids(),
+            [item.id for item in reversed(news)]
+        )
+
+    def test_pull_watermark(self) -> None:
+        """Only news newer than the last pull are read again."""
+        first: News = self.create_group_news(self.large_group)
+        self.assertEqual(pull_large_groups_news(self.reader.id), 1)
+        second: News = self.create_group_news(self.large_group)
+        with self.assertNumQueries(1):
+            self.assertEqual(pull_large_groups_news(self.reader.id), 0)
+
+        self.assertEqual(self.pull_later(), 1)
+        self.assertEqual(self.pull_later(), 0)
+        self.assertEqual(
+            sorted(
+                FeedEntry.objects.filter(user=self.reader)
+                .values_list("news_id", flat=True)
+            ),
+            [first.id, second.id]
+        )
+
+    def test_pulled_once(self) -> None:
+        """News pulled again after lost state are not duplicated."""
+        news: News = self.create_group_news(self.large_group)
+        self.assertEqual(self.get_feed_ids(), [news.id])
+        get_feed_cache().clear()
+        self.assertEqual(self.get_feed_ids(), [news.id])
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader, news=news).count(),
+            1
+        )
+
+
+class TrendingTest(NewsTestCase):
+    """Hot news ranking."""
+
+    def get_score(self) -> NewsScore:
+        """Get trending score of the news."""
+        return NewsScore.objects.get(news=self.news)
+
+    def test_constant_queries(self) -> None:
+        """Hot news take the same queries for any size."""
+        self.assertConstantQueries(
+            self.create_news,
+            lambda: self.client.get("/api/v1/news/news/trending")
+        )
+
+    def test_stale_scores(self) -> None:
+        """Only changed scores are recomputed."""
+        self.assertTrue(self.get_score().is_stale)
+        self.assertEqual(update_stale_scores(), 1)
+        self.assertFalse(self.get_score().is_stale)
+        self.assertEqual(update_stale_scores(), 0)
+
+        self.create_comment()
+        self.assertTrue(self.get_score().is_stale)
+        self.assertEqual(update_stale_scores(), 1)
+        self.assertFalse(self.get_score().is_stale)
+
+    def test_trending_order(self) -> None:
+        """News with more activity are hotter."""
+        hot: News = self.create_news()
+        for _ in range(5):
+            self.create_comment(news=hot)
+        update_stale_scores()
+
+        response: DRF_Response = self.client.get(
+            "/api/v1/news/news/trending"
+        )
+        self.assertEqual(
+            [news["id"] for news in response.data["data"]],
+            [hot.id, self.news.id]
+        )
+
+
+class CommentsTest(NewsTestCase):
+    """Threads of comments."""
+
+    def get_comments(self, **params: Any) -> List[int]:
+        """Get ids of the listed comments."""
+        response: DRF_Response = self.client.get(
+            f"/api/v1/news/news/{self.news.id}/comments",
+            params
+        )
+        self.assertEqual(response.status_code, 200)
+        return [comment["id"] for comment in response.data["data"]]
+
+    def test_branch(self) -> None:
+        """Branch has replies of every depth, a thread only the children."""
+        root: Comment = self.create_comment()
+        other: Comment = self.create_comment()
+        reply: Comment = self.create_comment(root)
+        deep_reply: Comment = self.create_comment(reply)
+        self.create_comment(other)
+
+        self.assertEqual(self.get_comments(), [root.id, other.id])
+        self.assertEqual(self.get_comments(parent=root.id), [reply.id])
+        self.assertEqual(
+            self.get_comments(parent=root.id, branch="true"),
+            [reply.id, deep_reply.id]
+        )
+
+    def test_branch_of_reply(self) -> None:
+        """Branch is read only from a first-level comment."""
+        reply: Comment = self.create_comment(self.create_comment())
+        response: DRF_Response = self.client.get(
+            f"/api/v1/news/news/{self.news.id}/comments",
+            {"parent": reply.id, "branch": "true"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_constant_queries(self) -> None:
+        """First-level comments, replies and the branch."""
+        root: Comment = self.create_comment()
+
+        def add() -> None:
+            commentator: CustomUser = create_user(
+                f"commentator_{Comment.objects.count()}"
+            )
+            reply: Comment = self.create_comment(root, commentator)
+            self.create_comment(reply, commentator)
+            self.create_comment(commentator=commentator)
+
+        url: str = f"/api/v1/news/news/{self.news.id}/comments"
+        params: Any
+        for params in (
+            {},
+            {"parent": root.id},
+            {"parent": root.id, "branch": "true"},
+        ):
+            self.assertConstantQueries(
+                add,
+                lambda: self.client.get(url, params)
+            )
+
+
+class SearchNewsTest(NewsTestCase):
+    """Full-text search of news with category and tag facets."""
+
+    def setUp(self) -> None:  # noqa
+        super().setUp()
+        # Slugs are made of the latin titles
+        self.other_category: Category = Category.objects.create(
+            title="Sport"
+        )
+        self.tag: Tag = Tag.objects.create(name="Release")
+
+    def create_found_news(
+        self,
+        title: str,
+        category: Optional[Category] = None
+    ) -> News:
+        """Create news with the title and index it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return News.objects.create(
+                title=title,
+                content="Content",
+                category=category or self.category,
+                photo="news.jpg",
+                author=self.author
+            )
+
+    def search(self, **params: Any) -> DRF_Response:
+        """Search news by the params."""
+        response: DRF_Response = self.client.get(
+            "/api/v1/news/news/search",
+            params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_facets_count_all_matches(self) -> None:
+        """Facets count every match, not only the page."""
+        news: List[News] = [
+            self.create_found_news("Release release", self.category)
+            for _ in range(3)
+        ] + [
+            self.create_found_news("Release", self.other_category)
+            for _ in range(2)
+        ]
+        news[0].tags.add(self.tag)
+        news[3].tags.add(self.tag)
+        self.create_found_news("Lunch")
+
+        response: DRF_Response = self.search(q="release", limit=1)
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertEqual(
+            [
+                (category["id"], category["count"])
+                for category in response.data["facets"]["categories"]
+            ],
+            [(self.category.id, 3), (self.other_category.id, 2)]
+        )
+        self.assertEqual(
+            [
+                (tag["id"], tag["count"])
+                for tag in response.data["facets"]["tags"]
+            ],
+            [(self.tag.id, 2)]
+        )
+
+    def test_filters_before_ranking(self) -> None:
+        """Filtered news are found even below the best matches."""
+        for _ in range(10):
+            self.create_found_news("Release release release")
+        other: News = self.create_found_news(
+            "Release",
+            self.other_category
+        )
+        other.tags.add(self.tag)
+
+        # Only as many candidates as the page are ranked
+        with mock.patch("abstracts.search.CANDIDATES_FACTOR", 1):
+            response: DRF_Response = self.search(
+                q="release",
+                category=self.other_category.id,
+                limit=1
+            )
+            self.assertEqual(
+                [news["id"] for news in response.data["data"]],
+                [other.id]
+            )
+            self.assertEqual(
+                response.data["facets"]["categories"][0]["count"],
+                10
+            )
+            response = self.search(q="release", tag=self.tag.id, limit=1)
+            self.assertEqual(
+                [news["id"] for news in response.data["data"]],
+                [other.id]
+            )
+
+    def test_deleted_news(self) -> None:
+        """Deleted news are neither found nor counted."""
+        news: News = self.create_found_news("Release")
+        with self.captureOnCommitCallbacks(execute=True):
+            news.delete()
+        response: DRF_Response = self.search(q="release")
+        self.assertEqual(response.data["data"], [])
+        self.assertEqual(response.data["facets"]["categories"], [])
+
+
+@override_settings(SEARCH_BACKEND="postings")
+class PostingsSearchNewsTest(SearchNewsTest):
+    """Search of news kept in the postings table."""
+
+
+class LikesTest(NewsTestCase):
+    """Likes of news and the trending scores they change."""
+
+    def like(self, action: str) -> DRF_Response:
+        """Like or unlike the news by the reader."""
+        response: DRF_Response = self.client.post(
+            f"/api/v1/news/news/{self.news.id}/{action}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_likes_are_counted_once(self) -> None:
+        """Repeated like and unlike do not move the counter."""
+        self.assertEqual(self.like("like").data["data"]["likes_count"], 1)
+        self.assertEqual(self.like("like").data["data"]["likes_count"], 1)
+        self.assertEqual(
+            list(self.news.liked_users.values_list("id", flat=True)),
+            [self.reader.id]
+        )
+        self.assertEqual(self.like("unlike").data["data"]["likes_count"], 0)
+        self.assertEqual(self.like("unlike").data["data"]["likes_count"], 0)
+        self.assertFalse(self.news.liked_users.exists())
+
+    def test_like_marks_score_stale(self) -> None:
+        """Only real likes make the score stale."""
+        update_stale_scores()
+        self.like("like")
+        self.assertTrue(NewsScore.objects.get(news=self.news).is_stale)
+        update_stale_scores()
+
+        self.like("like")
+        self.assertFalse(NewsScore.objects.get(news=self.news).is_stale)
+
+    def test_rolled_back_like(self) -> None:
+        """Buffered like of a rolled back transaction is not counted."""
+        buffer: CounterBuffer = CounterBuffer(
+            hot_key_threshold=0,
+            flush_interval=60
+        )
+        with mock.patch("news.likes.get_counter_buffer", return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        set_liked(
+                            self.news,
+                            "liked_users",
+                            self.reader.id,
+                            True
+                        )
+                        raise RuntimeError("request failed")
+        self.assertFalse(self.news.liked_users.exists())
+        self.assertEqual(
+            buffer.get_pending(News, self.news.id, "likes_count"),
+            0
+        )
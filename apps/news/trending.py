@@ -0,0 +1,126 @@
+"""Trending ("hot") news ranking.
+
+score = log10(max(likes + COMMENT_WEIGHT * comments, 1)) +
+        created timestamp / SCORE_DECAY_SECONDS
+
+The time part grows for newer news, so ten times more activity is worth
+SCORE_DECAY_SECONDS of freshness. Ranks of old news decay by themselves
+and the score changes only with activity: NewsScore rows are marked
+stale by likes and comments and only stale rows are recomputed.
+"""
+from datetime import datetime
+from math import log10
+from typing import (
+    Iterable,
+    List,
+    Optional,
+)
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    Q,
+    QuerySet,
+)
+
+from news.models import (
+    News,
+    NewsScore,
+)
+
+
+COMMENT_WEIGHT = 2
+SCORE_DECAY_SECONDS = 45000
+SCORE_BATCH_SIZE = 500
+
+
+def get_hot_score(likes: int, comments: int, created: datetime) -> float:
+    """Get score of the news by its activity and creation time."""
+    activity: int = likes + COMMENT_WEIGHT * comments
+    return log10(max(activity, 1)) + \
+        created.timestamp() / SCORE_DECAY_SECONDS
+
+
+def mark_scores_stale(news_ids: Iterable[int]) -> None:
+    """Mark scores of the news to be recomputed."""
+    news_ids = [news_id for news_id in set(news_ids) if news_id]
+    if news_ids:
+        # Already stale rows of hot news are not written again
+        NewsScore.objects.filter(
+            news_id__in=news_ids,
+            is_stale=False
+        ).update(is_stale=True)
+
+
+def create_scores(news_ids: Iterable[int]) -> None:
+    """Create stale scores of the new news."""
+    NewsScore.objects.bulk_create(
+        [NewsScore(news_id=news_id) for news_id in news_ids],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def update_scores(news_ids: List[int]) -> int:
+    """Recompute scores of the news, get number of updated scores.
+
+    Written scores are not stale anymore.
+    """
+    rows: QuerySet = News.objects.filter(id__in=news_ids).annotate(
+        comments_number=Count(
+            "comments",
+            filter=Q(comments__datetime_deleted__isnull=True)
+        )
+    ).values_list("id", "likes_count", "comments_number", "datetime_created")
+    scores: List[NewsScore] = [
+        NewsScore(
+            news_id=news_id,
+            score=get_hot_score(likes, comments, created),
+            is_stale=False
+        )
+        for news_id, likes, comments, created in rows
+    ]
+    NewsScore.objects.bulk_update(scores, ["score", "is_stale"])
+    return len(scores)
+
+
+def update_stale_scores(limit: Optional[int] = None) -> int:
+    """Recompute stale scores in batches, get number of updated scores.
+
+    The stale flag is cleared with the score in one transaction and only
+    for written scores. Rows are locked until the commit, so activity
+    during the computation marks the row stale again for the next run.
+    """
+    number: int = 0
+    while limit is None or number < limit:
+        batch_size: int = SCORE_BATCH_SIZE if limit is None else \
+            min(SCORE_BATCH_SIZE, limit - number)
+        with transaction.atomic():
+            news_ids: List[int] = list(
+                NewsScore.objects.select_for_update()
+                .filter(is_stale=True)
+                .values_list("news_id", flat=True)[:batch_size]
+            )
+            updated: int = update_scores(news_ids) if news_ids else 0
+        if not updated:
+            break
+        number += updated
+    return number
+
+
+def get_trending(
+    category_id: Optional[int] = None,
+    tag_id: Optional[int] = None
+) -> QuerySet:
+    """Get not deleted news from the hottest one."""
+    news: QuerySet = News.objects.get_not_deleted()\
+        .filter(score__isnull=False)\
+        .select_related("author", "group", "category")\
+        .annotate(hot_score=F("score__score"))\
+        .order_by("-hot_score")
+    if category_id is not None:
+        news = news.filter(category_id=category_id)
+    if tag_id is not None:
+        news = news.filter(tags__id=tag_id)
+    return news
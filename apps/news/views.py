@@ -12,6 +12,7 @@ from django.db.models import (
 )
 from django.http.request import QueryDict
 
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.request import Request as DRF_Request
 from rest_framework.response import Response as DRF_Response
@@ -22,15 +23,37 @@ from abstracts.mixins import (
     DeletedRequestMixin,
     ModelInstanceMixin,
 )
-from abstracts.paginators import AbstractPageNumberPaginator
+from abstracts.paginators import (
+    AbstractPageNumberPaginator,
+    AbstractCursorPaginator,
+    get_list_paginator,
+)
 from abstracts.handlers import NoneDataHandler
+from abstracts.search import SearchResult
 from abstracts.models import AbstractDateTimeQuerySet
+from news.comments import (
+    get_branch,
+    get_thread,
+)
+from news.feed import (
+    get_feed,
+    pull_large_groups_news,
+)
+from news.likes import set_liked
+from news.search import (
+    NEWS_INDEX,
+    get_facets,
+)
+from news.trending import get_trending
 from news.models import (
+    Comment,
     Tag,
     Category,
     News,
 )
 from news.serializers import (
+    CommentSerializer,
+    FeedEntrySerializer,
     TagBaseModelSerializer,
     TagDetailSerializer,
     CategoryBaseModelSerializer,
@@ -43,6 +66,9 @@ from news.serializers import (
 )
 
 
+NEWS_SEARCH_LIMIT = 20
+
+
 class TagViewSet(
     ModelInstanceMixin,
     NoneDataHandler,
@@ -397,7 +423,374 @@ class NewsViewSet(
             data=self.get_queryset(),
             serializer_class=NewsListSerializer,
             many=True,
-            paginator=self.pagination_class()
+            paginator=get_list_paginator(
+                request,
+                self.pagination_class
+            )
+        )
+        return response
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="feed"
+    )
+    def get_feed(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to see news of followed groups and friends."""
+        # News of large groups are pulled once, then pages read the timeline
+        if not request.query_params.get("cursor"):
+            pull_large_groups_news(request.user.id)
+        response: DRF_Response = self.get_drf_response(
+            request=request,
+            data=get_feed(request.user.id),
+            serializer_class=FeedEntrySerializer,
+            many=True,
+            paginator=AbstractCursorPaginator()
+        )
+        return response
+
+    @action(
+        methods=["get", "post"],
+        detail=True,
+        url_path="comments"
+    )
+    def comments(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to list comments or POST one to add."""
+        news: Optional[News] = self.get_queryset_instance_by_id(
+            class_name=News,
+            queryset=News.objects.get_not_deleted(),
+            pk=pk
+        )
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=news,
+            message=f"Новость с ID {pk} не найдена или была удалена",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+
+        parent_pk: Optional[Any] = request.query_params.get("parent") \
+            if request.method == "GET" else request.data.get("parent")
+        parent: Optional[Comment] = None
+        if parent_pk:
+            if str(parent_pk).isdigit():
+                parent = self.get_queryset_instance_by_id(
+                    class_name=Comment,
+                    queryset=Comment.objects.get_not_deleted().filter(
+                        news_id=news.id
+                    ),
+                    pk=parent_pk
+                )
+            response = self.get_none_response(
+                object=parent,
+                message=f"Комментарий с ID {parent_pk} не найден \
+или был удален",
+                status=status.HTTP_400_BAD_REQUEST
+            )
+            if response:
+                return response
+
+        if request.method == "GET":
+            # The whole branch below the first-level parent at once
+            is_branch: bool = request.query_params.get("branch") == "true"
+            if is_branch and (not parent or parent.depth):
+                return DRF_Response(
+                    data={
+                        "response": "Ветка доступна только для комментария \
+первого уровня"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return self.get_drf_response(
+                request=request,
+                data=get_branch(
+                    news_id=news.id,
+                    root_id=parent.id
+                ) if is_branch else get_thread(
+                    news_id=news.id,
+                    parent_id=parent.id if parent else None
+                ),
+                serializer_class=CommentSerializer,
+                many=True,
+                paginator=AbstractCursorPaginator()
+            )
+
+        content: Optional[str] = request.data.get("content", None)
+        if not content or not isinstance(content, str):
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить 'content'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        comment: Comment = Comment(
+            content=content,
+            commentator=request.user,
+            news=news
+        )
+        comment.set_parent(parent)
+        comment.save()
+        return DRF_Response(
+            data={
+                "data": CommentSerializer(
+                    comment,
+                    context={"request": request}
+                ).data
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path="like"
+    )
+    def like_news(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to like the news."""
+        return self.get_news_like_response(request, pk, is_liked=True)
+
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path="unlike"
+    )
+    def unlike_news(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to take the like of the news back."""
+        return self.get_news_like_response(request, pk, is_liked=False)
+
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path=r"comments/(?P<comment_pk>\d+)/like"
+    )
+    def like_comment(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        comment_pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to like the comment of the news."""
+        return self.get_comment_like_response(
+            request,
+            pk,
+            comment_pk,
+            is_liked=True
+        )
+
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path=r"comments/(?P<comment_pk>\d+)/unlike"
+    )
+    def unlike_comment(
+        self,
+        request: DRF_Request,
+        pk: int = 0,
+        comment_pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to take the like of the comment back."""
+        return self.get_comment_like_response(
+            request,
+            pk,
+            comment_pk,
+            is_liked=False
+        )
+
+    def get_news_like_response(
+        self,
+        request: DRF_Request,
+        pk: int,
+        is_liked: bool
+    ) -> DRF_Response:
+        """Like or unlike the news by the user of the request."""
+        news: Optional[News] = News.objects.get_not_deleted()\
+            .filter(id=pk)\
+            .first()
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=news,
+            message=f"Новость с ID {pk} не найдена или была удалена",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+        return self.get_like_response(news, "liked_users", request, is_liked)
+
+    def get_comment_like_response(
+        self,
+        request: DRF_Request,
+        pk: int,
+        comment_pk: int,
+        is_liked: bool
+    ) -> DRF_Response:
+        """Like or unlike the comment by the user of the request."""
+        comment: Optional[Comment] = Comment.objects.get_not_deleted()\
+            .filter(id=comment_pk, news_id=pk)\
+            .first()
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=comment,
+            message=f"Комментарий с ID {comment_pk} не найден \
+или был удален",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+        return self.get_like_response(comment, "likes", request, is_liked)
+
+    def get_like_response(
+        self,
+        instance: Model,
+        field_name: str,
+        request: DRF_Request,
+        is_liked: bool
+    ) -> DRF_Response:
+        """Get response with number of likes after the like is set."""
+        return DRF_Response(
+            data={
+                "data": {
+                    "id": instance.id,
+                    "likes_count": set_liked(
+                        instance=instance,
+                        field_name=field_name,
+                        user_id=request.user.id,
+                        is_liked=is_liked
+                    ),
+                    "is_liked": is_liked
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="search"
+    )
+    def search_news(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to find news by q with category/tag facets."""
+        query: str = request.query_params.get("q", "").strip()
+        if not query:
+            return DRF_Response(
+                data={
+                    "response": "Необходимо предоставить 'q'"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters: Dict[str, int] = {}
+        param: str
+        for param in ("category", "tag"):
+            value: Optional[str] = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                filters[param] = int(value)
+            except ValueError:
+                return DRF_Response(
+                    data={
+                        "response": f"Поле '{param}' должно быть числом"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        try:
+            limit: int = min(
+                int(request.query_params.get("limit", NEWS_SEARCH_LIMIT)),
+                NEWS_SEARCH_LIMIT
+            )
+        except ValueError:
+            limit = NEWS_SEARCH_LIMIT
+
+        # Facets are counted over all matches of q, not only the filtered
+        matched_news: QuerySet = News.objects.get_not_deleted().filter(
+            id__in=NEWS_INDEX.get_match_ids(query)
+        )
+        news: QuerySet = matched_news
+        if "category" in filters:
+            news = news.filter(category_id=filters["category"])
+        if "tag" in filters:
+            news = news.filter(tags__id=filters["tag"])
+        results: List[SearchResult] = NEWS_INDEX.search(
+            query=query,
+            limit=limit,
+            object_ids=news.values("id") if filters else None
+        )
+        page_ids: List[int] = [result.object_id for result in results]
+        found_news: Dict[int, News] = self.get_queryset().in_bulk(page_ids)
+        return DRF_Response(
+            data={
+                "data": NewsListSerializer(
+                    [
+                        found_news[news_id] for news_id in page_ids
+                        if news_id in found_news
+                    ],
+                    many=True
+                ).data,
+                "facets": get_facets(matched_news)
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="trending"
+    )
+    def get_trending(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request to see hot news by category and tag."""
+        filters: Dict[str, Optional[int]] = {}
+        param: str
+        for param in ("category", "tag"):
+            value: Optional[str] = request.query_params.get(param)
+            try:
+                filters[f"{param}_id"] = int(value) if value else None
+            except ValueError:
+                return DRF_Response(
+                    data={
+                        "response": f"Поле '{param}' должно быть числом"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        response: DRF_Response = self.get_drf_response(
+            request=request,
+            data=get_trending(**filters),
+            serializer_class=NewsListSerializer,
+            many=True,
+            paginator=AbstractCursorPaginator()
         )
         return response
 
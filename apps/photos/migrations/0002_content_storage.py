@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:03
+
+import abstracts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profilephoto',
+            name='photo',
+            field=models.ImageField(storage=abstracts.storage.ContentAddressedStorage(), upload_to='photos/profile_photos/%Y/%m/%d', verbose_name='Фото профиля'),
+        ),
+    ]
@@ -7,6 +7,7 @@ from abstracts.models import (
     AbstractDateTime,
     AbstractDateTimeQuerySet,
 )
+from abstracts.storage import content_storage
 from auths.models import CustomUser
 from locations.models import City
 
@@ -26,6 +27,7 @@ class ProfilePhotoQuerySet(AbstractDateTimeQuerySet):  # noqa
 class ProfilePhoto(AbstractDateTime):  # noqa
     photo = models.ImageField(
         upload_to="photos/profile_photos/%Y/%m/%d",
+        storage=content_storage,
         verbose_name="Фото профиля"
     )
     description = models.TextField(
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import (
+    Tuple,
+    Any,
+    Dict,
+)
+
+from django.core.management.base import BaseCommand
+
+from videos.uploads import clear_uploads
+
+
+class Command(BaseCommand):
+    """Delete expired chunked uploads of videos."""
+
+    help = 'Delete expired video uploads (run periodically).'
+
+    def __init__(self, *args: Tuple[Any], **kwargs: Dict[Any, Any]) -> None:  # noqa
+        super().__init__(args, kwargs)
+
+    def handle(self, *args: tuple, **kwargs: dict) -> None:
+        """Handle uploads clearing."""
+        start: datetime = datetime.now()
+
+        print(f"Удалено {clear_uploads()} загрузок видео")
+
+        print(
+            'Очистка загрузок составила: {} секунд'.format(
+                (datetime.now()-start).total_seconds()
+            )
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:03
+
+import abstracts.storage
+from django.db import migrations, models
+import videos.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='video_file',
+            field=models.FileField(storage=abstracts.storage.ContentAddressedStorage(), upload_to='documents/videos/%Y/%m/%d', validators=[videos.validators.video_format_validator], verbose_name='Видео файл'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('videos', '0002_content_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datetime_created', models.DateTimeField(auto_now_add=True, verbose_name='время создания')),
+                ('datetime_updated', models.DateTimeField(auto_now=True, verbose_name='время обновления')),
+                ('datetime_deleted', models.DateTimeField(blank=True, null=True, verbose_name='время удаления')),
+                ('name', models.CharField(max_length=250, verbose_name='Название видео')),
+                ('content_type', models.CharField(max_length=100, verbose_name='Тип файла')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер файла')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Загружено байт')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+                ('video', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='videos.video', verbose_name='Видео')),
+            ],
+            options={
+                'verbose_name': 'Загрузка видео',
+                'verbose_name_plural': 'Загрузки видео',
+                'ordering': ('-datetime_created',),
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 
 from abstracts.models import AbstractDateTime
+from abstracts.storage import content_storage
 from auths.models import (
     CustomUser,
 )
@@ -15,6 +16,7 @@ class Video(AbstractDateTime):  # noqa
     )
     video_file = models.FileField(
         upload_to="documents/videos/%Y/%m/%d",
+        storage=content_storage,
         verbose_name="Видео файл",
         validators=[video_format_validator]
     )
@@ -79,3 +81,46 @@ class VideoKeeper(models.Model):
     def __str__(self) -> str:
         """Override methode str."""
         return f"{self.user} {self.video}"
+
+
+class VideoUpload(AbstractDateTime):  # noqa
+    CONTENT_TYPE_MAX_LEN = 100
+    owner = models.ForeignKey(
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name="video_uploads",
+        verbose_name="Владелец"
+    )
+    name = models.CharField(
+        max_length=Video.VIDEO_NAME_MAX_LEN,
+        verbose_name="Название видео"
+    )
+    content_type = models.CharField(
+        max_length=CONTENT_TYPE_MAX_LEN,
+        verbose_name="Тип файла"
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name="Размер файла"
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Загружено байт"
+    )
+    video = models.OneToOneField(
+        to=Video,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="upload",
+        verbose_name="Видео"
+    )
+
+    class Meta:  # noqa
+        verbose_name = "Загрузка видео"
+        verbose_name_plural = "Загрузки видео"
+        ordering = (
+            "-datetime_created",
+        )
+
+    def __str__(self) -> str:  # noqa
+        return f"Загрузка {self.name}: {self.offset} из {self.size} байт"
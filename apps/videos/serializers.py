@@ -8,7 +8,10 @@ from rest_framework.serializers import (
 
 from auths.serializers import CustomUserShortSerializer
 from abstracts.mixins import AbstractDateTimeSerializerMixin
-from videos.models import Video
+from videos.models import (
+    Video,
+    VideoUpload,
+)
 
 
 # Video model Serializers
@@ -63,3 +66,20 @@ class VideoDetailSerializer(VideoListSerializer):
             "is_deleted",
             "datetime_created",
         )
+
+
+class VideoUploadSerializer(ModelSerializer):
+    """VideoUploadSerializer with progress of the upload."""
+
+    class Meta:
+        """Customization of the Serializer."""
+
+        model: VideoUpload = VideoUpload
+        fields: Tuple[str] = (
+            "id",
+            "name",
+            "content_type",
+            "size",
+            "offset",
+            "video",
+        )
@@ -1,3 +1,211 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from hashlib import sha256
+from typing import Any
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from rest_framework.response import Response as DRF_Response
+from rest_framework.test import APIClient
+
+from abstracts.models import StoredBlob
+from abstracts.storage import content_storage
+from abstracts.testing import create_user
+from auths.models import CustomUser
+from videos import uploads
+from videos.models import (
+    Video,
+    VideoUpload,
+)
+
+
+# MP4 starts with the ftyp box
+VIDEO_CONTENT = b"\x00\x00\x00\x18ftypmp42" + bytes(range(256)) * 4
+
+
+class VideoUploadTest(TestCase):
+    """Resumable chunked upload of a video."""
+
+    def setUp(self) -> None:  # noqa
+        for cache in caches.all():
+            cache.clear()
+        self.directory: str = tempfile.mkdtemp()
+        self.media: Any = override_settings(MEDIA_ROOT=self.directory)
+        self.media.enable()
+        self.user: CustomUser = create_user("uploader")
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(self.user)
+        response: DRF_Response = self.client.post(
+            "/api/v1/videos/videos/uploads",
+            {
+                "name": "Video",
+                "size": len(VIDEO_CONTENT),
+                "content_type": "video/mp4",
+            },
+            format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.upload: VideoUpload = VideoUpload.objects.get(
+            id=response.data["data"]["id"]
+        )
+        self.url: str = f"/api/v1/videos/videos/uploads/{self.upload.id}"
+
+    def tearDown(self) -> None:  # noqa
+        self.media.disable()
+        shutil.rmtree(self.directory)
+
+    def put_chunk(
+        self,
+        offset: int,
+        length: int,
+        checksum: str = ""
+    ) -> DRF_Response:
+        """Send the chunk of the video at the offset."""
+        chunk: bytes = VIDEO_CONTENT[offset:offset + length]
+        return self.client.generic(
+            "PUT",
+            f"{self.url}?offset={offset}",
+            chunk,
+            content_type="application/octet-stream",
+            HTTP_X_CHUNK_CHECKSUM=checksum or sha256(chunk).hexdigest()
+        )
+
+    def put_all(self, chunk_size: int = 300) -> None:
+        """Send the video chunk by chunk."""
+        offset: int
+        for offset in range(0, len(VIDEO_CONTENT), chunk_size):
+            response: DRF_Response = self.put_chunk(offset, chunk_size)
+            self.assertEqual(response.status_code, 200)
+
+    def get_offset(self) -> int:
+        """Get offset stored by the server."""
+        return self.client.get(self.url).data["data"]["offset"]
+
+    def finalize(self) -> DRF_Response:
+        """Create the video of the upload."""
+        return self.client.post(f"{self.url}/finalize")
+
+    def assertVideoStored(self, video: Video) -> None:
+        """Check the video file is the blob of the uploaded content."""
+        digest: str = sha256(VIDEO_CONTENT).hexdigest()
+        self.assertEqual(
+            video.video_file.name,
+            content_storage.get_hashed_name(digest, "video.mp4")
+        )
+        with video.video_file.open("rb") as file:
+            self.assertEqual(file.read(), VIDEO_CONTENT)
+        self.assertEqual(
+            StoredBlob.objects.get(name=video.video_file.name).references,
+            1
+        )
+        self.assertFalse(
+            os.path.exists(uploads.get_staging_path(self.upload))
+        )
+
+    def test_resume_after_broken_chunk(self) -> None:
+        """Broken chunk is sent again from the stored offset."""
+        self.assertEqual(self.put_chunk(0, 300).status_code, 200)
+        response: DRF_Response = self.put_chunk(300, 300, checksum="0" * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_offset(), 300)
+
+        response = self.put_chunk(600, 300)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["offset"], 300)
+
+        offset: int
+        for offset in range(300, len(VIDEO_CONTENT), 300):
+            self.assertEqual(self.put_chunk(offset, 300).status_code, 200)
+        self.assertEqual(self.get_offset(), len(VIDEO_CONTENT))
+
+        response = self.finalize()
+        self.assertEqual(response.status_code, 200)
+        self.assertVideoStored(
+            Video.objects.get(id=response.data["data"]["id"])
+        )
+
+    def test_concurrent_writer_of_chunk(self) -> None:
+        """Loser of the same offset leaves the staging file alone."""
+        stale: VideoUpload = VideoUpload.objects.get(id=self.upload.id)
+        self.assertEqual(self.put_chunk(0, 300).status_code, 200)
+        chunk: bytes = VIDEO_CONTENT[:8] + b"\xff" * 292
+        with self.assertRaises(ValueError):
+            uploads.write_chunk(
+                stale,
+                0,
+                len(chunk),
+                io.BytesIO(chunk),
+                sha256(chunk).hexdigest()
+            )
+
+        path: str = uploads.get_staging_path(self.upload)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(300), VIDEO_CONTENT[:300])
+        self.assertEqual(
+            os.listdir(os.path.dirname(path)),
+            [os.path.basename(path)]
+        )
+        self.assertEqual(self.get_offset(), 300)
+
+    def test_resume_in_other_process(self) -> None:
+        """Hash of chunks written by another process is read from disk."""
+        self.assertEqual(self.put_chunk(0, 300).status_code, 200)
+        # Running hashes of this process are lost
+        uploads._hashers.clear()
+        offset: int
+        for offset in range(300, len(VIDEO_CONTENT), 300):
+            self.assertEqual(self.put_chunk(offset, 300).status_code, 200)
+        uploads._hashers.clear()
+
+        response: DRF_Response = self.finalize()
+        self.assertEqual(response.status_code, 200)
+        self.assertVideoStored(
+            Video.objects.get(id=response.data["data"]["id"])
+        )
+
+    def test_finalize_incomplete_upload(self) -> None:
+        """Video is created only of the whole file."""
+        self.put_chunk(0, 300)
+        response: DRF_Response = self.finalize()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Video.objects.exists())
+
+    def test_finalize_is_repeatable(self) -> None:
+        """Repeated finalize gets the same video."""
+        self.put_all()
+        video_id: int = self.finalize().data["data"]["id"]
+        response: DRF_Response = self.finalize()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["id"], video_id)
+        self.assertEqual(Video.objects.count(), 1)
+
+        response = self.put_chunk(0, 300)
+        self.assertEqual(response.status_code, 409)
+
+    def test_failed_finalize_keeps_file(self) -> None:
+        """Finalize failed while moving the file can be retried."""
+        self.put_all()
+        with mock.patch.object(
+            content_storage,
+            "save_hashed",
+            side_effect=OSError("disk is full")
+        ):
+            with self.assertRaises(OSError):
+                uploads.finalize_upload(self.upload)
+        self.assertFalse(Video.objects.exists())
+        self.upload.refresh_from_db()
+        self.assertIsNone(self.upload.video_id)
+        self.assertTrue(
+            os.path.exists(uploads.get_staging_path(self.upload))
+        )
+
+        video: Video = uploads.finalize_upload(self.upload)
+        self.assertEqual(self.upload.video_id, video.id)
+        self.assertVideoStored(video)
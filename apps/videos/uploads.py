@@ -0,0 +1,264 @@
+"""Resumable chunked uploads of videos.
+
+A client creates VideoUpload with the size of the file and sends chunks
+with their offsets and SHA-256. Verified chunks are copied into a
+staging file next to the content-addressed blobs, the SHA-256 of the
+whole file is updated chunk by chunk, so the finished file is moved into
+the storage without being read again. A lost connection costs one
+chunk: the client asks the upload for its offset and continues from it.
+
+The running SHA-256 lives only in the memory of the process (hashlib
+cannot export its state). Chunks of one upload must reach the same
+process, e.g. by sticky routing on the upload id. A chunk that lands in
+another process, or comes after a restart, re-reads the staging file up
+to its offset. Spreading every chunk over processes makes an upload
+cost O(n^2) reads.
+"""
+import mimetypes
+import os
+import tempfile
+from datetime import (
+    datetime,
+    timedelta,
+)
+from hashlib import sha256
+from threading import Lock
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Tuple,
+)
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from abstracts.storage import (
+    content_storage,
+    touch_blob,
+)
+from videos.models import (
+    Video,
+    VideoUpload,
+)
+from videos.validators import VIDEO_FILE_FORMATS
+
+
+DEFAULT_MAX_SIZE = 4 * 1024 ** 3
+DEFAULT_CHUNK_MAX_SIZE = 8 * 1024 ** 2
+DEFAULT_EXPIRE = 24 * 60 * 60
+READ_BLOCK_SIZE = 64 * 1024
+HASHERS_MAX_TRACKED = 1000
+
+# upload_id -> (offset, SHA-256 of the file before the offset)
+_hashers: Dict[int, Tuple[int, Any]] = {}
+_hashers_lock: Lock = Lock()
+
+
+def get_upload_config() -> Dict[str, Any]:
+    """Get upload configuration from settings.VIDEO_UPLOAD."""
+    config: Dict[str, Any] = getattr(settings, "VIDEO_UPLOAD", {})
+    return {
+        "MAX_SIZE": config.get("MAX_SIZE", DEFAULT_MAX_SIZE),
+        "CHUNK_MAX_SIZE": config.get("CHUNK_MAX_SIZE", DEFAULT_CHUNK_MAX_SIZE),
+        "EXPIRE": config.get("EXPIRE", DEFAULT_EXPIRE),
+    }
+
+
+def get_staging_path(upload: VideoUpload) -> str:
+    """Get path of the file the chunks are written to."""
+    return os.path.join(
+        content_storage.get_temp_directory(),
+        f"video-upload-{upload.id}"
+    )
+
+
+def _get_hasher(upload: VideoUpload, path: str) -> Any:
+    with _hashers_lock:
+        offset: int
+        hasher: Any
+        offset, hasher = _hashers.get(upload.id, (-1, None))
+    if offset == upload.offset:
+        return hasher.copy()
+
+    # Chunks written by another process or before a restart are hashed
+    # from the staging file, see the module docstring
+    hasher = sha256()
+    with open(path, "rb") as file:
+        remaining: int = upload.offset
+        while remaining:
+            block: bytes = file.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _set_hasher(upload_id: int, offset: int, hasher: Any) -> None:
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+        if len(_hashers) >= HASHERS_MAX_TRACKED:
+            del _hashers[next(iter(_hashers))]
+        _hashers[upload_id] = (offset, hasher)
+
+
+def create_upload(
+    owner_id: int,
+    name: str,
+    size: int,
+    content_type: str
+) -> VideoUpload:
+    """Create upload of the file and its empty staging file."""
+    if content_type not in VIDEO_FILE_FORMATS:
+        raise ValueError("Расширение файла не по типу видео")
+    if not 0 < size <= get_upload_config()["MAX_SIZE"]:
+        raise ValueError("Недопустимый размер файла")
+    if not name or len(name) > Video.VIDEO_NAME_MAX_LEN:
+        raise ValueError("Недопустимое название видео")
+
+    upload: VideoUpload = VideoUpload.objects.create(
+        owner_id=owner_id,
+        name=name,
+        size=size,
+        content_type=content_type
+    )
+    open(get_staging_path(upload), "wb").close()
+    return upload
+
+
+def write_chunk(
+    upload: VideoUpload,
+    offset: int,
+    length: int,
+    stream: IO,
+    checksum: str
+) -> int:
+    """Write the chunk of the stream at the offset, get the new offset.
+
+    The chunk is received into a temporary file and checked against the
+    checksum first. It is copied into the staging file only after the
+    offset is advanced by a conditional UPDATE, in the same transaction,
+    so a concurrent writer of the same offset never touches the file.
+    """
+    if upload.video_id:
+        raise ValueError("Загрузка уже завершена")
+    if offset != upload.offset:
+        raise ValueError("Смещение не совпадает с загруженным")
+    if not 0 < length <= get_upload_config()["CHUNK_MAX_SIZE"] or \
+            offset + length > upload.size:
+        raise ValueError("Недопустимый размер части")
+
+    path: str = get_staging_path(upload)
+    descriptor: int
+    chunk_path: str
+    descriptor, chunk_path = tempfile.mkstemp(
+        prefix=f"video-upload-{upload.id}-",
+        dir=content_storage.get_temp_directory()
+    )
+    try:
+        chunk_hasher: Any = sha256()
+        with open(descriptor, "w+b") as chunk_file:
+            remaining: int = length
+            while remaining:
+                block: bytes = stream.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    raise ValueError("Часть передана не полностью")
+                chunk_hasher.update(block)
+                chunk_file.write(block)
+                remaining -= len(block)
+            if chunk_hasher.hexdigest() != checksum.lower():
+                raise ValueError("Контрольная сумма части не совпадает")
+            if offset == 0:
+                # MP4 starts with the ftyp box
+                chunk_file.seek(4)
+                if chunk_file.read(4) != b"ftyp":
+                    raise ValueError("Файл не является видео mp4")
+
+            hasher: Any = _get_hasher(upload, path)
+            with transaction.atomic():
+                # Concurrent writer of the same chunk loses
+                updated: int = VideoUpload.objects\
+                    .filter(id=upload.id, offset=offset)\
+                    .update(
+                        offset=offset + length,
+                        datetime_updated=timezone.now()
+                    )
+                if not updated:
+                    raise ValueError("Смещение не совпадает с загруженным")
+                # A failed copy rolls the offset back
+                chunk_file.seek(0)
+                with open(path, "r+b") as file:
+                    file.seek(offset)
+                    block = chunk_file.read(READ_BLOCK_SIZE)
+                    while block:
+                        hasher.update(block)
+                        file.write(block)
+                        block = chunk_file.read(READ_BLOCK_SIZE)
+                    file.flush()
+                    os.fsync(file.fileno())
+    finally:
+        os.unlink(chunk_path)
+
+    _set_hasher(upload.id, offset + length, hasher)
+    upload.offset = offset + length
+    return upload.offset
+
+
+def finalize_upload(upload: VideoUpload) -> Video:
+    """Create the video of the fully uploaded file.
+
+    The upload is locked and the video is created before the staging
+    file is moved into the storage, so a failed or repeated finalize
+    keeps the file and concurrent ones create one video.
+    """
+    with transaction.atomic():
+        locked: VideoUpload = VideoUpload.objects.select_for_update()\
+            .select_related("video")\
+            .get(id=upload.id)
+        if locked.video_id:
+            return locked.video
+        if locked.offset != locked.size:
+            raise ValueError("Файл загружен не полностью")
+
+        path: str = get_staging_path(locked)
+        hexdigest: str = _get_hasher(locked, path).hexdigest()
+        extension: str = mimetypes.guess_extension(locked.content_type) or ""
+        name: str = f"{locked.id}{extension}"
+        blob_name: str = content_storage.get_hashed_name(hexdigest, name)
+        # The blob row must exist before the video references it
+        touch_blob(blob_name, locked.size)
+        # Saved by Video.save() to keep the owner among the keepers
+        video: Video = Video.objects.create(
+            name=locked.name,
+            owner_id=locked.owner_id,
+            video_file=blob_name
+        )
+        # Databases without row locks are guarded by the condition
+        if not VideoUpload.objects.filter(id=locked.id, video__isnull=True)\
+                .update(video=video, datetime_updated=timezone.now()):
+            raise ValueError("Загрузка уже завершена")
+        content_storage.save_hashed(path, hexdigest, locked.size, name)
+    upload.video = video
+    with _hashers_lock:
+        _hashers.pop(upload.id, None)
+    return video
+
+
+def clear_uploads() -> int:
+    """Delete uploads not updated for EXPIRE seconds and their files."""
+    updated_before: datetime = timezone.now() - \
+        timedelta(seconds=get_upload_config()["EXPIRE"])
+    number: int = 0
+    upload: VideoUpload
+    for upload in VideoUpload.objects.filter(
+        datetime_updated__lt=updated_before
+    ).only("id"):
+        path: str = get_staging_path(upload)
+        if os.path.exists(path):
+            os.unlink(path)
+        with _hashers_lock:
+            _hashers.pop(upload.id, None)
+        number += VideoUpload.objects.filter(id=upload.id).delete()[0]
+    return number
@@ -21,11 +21,21 @@ from abstracts.mixins import (
 )
 from abstracts.paginators import AbstractPageNumberPaginator
 from abstracts.handlers import NoneDataHandler
-from videos.models import Video, VideoKeeper
+from videos.models import (
+    Video,
+    VideoKeeper,
+    VideoUpload,
+)
 from videos.serializers import (
     VideoBaseModelSerializer,
     VideoListSerializer,
     VideoDetailSerializer,
+    VideoUploadSerializer,
+)
+from videos.uploads import (
+    create_upload,
+    finalize_upload,
+    write_chunk,
 )
 
 
@@ -361,3 +371,165 @@ class VideoViewSet(
         )
 
         return response
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="uploads",
+        permission_classes=(
+            permissions.IsAuthenticated,
+        )
+    )
+    def create_video_upload(
+        self,
+        request: DRF_Request,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to start chunked upload of a video."""
+        size: str = str(request.data.get("size", ""))
+        error_message: str = ""
+        upload: Optional[VideoUpload] = None
+        if not size.isdigit():
+            error_message = "Поле 'size' должно быть числом байт"
+        else:
+            try:
+                upload = create_upload(
+                    owner_id=request.user.id,
+                    name=str(request.data.get("name", "")),
+                    size=int(size),
+                    content_type=str(request.data.get("content_type", ""))
+                )
+            except ValueError as error:
+                error_message = str(error)
+
+        if error_message:
+            return DRF_Response(
+                data={
+                    "response": "Загрузка не создана",
+                    "message": error_message
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return self.get_drf_response(
+            request=request,
+            data=upload,
+            serializer_class=VideoUploadSerializer
+        )
+
+    def get_upload(
+        self,
+        request: DRF_Request,
+        upload_pk: int
+    ) -> Optional[VideoUpload]:
+        """Get upload of the request user."""
+        return VideoUpload.objects.filter(
+            id=upload_pk,
+            owner_id=request.user.id
+        ).first()
+
+    @action(
+        methods=["get", "put"],
+        detail=False,
+        url_path=r"uploads/(?P<upload_pk>\d+)",
+        permission_classes=(
+            permissions.IsAuthenticated,
+        )
+    )
+    def upload_video_chunk(
+        self,
+        request: DRF_Request,
+        upload_pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle GET-request for the offset or PUT-request with a chunk.
+
+        The chunk is the raw body, its offset is the 'offset' parameter
+        and its SHA-256 is the X-Chunk-Checksum header.
+        """
+        upload: Optional[VideoUpload] = self.get_upload(request, upload_pk)
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=upload,
+            message=f"Загрузка с PK {upload_pk} не найдена",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+
+        if request.method == "PUT":
+            offset: str = request.query_params.get("offset", "")
+            if offset != str(upload.offset):
+                # The client continues from the stored offset
+                return DRF_Response(
+                    data={
+                        "response": "Смещение не совпадает с загруженным",
+                        "offset": upload.offset
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+            try:
+                write_chunk(
+                    upload=upload,
+                    offset=upload.offset,
+                    length=int(request.META.get("CONTENT_LENGTH") or 0),
+                    stream=request.stream,
+                    checksum=request.META.get("HTTP_X_CHUNK_CHECKSUM", "")
+                )
+            except ValueError as error:
+                return DRF_Response(
+                    data={
+                        "response": "Часть не загружена",
+                        "message": str(error)
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        return self.get_drf_response(
+            request=request,
+            data=upload,
+            serializer_class=VideoUploadSerializer
+        )
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path=r"uploads/(?P<upload_pk>\d+)/finalize",
+        permission_classes=(
+            permissions.IsAuthenticated,
+        )
+    )
+    def finalize_video_upload(
+        self,
+        request: DRF_Request,
+        upload_pk: int = 0,
+        *args: Tuple[Any],
+        **kwargs: Dict[str, Any]
+    ) -> DRF_Response:
+        """Handle POST-request to create the video of the upload."""
+        upload: Optional[VideoUpload] = self.get_upload(request, upload_pk)
+        response: Optional[DRF_Response] = self.get_none_response(
+            object=upload,
+            message=f"Загрузка с PK {upload_pk} не найдена",
+            status=status.HTTP_400_BAD_REQUEST
+        )
+        if response:
+            return response
+
+        try:
+            video: Video = finalize_upload(upload)
+        except ValueError as error:
+            return DRF_Response(
+                data={
+                    "response": "Видео не создано",
+                    "message": str(error)
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return self.get_drf_response(
+            request=request,
+            data=video,
+            serializer_class=VideoListSerializer
+        )
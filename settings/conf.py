@@ -46,6 +46,167 @@ REST_FRAMEWORK = {
 }
 
 
+# ------------------------------------------------
+# Cache configuration
+#
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Model instances (abstracts.cache), shared by all processes so
+    # invalidation reaches every copy. Table made by abstracts migrations
+    'instances': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_instances',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # Sorted ids of accepted friends per user (auths.graph), shared like
+    # the instances. Table made by abstracts migrations
+    'friends': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_friends',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # Last pulls of large groups news per user (news.feed), shared by
+    # processes. Table made by abstracts migrations
+    'feed': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_feed',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # Numbers of comments per news (news.comments)
+    'comments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'comments',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+# Models read through the instance cache: {'app_label.Model': TTL}
+INSTANCE_CACHE_MODELS = {
+    'auths.CustomUser': 60,
+    'chats.Chat': 60,
+    'videos.Video': 60,
+    'news.Tag': 300,
+    'news.Category': 300,
+}
+
+
+# ------------------------------------------------
+# Query budget configuration
+#
+# Maximum number of SQL queries per endpoint (<app_label>/<url_name>)
+# Lists include the writes of a cold instance cache, 5 queries per key
+QUERY_BUDGETS = {
+    'default': 30,
+    'news/news-list': 20,
+    'news/news-detail': 20,
+    'chats/chat-list': 20,
+    'chats/message-list': 20,
+}
+# Number of identical query shapes in one request treated as N+1
+QUERY_BUDGET_DUPLICATE_THRESHOLD = 5
+# Raise QueryBudgetExceeded instead of logging a warning
+QUERY_BUDGET_RAISE = False
+
+
+# ------------------------------------------------
+# Channel layers configuration
+#
+# Backends selected by the CHANNEL_LAYER environment variable
+CHANNEL_LAYER_BACKENDS = {
+    'memory': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+    'sqlite': {
+        'BACKEND': 'abstracts.layers.SQLiteChannelLayer',
+        'CONFIG': {
+            'path': 'channels.sqlite3',
+            'expiry': 60,
+            'capacity': 100,
+        },
+    },
+    'redis': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [('127.0.0.1', 6379)],
+        },
+    },
+}
+
+
+# ------------------------------------------------
+# Background workers and search configuration
+#
+# Run background tasks right away in the caller thread
+BACKGROUND_WORKERS_SYNC = False
+# Full-text search backend: 'fts5' (SQLite), 'postings' or 'auto'
+SEARCH_BACKEND = 'auto'
+# Number of precomputed friend suggestions per user
+FRIEND_SUGGESTIONS_LIMIT = 20
+
+
+# ------------------------------------------------
+# Chat message writer configuration
+#
+# Websocket messages are saved in batches of MAX_BATCH_SIZE messages or
+# FLUSH_INTERVAL seconds after the first unsaved message
+CHAT_MESSAGE_WRITER = {
+    'MAX_BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 0.05,
+}
+
+
+# ------------------------------------------------
+# Presence configuration
+#
+# Users are online for ONLINE_TIMEOUT seconds after the last request or
+# while their websocket is open, last_seen is written once a FLUSH_INTERVAL
+PRESENCE = {
+    'ONLINE_TIMEOUT': 300,
+    'FLUSH_INTERVAL': 30,
+}
+
+
+# ------------------------------------------------
+# News feed configuration
+#
+# News of groups with more than FANOUT_MAX_FOLLOWERS followers are read
+# from the group (up to PULL_LIMIT latest) instead of being pushed, at
+# most once in PULL_INTERVAL seconds and only newer than the last pull
+NEWS_FEED = {
+    'FANOUT_MAX_FOLLOWERS': 10000,
+    'PULL_LIMIT': 100,
+    'PULL_INTERVAL': 30,
+}
+
+
+# ------------------------------------------------
+# Counter buffer configuration
+#
+# Counters adjusted more than HOT_KEY_THRESHOLD times per second (likes
+# of viral news) are written in batches every FLUSH_INTERVAL seconds
+COUNTER_BUFFER = {
+    'HOT_KEY_THRESHOLD': 50,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+
 # ------------------------------------------------
 # Shell plus configuration
 #
@@ -90,3 +251,32 @@ CORS_ALLOW_METHODS = (
     'PATCH',
     'POST',
 )
+
+# ------------------------------------------------
+# File streaming configuration
+#
+# With X_ACCEL_REDIRECT_PREFIX (e.g. '/protected/') streamed files are
+# sent by nginx from an internal location aliasing MEDIA_ROOT
+FILE_STREAMING = {
+    'X_ACCEL_REDIRECT_PREFIX': '',
+}
+
+# ------------------------------------------------
+# Content-addressed storage configuration
+#
+# Blobs without references are removed by collect_blobs after
+# GRACE_PERIOD seconds
+CONTENT_STORAGE = {
+    'GRACE_PERIOD': 7 * 24 * 60 * 60,
+}
+
+# ------------------------------------------------
+# Chunked video upload configuration
+#
+# Sizes are in bytes, uploads not updated for EXPIRE seconds are removed
+# by clear_video_uploads
+VIDEO_UPLOAD = {
+    'MAX_SIZE': 4 * 1024 ** 3,
+    'CHUNK_MAX_SIZE': 8 * 1024 ** 2,
+    'EXPIRE': 24 * 60 * 60,
+}
@@ -30,20 +30,15 @@ INSTALLED_APPS += [  # noqa
 ]
 MIDDLEWARE += [  # noqa
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "abstracts.middleware.QueryBudgetMiddleware",
 ]
 
 # ----------------------------------------------------------
 #
+# memory: one process only, sqlite: several local ASGI workers,
+# redis: channels_redis for deployments with Redis
 CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-    }
+    'default': CHANNEL_LAYER_BACKENDS[  # noqa
+        os.environ.get('CHANNEL_LAYER', 'memory')  # noqa
+    ]
 }
-# CHANNEL_LAYERS = {
-#     'default': {
-#         'BACKEND': 'channels_redis.core.RedisChannelLayer',
-#         'CONFIG': {
-#             "hosts": [('127.0.0.1', 6379)],
-#         },
-#     },
-# }
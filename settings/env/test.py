@@ -24,4 +24,7 @@ INSTALLED_APPS += [  # noqa
 ]
 MIDDLEWARE += [  # noqa
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "abstracts.middleware.QueryBudgetMiddleware",
 ]
+QUERY_BUDGET_RAISE = True
+BACKGROUND_WORKERS_SYNC = True